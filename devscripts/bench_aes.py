@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Measures the throughput of the AES functions in yt_dlp.aes
+
+aes_cbc_decrypt_bytes uses pycryptodome when it is installed; the other
+functions always use the native implementation.
+"""
+
+# Allow direct execution
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import argparse
+import time
+
+from yt_dlp.aes import (
+    aes_cbc_decrypt_bytes,
+    aes_cbc_encrypt_bytes,
+    aes_ctr_decrypt,
+    aes_ecb_decrypt,
+)
+from yt_dlp.dependencies import Cryptodome
+from yt_dlp.utils import bytes_to_intlist
+
+
+def bench(func, size):
+    start = time.perf_counter()
+    func()
+    return size / (time.perf_counter() - start) / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-s', '--size', type=int, default=4, help='Size of the data in MiB (default: 4)')
+    parser.add_argument('-k', '--key-size', type=int, choices=(16, 24, 32), default=16, help='Key size in bytes')
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    data, key, iv = os.urandom(size), os.urandom(args.key_size), os.urandom(16)
+    int_data, int_key, int_iv = map(bytes_to_intlist, (data, key, iv))
+
+    print(f'pycryptodome: {"yes" if Cryptodome.AES else "no"}; {args.size} MiB, {args.key_size * 8}-bit key')
+    for name, func in (
+        ('aes_cbc_decrypt_bytes', lambda: aes_cbc_decrypt_bytes(data, key, iv)),
+        ('aes_cbc_encrypt_bytes', lambda: aes_cbc_encrypt_bytes(data, key, iv)),
+        ('aes_ctr_decrypt', lambda: aes_ctr_decrypt(int_data, int_key, int_iv)),
+        ('aes_ecb_decrypt', lambda: aes_ecb_decrypt(int_data, int_key)),
+    ):
+        print(f'{name:<24} {bench(func, size):>8.2f} MiB/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Times the JS interpreter on the players of test/test_youtube_signature.py
+
+The first call of each function includes parsing the code; the following
+calls show the cost of evaluating it. The players are downloaded to
+test/testdata/sigs, like the tests do.
+"""
+
+# Allow direct execution
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import argparse
+import statistics
+import string
+import time
+import urllib.request
+
+from test.helper import FakeYDL
+from test.test_youtube_signature import _NSIG_TESTS, _SIG_TESTS
+from yt_dlp.extractor import YoutubeIE
+from yt_dlp.jsinterp import JSInterpreter
+
+TESTDATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test', 'testdata', 'sigs')
+
+
+def player_id(url):
+    return url.rpartition('/player/')[2].replace('/', '-') or url.rpartition('/')[2]
+
+
+def load_player(url):
+    fn = os.path.join(TESTDATA_DIR, f'player-bench-{player_id(url)}')
+    if not os.path.exists(fn):
+        os.makedirs(TESTDATA_DIR, exist_ok=True)
+        urllib.request.urlretrieve(url, fn)
+    with open(fn, encoding='utf-8') as f:
+        return f.read()
+
+
+def sig_function(jscode, sig_input):
+    func = YoutubeIE(FakeYDL())._parse_sig_js(jscode)
+    return func, (string.printable[:sig_input] if isinstance(sig_input, int) else sig_input)
+
+
+def nsig_function(jscode, sig_input):
+    funcname = YoutubeIE(FakeYDL())._extract_n_function_name(jscode)
+    func = JSInterpreter(jscode).extract_function(funcname)
+    return lambda n: func([n]), sig_input
+
+
+def bench(name, func, sig_input, expected, repeat):
+    start = time.perf_counter()
+    result = func(sig_input)
+    first = time.perf_counter() - start
+    if result != expected:
+        print(f'{name}: got {result!r}, expected {expected!r}', file=sys.stderr)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(sig_input)
+        times.append(time.perf_counter() - start)
+    return first, statistics.median(times) if times else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', '--repeat', type=int, default=20, help='Calls of each function after the first')
+    parser.add_argument('-k', '--filter', default='', help='Only run the players whose URL contains this')
+    args = parser.parse_args()
+
+    totals = [0, 0]
+    print(f'{"player":<60} {"first (ms)":>12} {"repeat (ms)":>12}')
+    for kind, tests, make_function in (('sig', _SIG_TESTS, sig_function), ('nsig', _NSIG_TESTS, nsig_function)):
+        for url, sig_input, expected in tests:
+            if args.filter not in url:
+                continue
+            try:
+                func, sig_input = make_function(load_player(url), sig_input)
+                first, repeat = bench(url, func, sig_input, expected, args.repeat)
+            except Exception as e:
+                print(f'{kind} {url}: {e}', file=sys.stderr)
+                continue
+            totals[0] += first
+            totals[1] += repeat
+            player = f'{kind} {player_id(url)}'
+            print(f'{player:<60} {first * 1000:>12.2f} {repeat * 1000:>12.2f}')
+    print(f'{"total":<60} {totals[0] * 1000:>12.2f} {totals[1] * 1000:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
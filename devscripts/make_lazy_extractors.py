@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 # Allow direct execution
+import functools
 import os
 import sys
 
@@ -40,6 +41,7 @@ def main():
 
     from yt_dlp.extractor.extractors import _ALL_CLASSES
     from yt_dlp.extractor.common import InfoExtractor, SearchInfoExtractor
+    from yt_dlp.extractor._dispatch import default_suitable_funcs, ie_host_keys
 
     DummyInfoExtractor = type('InfoExtractor', (InfoExtractor,), {'IE_NAME': NO_ATTR})
     module_src = '\n'.join((
@@ -47,7 +49,8 @@ def main():
         '    _module = None',
         *extra_ie_code(DummyInfoExtractor),
         '\nclass LazyLoadSearchExtractor(LazyLoadExtractor):\n    pass\n',
-        *build_ies(_ALL_CLASSES, (InfoExtractor, SearchInfoExtractor), DummyInfoExtractor),
+        *build_ies(_ALL_CLASSES, (InfoExtractor, SearchInfoExtractor), DummyInfoExtractor,
+                   functools.partial(ie_host_keys, default_suitable=default_suitable_funcs())),
     ))
 
     write_file(lazy_extractors_filename, f'{module_src}\n')
@@ -66,10 +69,10 @@ def extra_ie_code(ie, base=None):
             yield getsource(f)
 
 
-def build_ies(ies, bases, attr_base):
+def build_ies(ies, bases, attr_base, host_keys):
     names = []
     for ie in sort_ies(ies, bases):
-        yield build_lazy_ie(ie, ie.__name__, attr_base)
+        yield build_lazy_ie(ie, ie.__name__, attr_base, host_keys(ie))
         if ie in ies:
             names.append(ie.__name__)
 
@@ -99,13 +102,14 @@ def sort_ies(ies, ignored_bases):
     yield ies[-1]
 
 
-def build_lazy_ie(ie, name, attr_base):
+def build_lazy_ie(ie, name, attr_base, host_keys):
     bases = ', '.join({
         'InfoExtractor': 'LazyLoadExtractor',
         'SearchInfoExtractor': 'LazyLoadSearchExtractor',
     }.get(base.__name__, base.__name__) for base in ie.__bases__)
 
     s = IE_TEMPLATE.format(name=name, module=ie.__module__, bases=bases)
+    s += f'    _URL_HOST_KEYS = {host_keys!r}  # Used by extractor._dispatch\n'
     return s + '\n'.join(extra_ie_code(ie, attr_base))
 
 
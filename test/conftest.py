@@ -2,7 +2,7 @@
 
 import pytest
 
-from yt_dlp.networking import RequestHandler
+from yt_dlp.networking import RequestHandler, _load_request_handlers
 from yt_dlp.networking.common import _REQUEST_HANDLERS
 from yt_dlp.utils._utils import _YDLLogger as FakeLogger
 
@@ -12,6 +12,7 @@ def handler(request):
     RH_KEY = getattr(request, 'param', None)
     if not RH_KEY:
         return
+    _load_request_handlers()
     if inspect.isclass(RH_KEY) and issubclass(RH_KEY, RequestHandler):
         handler = RH_KEY
     elif RH_KEY in _REQUEST_HANDLERS:
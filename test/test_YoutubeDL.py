@@ -12,6 +12,7 @@
 import contextlib
 import copy
 import json
+import threading
 
 from test.helper import FakeYDL, assertRegexpMatches, try_rm
 from yt_dlp import YoutubeDL
@@ -22,6 +23,7 @@
 from yt_dlp.utils import (
     ExtractorError,
     LazyList,
+    MaxDownloadsReached,
     OnDemandPagedList,
     int_or_none,
     match_filter_func,
@@ -1273,6 +1275,121 @@ def _real_extract(self, url):
         self.assertEqual(downloaded['extractor'], 'Video')
         self.assertEqual(downloaded['extractor_key'], 'Video')
 
+    def test_concurrent_downloads(self):
+        class _YDL(YDL):
+            def process_info(self, info_dict):
+                YoutubeDL.process_info(self, info_dict)
+                self.downloaded_info_dicts.append(info_dict.copy())
+
+        barrier = threading.Barrier(2, timeout=10)
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                if video_id in ('1', '2'):
+                    # Deadlocks unless both URLs are extracted at the same time
+                    barrier.wait()
+                return {'id': video_id, 'title': video_id, 'url': TEST_URL}
+
+        def test(params, urls, expected_exception=None):
+            ydl = _YDL({
+                'simulate': True,
+                'download_archive': set(),
+                'force_write_download_archive': True,
+                **params,
+            })
+            ydl.add_info_extractor(VideoIE(ydl))
+            with self.assertRaises(expected_exception) if expected_exception else contextlib.nullcontext():
+                YoutubeDL.download(ydl, urls)
+            return ydl
+
+        urls = [f'video:{i}' for i in range(1, 9)]
+        ydl = test({'concurrent_downloads': 2, 'outtmpl': '%(autonumber)s'}, urls)
+        self.assertCountEqual([i['id'] for i in ydl.downloaded_info_dicts], map(str, range(1, 9)))
+        self.assertEqual(ydl.archive, {f'video {i}' for i in range(1, 9)})
+        self.assertCountEqual([i['_filename'] for i in ydl.downloaded_info_dicts], [f'{i:05d}' for i in range(1, 9)])
+
+        # Without a break, autonumber is not restarted for the next URL
+        ydl = test({'outtmpl': '%(autonumber)s', 'max_downloads': 5, 'break_per_url': True}, urls[2:6])
+        self.assertEqual([i['_filename'] for i in ydl.downloaded_info_dicts], [f'{i:05d}' for i in range(1, 5)])
+
+        # The limit is counted in each worker, and is not reset for the other workers
+        ydl = test({'concurrent_downloads': 4, 'max_downloads': 1, 'break_per_url': True}, urls[2:])
+        self.assertEqual(ydl._num_downloads, 6)
+
+        ydl = test({'concurrent_downloads': 4, 'max_downloads': 3}, urls[2:], MaxDownloadsReached)
+        self.assertEqual(ydl._num_downloads, 3)
+        self.assertEqual(len(ydl.archive), 3)
+
+    def test_playlist_prefetch(self):
+        barrier = threading.Barrier(2, timeout=10)
+        extracted_in = {}
+
+        class _YDL(YDL):
+            def process_info(self, info_dict):
+                super().process_info(info_dict)
+                if info_dict['id'] == '1':
+                    # Deadlocks unless video 2 is extracted while video 1 is processed
+                    barrier.wait()
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                extracted_in[video_id] = threading.current_thread()
+                if video_id == '2':
+                    barrier.wait()
+                return {'id': video_id, 'title': video_id, 'url': TEST_URL}
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:'
+
+            def _real_extract(self, url):
+                return self.playlist_result(
+                    self.url_result(f'video:{i}', VideoIE) for i in range(1, 6))
+
+        for params in ({}, {'lazy_playlist': True}):
+            barrier.reset()
+            ydl = _YDL({'playlist_prefetch': 2, **params})
+            ydl.add_info_extractor(VideoIE(ydl))
+            ydl.add_info_extractor(PlaylistIE(ydl))
+            info = ydl.extract_info('playlist:')
+            self.assertEqual([e['id'] for e in info['entries']], ['1', '2', '3', '4', '5'])
+            self.assertEqual([i['id'] for i in ydl.downloaded_info_dicts], ['1', '2', '3', '4', '5'])
+            self.assertIs(extracted_in['1'], threading.main_thread())
+            self.assertIsNot(extracted_in['2'], threading.main_thread())
+            self.assertFalse(ydl._prefetched_extractions)
+
+    def test_playlist_prefetch_filters(self):
+        extracted = []
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+            _RETURN_TYPE = 'video'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                extracted.append(video_id)
+                return {'id': video_id, 'title': video_id, 'url': TEST_URL}
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:'
+
+            def _real_extract(self, url):
+                return self.playlist_result(
+                    self.url_result(f'video:{i}', VideoIE, str(i), str(i)) for i in range(1, 7))
+
+        ydl = YDL({'playlist_prefetch': 3, 'rejecttitle': '^[35]$'})
+        ydl.add_info_extractor(VideoIE(ydl))
+        ydl.add_info_extractor(PlaylistIE(ydl))
+        ydl.extract_info('playlist:')
+        self.assertEqual([i['id'] for i in ydl.downloaded_info_dicts], ['1', '2', '4', '6'])
+        # The rejected entries are not extracted in advance, and the others only once
+        self.assertEqual(sorted(extracted), ['1', '2', '4', '6'])
+
     def test_header_cookies(self):
         from http.cookiejar import Cookie
 
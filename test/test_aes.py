@@ -9,11 +9,15 @@
 
 
 import base64
+import itertools
+import unittest.mock
 
 from yt_dlp.aes import (
+    CBCDecrypter,
     aes_cbc_decrypt,
     aes_cbc_decrypt_bytes,
     aes_cbc_encrypt,
+    aes_cbc_encrypt_bytes,
     aes_ctr_decrypt,
     aes_ctr_encrypt,
     aes_decrypt,
@@ -107,6 +111,46 @@ def test_ecb_encrypt(self):
             encrypted,
             b'\xaa\x86]\x81\x97>\x02\x92\x9d\x1bR[[L/u\xd3&\xd1(h\xde{\x81\x94\xba\x02\xae\xbd\xa6\xd0:')
 
+    def test_ecb_many_blocks(self):
+        # Enough blocks to be encrypted all at once
+        data = bytes_to_intlist(bytes(range(256)) * 5)
+        for key in (self.key, list(range(24)), list(range(32))):
+            expanded_key = key_expansion(key)
+            encrypted = [x for i in range(0, len(data), 16) for x in aes_encrypt(data[i: i + 16], expanded_key)]
+            self.assertEqual(aes_ecb_encrypt(data, key), encrypted)
+            self.assertEqual(aes_ecb_decrypt(encrypted, key), data)
+
+    def test_cbc_decrypt_bytes_many_blocks(self):
+        data = bytes(range(256)) * 5
+        key, iv = intlist_to_bytes(self.key), intlist_to_bytes(self.iv)
+        encrypted = aes_cbc_encrypt_bytes(data, key, iv)
+        self.assertEqual(aes_cbc_decrypt_bytes(encrypted, key, iv), data)
+        self.assertEqual(aes_cbc_decrypt_bytes(encrypted[:-16], key, iv), data[:-16])
+
+    def test_cbc_decrypter(self):
+        data = bytes(range(256)) * 5 + b'\x00' * 7
+        key, iv = intlist_to_bytes(self.key), intlist_to_bytes(self.iv)
+        encrypted = aes_cbc_encrypt_bytes(data, key, iv)
+        for batch_size, piece_size in itertools.product((0, 100, CBCDecrypter._NATIVE_BATCH_SIZE),
+                                                        (1, 15, 16, 17, 1000, len(encrypted))):
+            with unittest.mock.patch.object(CBCDecrypter, '_NATIVE_BATCH_SIZE', batch_size):
+                decrypter = CBCDecrypter(key, iv)
+                decrypted = b''.join(
+                    decrypter.update(encrypted[i:i + piece_size]) for i in range(0, len(encrypted), piece_size))
+                self.assertEqual(
+                    decrypted + decrypter.finish(), data, f'pieces of {piece_size} bytes in batches of {batch_size}')
+
+    def test_ctr_many_blocks(self):
+        data = bytes_to_intlist(bytes(range(256)) * 5)
+        # The counter wraps around
+        iv = [0xFF] * 15 + [0xF0]
+        expanded_key = key_expansion(self.key)
+        encrypted = aes_ctr_encrypt(data, self.key, iv)
+        self.assertEqual(encrypted[:16], [x ^ y for x, y in zip(data[:16], aes_encrypt(iv, expanded_key))])
+        last_counter = [0] * 15 + [len(data) // 16 - 17]
+        self.assertEqual(encrypted[-16:], [x ^ y for x, y in zip(data[-16:], aes_encrypt(last_counter, expanded_key))])
+        self.assertEqual(aes_ctr_decrypt(encrypted, self.key, iv), data)
+
     def test_ecb_decrypt(self):
         data = bytes_to_intlist(b'\xaa\x86]\x81\x97>\x02\x92\x9d\x1bR[[L/u\xd3&\xd1(h\xde{\x81\x94\xba\x02\xae\xbd\xa6\xd0:')
         decrypted = intlist_to_bytes(aes_ecb_decrypt(data, self.key, self.iv))
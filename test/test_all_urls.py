@@ -12,6 +12,7 @@
 
 from test.helper import gettestcases
 from yt_dlp.extractor import FacebookIE, YoutubeIE, gen_extractors
+from yt_dlp.extractor._dispatch import URLDispatchIndex, pattern_host_keys
 
 
 class TestAllURLsMatching(unittest.TestCase):
@@ -108,6 +109,27 @@ def test_pbs(self):
         self.assertMatch('http://video.pbs.org/viralplayer/2365173446/', ['pbs'])
         self.assertMatch('http://video.pbs.org/widget/partnerplayer/980042464/', ['pbs'])
 
+    def test_pattern_host_keys(self):
+        self.assertEqual(pattern_host_keys(r'https?://(?:www\.)?example\.com/(?P<id>\d+)'), (
+            ('netloc', 'example.com'), ('netloc', 'www.example.com')))
+        self.assertEqual(pattern_host_keys(r'(?x)https?://(?:[^/]+\.)?example\.(?:com|org)/'), (
+            ('netloc', '.example.com'), ('netloc', '.example.org'),
+            ('netloc', 'example.com'), ('netloc', 'example.org')))
+        self.assertIsNone(pattern_host_keys(r'https?://[^/]+/video/(?P<id>\d+)'))
+        self.assertIsNone(pattern_host_keys(r'(?P<id>[\w-]{11})'))
+
+    def test_dispatch_index(self):
+        ies = {ie.ie_key(): ie for ie in self.ies}
+        index = URLDispatchIndex(ies)
+        index._build()
+        urls = [tc['url'] for tc in gettestcases(include_onlymatching=True)][::10]
+        urls += [':ytsubs', 'PL63F0C78739B09958', 'HTTPS://WWW.YOUTUBE.COM/watch?v=BaW_jenozKc',
+                 'https://example.com/video.mp4', 'https://vimeo.com/channels/31259\n', 'ftp://ünicode.example/']
+        for url in urls:
+            self.assertEqual(
+                list(index.suitable_keys(url)), [key for key, ie in ies.items() if ie.suitable(url)],
+                f'Wrong extractors for {url!r}')
+
     def test_no_duplicated_ie_names(self):
         name_accu = collections.defaultdict(list)
         for ie in self.ies:
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+# Allow direct execution
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+import shutil
+import sqlite3
+import time
+
+from test.helper import FakeYDL
+from yt_dlp.archive import (
+    BloomFilter,
+    SQLiteDownloadArchive,
+    TextDownloadArchive,
+    load_download_archive,
+)
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testdata', 'archive_test')
+
+
+class TestDownloadArchive(unittest.TestCase):
+    def setUp(self):
+        self.tearDown()
+        os.makedirs(TEST_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TEST_DIR):
+            shutil.rmtree(TEST_DIR)
+
+    def _check_archive(self, archive_cls, filename):
+        fn = os.path.join(TEST_DIR, filename)
+        archive = archive_cls(fn)
+        self.assertFalse(archive)
+        self.assertNotIn('youtube a', archive)
+        archive.add('youtube a')
+        archive.update(['youtube b', 'youtube a', 'vimeo c'])
+        self.assertTrue(archive)
+        self.assertIn('youtube a', archive)
+        self.assertIn('vimeo c', archive)
+        self.assertNotIn('vimeo a', archive)
+        archive.close()
+
+        archive = load_download_archive(fn)
+        self.assertIsInstance(archive, archive_cls)
+        self.assertEqual(len(archive), 3)
+        self.assertIn('youtube b', archive)
+        archive.close()
+        return fn
+
+    def test_text_archive(self):
+        fn = self._check_archive(TextDownloadArchive, 'archive.txt')
+        with open(fn, encoding='utf-8') as f:
+            self.assertEqual(f.read(), 'youtube a\nyoutube b\nvimeo c\n')
+
+    def test_sqlite_archive(self):
+        self._check_archive(SQLiteDownloadArchive, 'archive.sqlite')
+
+    def test_sqlite_batching(self):
+        fn = os.path.join(TEST_DIR, 'archive.db')
+        archive, other = SQLiteDownloadArchive(fn), SQLiteDownloadArchive(fn)
+        archive.BATCH_INTERVAL = float('inf')
+        archive.update(f'test {i}' for i in range(archive.BATCH_SIZE - 1))
+        self.assertIn('test 0', archive)
+        self.assertNotIn('test 0', other)
+        archive.add('test last')
+        self.assertIn('test 0', other)
+        self.assertIn('test last', other)
+        archive.close()
+        other.close()
+
+    def test_sqlite_batch_interval(self):
+        fn = os.path.join(TEST_DIR, 'archive.db')
+        archive, other = SQLiteDownloadArchive(fn), SQLiteDownloadArchive(fn)
+        archive.BATCH_INTERVAL = 0.2
+        archive.add('test 0')
+        archive.add('test 1')
+        self.assertNotIn('test 0', other)
+        # Written without any further IDs being added
+        time.sleep(0.5)
+        self.assertIn('test 0', other)
+        self.assertIn('test 1', other)
+        archive.close()
+        other.close()
+
+    def test_bloom_filter(self):
+        fn = os.path.join(TEST_DIR, 'filter.bloom')
+        bloom = BloomFilter.create(fn, 1000, 0.01, (f'test {i}' for i in range(500)), count=500)
+        self.assertTrue(all(f'test {i}' in bloom for i in range(500)))
+        self.assertLess(sum(f'other {i}' in bloom for i in range(1000)), 50)
+        bloom.add('other')
+        bloom.count = 501
+        bloom.close()
+
+        bloom = BloomFilter(fn)
+        self.assertIn('other', bloom)
+        self.assertEqual((bloom.count, bloom.capacity), (501, 1000))
+        self.assertFalse(bloom.replaced)
+        BloomFilter.create(fn, 10).close()
+        self.assertTrue(bloom.replaced)
+        bloom.close()
+
+    def test_sqlite_archive_bloom_filter(self):
+        fn = os.path.join(TEST_DIR, 'archive.sqlite')
+        archive = SQLiteDownloadArchive(fn)
+        archive.update(['youtube a', 'youtube b'])
+        archive.close()
+
+        archive = SQLiteDownloadArchive(fn, bloom_filter=True)
+        other = SQLiteDownloadArchive(fn, bloom_filter=True)
+        self.assertEqual(archive._bloom.count, 2)
+        self.assertIn('youtube a', archive)
+        self.assertNotIn('youtube c', archive)
+        archive.add('youtube c')
+        archive.flush()
+        self.assertIn('youtube c', other._bloom)
+        self.assertIn('youtube c', other)
+        archive.close()
+        other.close()
+
+        # The filter is rebuilt when the database was modified without it
+        archive = SQLiteDownloadArchive(fn)
+        archive.add('youtube d')
+        archive.close()
+        archive = SQLiteDownloadArchive(fn, bloom_filter=True)
+        self.assertEqual(archive._bloom.count, 4)
+        self.assertIn('youtube d', archive)
+        archive.close()
+
+    def test_import(self):
+        text_fn = os.path.join(TEST_DIR, 'archive.txt')
+        with open(text_fn, 'w', encoding='utf-8') as f:
+            f.write('youtube a\n\nyoutube b\n')
+        sqlite_fn = os.path.join(TEST_DIR, 'archive.sqlite3')
+
+        with FakeYDL({'download_archive': sqlite_fn, 'import_download_archive': text_fn}) as ydl:
+            self.assertIsInstance(ydl.archive, SQLiteDownloadArchive)
+            self.assertTrue(ydl.in_download_archive({'id': 'a', 'extractor_key': 'Youtube'}))
+            self.assertFalse(ydl.in_download_archive({'id': 'c', 'extractor_key': 'Youtube'}))
+            ydl.record_download_archive({'id': 'c', 'extractor_key': 'Youtube'})
+        # The archive is closed with the YoutubeDL
+        with self.assertRaises(sqlite3.ProgrammingError):
+            ydl.archive._conn.execute('SELECT 1')
+
+        archive = load_download_archive(sqlite_fn)
+        self.assertEqual(len(archive), 3)
+        archive.close()
+
+    def test_format_detection(self):
+        # The format of an existing file is detected from its content
+        text_fn = os.path.join(TEST_DIR, 'archive.db')
+        with open(text_fn, 'w', encoding='utf-8') as f:
+            f.write('youtube a\n')
+        archive = load_download_archive(text_fn)
+        self.assertIsInstance(archive, TextDownloadArchive)
+        self.assertIn('youtube a', archive)
+
+        sqlite_fn = os.path.join(TEST_DIR, 'archive.sqlite')
+        SQLiteDownloadArchive(sqlite_fn).close()
+        os.rename(sqlite_fn, os.path.join(TEST_DIR, 'archive.txt'))
+        archive = load_download_archive(os.path.join(TEST_DIR, 'archive.txt'))
+        self.assertIsInstance(archive, SQLiteDownloadArchive)
+        archive.close()
+
+        # New files are created in the format of their extension
+        self.assertTrue(SQLiteDownloadArchive.is_sqlite_file(os.path.join(TEST_DIR, 'new.sqlite3')))
+        self.assertFalse(SQLiteDownloadArchive.is_sqlite_file(os.path.join(TEST_DIR, 'new.txt')))
+
+    def test_import_missing_file(self):
+        params = {
+            'download_archive': os.path.join(TEST_DIR, 'archive.sqlite3'),
+            'import_download_archive': os.path.join(TEST_DIR, 'missing.txt'),
+        }
+        with self.assertRaisesRegex(Exception, 'Unable to import archive file'):
+            FakeYDL(params)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -8,10 +8,15 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import http.server
 import shutil
+import threading
 
-from test.helper import FakeYDL
-from yt_dlp.cache import Cache
+from test.helper import FakeYDL, http_server_port
+from yt_dlp import YoutubeDL
+from yt_dlp.cache import Cache, MemoryCacheBackend
+from yt_dlp.dependencies import sqlite3
+from yt_dlp.utils._utils import _YDLLogger as FakeLogger
 
 
 def _is_empty(d):
@@ -23,6 +28,36 @@ def _mkdir(d):
         os.mkdir(d)
 
 
+class KeyValueRequestHandler(http.server.BaseHTTPRequestHandler):
+    entries = {}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _respond(self, status, data=b''):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path in self.entries:
+            self._respond(200, self.entries[self.path])
+        else:
+            self._respond(404)
+
+    def do_PUT(self):
+        self.entries[self.path] = self.rfile.read(int(self.headers['Content-Length']))
+        self._respond(204)
+
+    def do_DELETE(self):
+        if self.path.endswith('/'):
+            self.entries.clear()
+        elif self.entries.pop(self.path, None) is None:
+            return self._respond(404)
+        self._respond(204)
+
+
 class TestCache(unittest.TestCase):
     def setUp(self):
         TEST_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -51,6 +86,60 @@ def test_cache(self):
         c.remove()
         self.assertFalse(os.path.exists(self.test_dir))
         self.assertEqual(c.load('test_cache', 'k.'), None)
+        self.check_backend(ydl)
+
+    def check_backend(self, ydl):
+        c = Cache(ydl)
+        obj = {'x': 1, 'y': ['ä', '\\a', True]}
+        self.assertEqual(c.load('test_cache', 'k./ä'), None)
+        c.store('test_cache', 'k./ä', obj)
+        self.assertEqual(c.load('test_cache', 'k./ä'), obj)
+        self.assertEqual(c.load('test_cache2', 'k./ä'), None)
+        # The loaded entries are copies
+        c.load('test_cache', 'k./ä')['x'] = 2
+        self.assertEqual(c.load('test_cache', 'k./ä'), obj)
+        self.assertEqual(c.load('test_cache', 'k./ä', min_ver='9999.01.01'), None)
+        c.store('test_cache', 'k2', obj)
+        c.delete('test_cache', 'k2')
+        c.delete('test_cache', 'k3')
+        self.assertEqual(c.load('test_cache', 'k2'), None)
+        self.assertEqual(c.load('test_cache', 'k./ä'), obj)
+        c.remove()
+        self.assertEqual(c.load('test_cache', 'k./ä'), None)
+        return c
+
+    @unittest.skipUnless(sqlite3, 'sqlite3 is not available')
+    def test_sqlite_backend(self):
+        c = self.check_backend(FakeYDL({'cachedir': self.test_dir, 'cache_backend': 'sqlite'}))
+        c.store('test_cache', 'k', 1)
+        self.assertEqual(os.listdir(self.test_dir), ['cache.sqlite3'])
+        self.assertEqual(Cache(FakeYDL({'cachedir': self.test_dir, 'cache_backend': 'sqlite'})).load('test_cache', 'k'), 1)
+
+    def test_memory_backend(self):
+        self.check_backend(FakeYDL({'cachedir': self.test_dir, 'cache_backend': 'memory'}))
+        self.assertFalse(os.path.exists(self.test_dir))
+
+        backend = MemoryCacheBackend(max_entries=2)
+        for key in 'abc':
+            backend.store('test_cache', key, key)
+            # Used last, so that "b" is the oldest entry
+            backend.load('test_cache', 'a')
+        self.assertEqual([backend.load('test_cache', key) for key in 'abc'], ['a', None, 'c'])
+
+    def test_http_backend(self):
+        httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), KeyValueRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        try:
+            url = f'http://127.0.0.1:{http_server_port(httpd)}/store'
+            with YoutubeDL({'logger': FakeLogger(), 'cache_backend': url, 'http_cache': True}) as ydl:
+                self.check_backend(ydl)
+                ydl.cache.store('test_cache', 'k', 1)
+                self.assertEqual(list(KeyValueRequestHandler.entries), ['/store/test_cache/k'])
+                # Another process that uses the same server
+                with YoutubeDL({'logger': FakeLogger(), 'cache_backend': url}) as other_ydl:
+                    self.assertEqual(other_ydl.cache.load('test_cache', 'k'), 1)
+        finally:
+            httpd.shutdown()
 
 
 if __name__ == '__main__':
@@ -8,20 +8,39 @@
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+import concurrent.futures
+import contextlib
 import http.server
+import io
+import json
 import re
 import threading
+import time
+import unittest.mock
 
 from test.helper import http_server_port, try_rm
-from yt_dlp import YoutubeDL
+from yt_dlp import YoutubeDL, downloader
+from yt_dlp.aes import CBCDecrypter, aes_cbc_encrypt_bytes
+from yt_dlp.downloader.common import TokenBucket, _get_rate_limiter
+from yt_dlp.downloader.external import FFmpegFD
+from yt_dlp.downloader.fragment import (
+    FragmentBuffer,
+    _AdaptiveConcurrency,
+    _DelayedCalls,
+    _FragmentMemoryBudget,
+    _map_in_order,
+)
+from yt_dlp.downloader.hls import HlsFD
 from yt_dlp.downloader.http import HttpFD
-from yt_dlp.utils import encodeFilename
+from yt_dlp.downloader.ism import IsmFD
+from yt_dlp.utils import DownloadError, encodeFilename
 from yt_dlp.utils._utils import _YDLLogger as FakeLogger
 
 TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 TEST_SIZE = 10 * 1024
+TEST_DATA = bytes(i % 251 for i in range(TEST_SIZE))
 
 
 class HTTPTestRequestHandler(http.server.BaseHTTPRequestHandler):
@@ -55,9 +74,33 @@ def serve(self, range=True, content_length=True):
         self.end_headers()
         self.wfile.write(b'#' * size)
 
+    def serve_ranges(self, truncate=False):
+        mobj = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range') or '')
+        if not mobj:
+            self.send_response(200)
+            self.send_header('Content-Length', TEST_SIZE)
+            self.end_headers()
+            self.wfile.write(TEST_DATA)
+            return
+        start, end = int(mobj.group(1)), min(int(mobj.group(2)), TEST_SIZE - 1)
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{end}/{TEST_SIZE}')
+        self.send_header('Content-Length', end - start + 1)
+        self.end_headers()
+        if truncate and start not in self.server.truncated_ranges:
+            # Only half of the first response for each position is sent
+            self.server.truncated_ranges.add(start)
+            end = (start + end) // 2
+            self.close_connection = True
+        self.wfile.write(TEST_DATA[start:end + 1])
+
     def do_GET(self):
         if self.path == '/regular':
             self.serve()
+        elif self.path == '/ranges':
+            self.serve_ranges()
+        elif self.path == '/ranges-truncated':
+            self.serve_ranges(truncate=True)
         elif self.path == '/no-content-length':
             self.serve(content_length=False)
         elif self.path == '/no-range':
@@ -72,6 +115,7 @@ class TestHttpFD(unittest.TestCase):
     def setUp(self):
         self.httpd = http.server.HTTPServer(
             ('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.httpd.truncated_ranges = set()
         self.port = http_server_port(self.httpd)
         self.server_thread = threading.Thread(target=self.httpd.serve_forever)
         self.server_thread.daemon = True
@@ -101,6 +145,468 @@ def test_chunked(self):
             'http_chunk_size': 1000,
         })
 
+    def test_stream(self):
+        for params in ({}, {'http_chunk_size': 1000}):
+            for ep in ('regular', 'no-content-length', 'no-range', 'no-range-no-content-length'):
+                params['logger'] = FakeLogger()
+                stream = io.BytesIO()
+                downloader = HttpFD(YoutubeDL(params), params)
+                self.assertTrue(downloader.real_download(stream, {
+                    'url': f'http://127.0.0.1:{self.port}/{ep}',
+                }), ep)
+                self.assertFalse(stream.closed, ep)
+                self.assertEqual(stream.getvalue(), b'#' * TEST_SIZE, ep)
+
+    def test_segmented(self):
+        class SegmentedHttpFD(HttpFD):
+            _MIN_SEGMENT_SIZE = 1024
+
+        params = {'logger': FakeLogger(), 'http_connections': 4}
+        filename = 'testfile.mp4'
+        ytdl_filename = f'{filename}.ytdl'
+        try:
+            # Fresh download, one resumed from the .ytdl file, and a preallocated file without a .ytdl file
+            for resume in (False, True, 'lost'):
+                try_rm(encodeFilename(filename))
+                if resume == 'lost':
+                    with open(encodeFilename(f'{filename}.part'), 'wb') as f:
+                        f.write(bytes(TEST_SIZE))
+                elif resume:
+                    quarter = TEST_SIZE // 4
+                    segments = [{'start': start, 'end': start + quarter - 1, 'downloaded': quarter // 2}
+                                for start in range(0, TEST_SIZE, quarter)]
+                    with open(encodeFilename(f'{filename}.part'), 'wb') as f:
+                        f.write(bytes(TEST_SIZE))
+                        for segment in segments:
+                            f.seek(segment['start'])
+                            f.write(TEST_DATA[segment['start']:segment['start'] + segment['downloaded']])
+                    with open(encodeFilename(ytdl_filename), 'w') as f:
+                        json.dump({'downloader': {'http_segments': {'filesize': TEST_SIZE, 'segments': segments}}}, f)
+                downloader = SegmentedHttpFD(YoutubeDL(params), params)
+                self.assertTrue(downloader.real_download(filename, {
+                    'url': f'http://127.0.0.1:{self.port}/ranges',
+                }))
+                with open(encodeFilename(filename), 'rb') as f:
+                    self.assertEqual(f.read(), TEST_DATA)
+                self.assertFalse(os.path.exists(encodeFilename(ytdl_filename)))
+        finally:
+            try_rm(encodeFilename(filename))
+            try_rm(encodeFilename(f'{filename}.part'))
+            try_rm(encodeFilename(ytdl_filename))
+
+        # Servers that ignore the Range header are downloaded over one connection
+        self.download(params, 'no-range')
+
+    def test_segmented_retry(self):
+        class SegmentedHttpFD(HttpFD):
+            _MIN_SEGMENT_SIZE = 1024
+
+        downloaded_bytes = []
+        params = {'logger': FakeLogger(), 'http_connections': 4, 'retries': 2}
+        filename = 'testfile.mp4'
+        try:
+            try_rm(encodeFilename(filename))
+            downloader = SegmentedHttpFD(YoutubeDL(params), params)
+            downloader.add_progress_hook(lambda d: d['status'] == 'downloading' and downloaded_bytes.append(d['downloaded_bytes']))
+            self.assertTrue(downloader.real_download(filename, {
+                'url': f'http://127.0.0.1:{self.port}/ranges-truncated',
+            }))
+            with open(encodeFilename(filename), 'rb') as f:
+                self.assertEqual(f.read(), TEST_DATA)
+        finally:
+            try_rm(encodeFilename(filename))
+        # The data received before a retry is still counted
+        self.assertTrue(self.httpd.truncated_ranges)
+        self.assertEqual(downloaded_bytes, sorted(downloaded_bytes))
+        self.assertEqual(downloaded_bytes[-1], TEST_SIZE)
+
+
+class TestProtocolMap(unittest.TestCase):
+    def test_protocol_map(self):
+        protocol_map = downloader.PROTOCOL_MAP
+        self.assertIs(downloader.PROTOCOL_MAP, protocol_map)
+        self.assertIs(protocol_map['m3u8_native'], HlsFD)
+
+        info_dict = {'url': 'http://127.0.0.1/manifest', 'protocol': 'ism'}
+        self.assertIs(downloader.get_suitable_downloader(info_dict), IsmFD)
+        protocol_map['ism'] = HttpFD
+        try:
+            self.assertIs(downloader.get_suitable_downloader(info_dict), HttpFD)
+        finally:
+            protocol_map['ism'] = IsmFD
+
+
+class FailingFragmentsRequestHandler(http.server.BaseHTTPRequestHandler):
+    FAILING_FRAGMENT = 3
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/index.m3u8':
+            data = ('#EXTM3U\n#EXT-X-TARGETDURATION:1\n' + ''.join(
+                f'#EXTINF:1,\n{i}.ts\n' for i in range(15)) + '#EXT-X-ENDLIST\n').encode()
+        elif self.path == f'/{self.FAILING_FRAGMENT}.ts':
+            time.sleep(0.2)
+            self.send_response(404)
+            self.end_headers()
+            return
+        else:
+            data = bytes([int(self.path[1:-3])]) * 1024
+        self.send_response(200)
+        self.send_header('Content-Length', len(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestFragmentBudget(unittest.TestCase):
+    def test_stopped_download(self):
+        httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), FailingFragmentsRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        params = {
+            'logger': FakeLogger(),
+            'concurrent_fragment_downloads': 4,
+            'skip_unavailable_fragments': False,
+            'fragment_retries': 0,
+        }
+        filename = 'testfile.ts'
+        try_rm(encodeFilename(filename))
+        try:
+            downloader = HlsFD(YoutubeDL(params), params)
+            with contextlib.suppress(DownloadError):
+                self.assertFalse(downloader.real_download(filename, {
+                    'url': f'http://127.0.0.1:{http_server_port(httpd)}/index.m3u8',
+                    'ext': 'mp4',
+                }))
+            # The fragments after the failed one were downloaded, but their buffers were released
+            time.sleep(0.5)
+            self.assertEqual(downloader._fragment_memory.used, 0)
+        finally:
+            httpd.shutdown()
+            try_rm(encodeFilename(filename))
+            try_rm(encodeFilename(f'{filename}.part'))
+            try_rm(encodeFilename(f'{filename}.ytdl'))
+
+
+class TestFragmentBuffer(unittest.TestCase):
+    def test_spill(self):
+        budget = _FragmentMemoryBudget(100)
+        in_memory, spilled = FragmentBuffer(budget), FragmentBuffer(budget)
+        in_memory.write(b'a' * 60)
+        self.assertFalse(in_memory.spilled)
+        self.assertEqual(budget.used, 60)
+
+        spilled.write(b'b' * 30)
+        spilled.write(b'c' * 30)
+        self.assertTrue(spilled.spilled)
+        self.assertEqual(budget.used, 60)
+        self.assertEqual(spilled.getvalue(), b'b' * 30 + b'c' * 30)
+        spilled.write(b'd')
+        self.assertEqual(spilled.getvalue(), b'b' * 30 + b'c' * 30 + b'd')
+
+        in_memory.close()
+        spilled.close()
+        self.assertEqual(budget.used, 0)
+
+    def test_restart(self):
+        fragment_buffer = FragmentBuffer(_FragmentMemoryBudget(100))
+        fragment_buffer.write(b'partial')
+        fragment_buffer.seek(0)
+        fragment_buffer.truncate()
+        fragment_buffer.write(b'complete')
+        self.assertEqual(fragment_buffer.getvalue(), b'complete')
+        fragment_buffer.close()
+        self.assertTrue(fragment_buffer.closed)
+
+    def test_decrypt(self):
+        key, iv = bytes(range(16)), bytes(range(16, 32))
+        encrypted = aes_cbc_encrypt_bytes(TEST_DATA[:1000], key, iv)
+        fragment_buffer = FragmentBuffer(_FragmentMemoryBudget(100), aes_cbc=(key, iv))
+        fragment_buffer.write(encrypted[:100])
+        fragment_buffer.seek(0)
+        fragment_buffer.truncate()
+        # Decrypted as it is written, also without pycryptodome
+        with unittest.mock.patch.object(CBCDecrypter, '_NATIVE_BATCH_SIZE', 0):
+            for i in range(0, len(encrypted), 100):
+                fragment_buffer.write(encrypted[i:i + 100])
+        self.assertEqual(fragment_buffer.tell(), len(encrypted))
+        self.assertTrue(fragment_buffer.spilled)
+        self.assertEqual(fragment_buffer.getvalue(), TEST_DATA[:1000])
+        self.assertEqual(fragment_buffer.getvalue(), TEST_DATA[:1000])
+        fragment_buffer.close()
+
+
+class HedgeTestRequestHandler(http.server.BaseHTTPRequestHandler):
+    SLOW_FRAGMENT = 11
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/index.m3u8':
+            content = '#EXTM3U\n#EXT-X-TARGETDURATION:1\n' + ''.join(
+                f'#EXTINF:1,\n{i}.ts\n' for i in range(15)) + '#EXT-X-ENDLIST\n'
+            data = content.encode()
+        else:
+            index = int(self.path[1:-3])
+            data = bytes([index]) * 1024
+        self.send_response(200)
+        self.send_header('Content-Length', len(data))
+        self.end_headers()
+        if self.path == f'/{self.SLOW_FRAGMENT}.ts' and self.path not in self.requests:
+            self.requests.append(self.path)
+            for i in range(0, len(data), 16):
+                self.wfile.write(data[i:i + 16])
+                self.wfile.flush()
+                time.sleep(0.2)
+            return
+        self.requests.append(self.path)
+        self.wfile.write(data)
+
+
+class TestHedgeFragments(unittest.TestCase):
+    def test_hedge_fragments(self):
+        httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), HedgeTestRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        params = {'logger': FakeLogger(), 'hedge_fragments': True, 'concurrent_fragment_downloads': 2}
+        filename = 'testfile.ts'
+        try_rm(encodeFilename(filename))
+        try:
+            downloader = HlsFD(YoutubeDL(params), params)
+            self.assertTrue(downloader.real_download(filename, {
+                'url': f'http://127.0.0.1:{http_server_port(httpd)}/index.m3u8',
+                'ext': 'mp4',
+            }))
+            with open(encodeFilename(filename), 'rb') as f:
+                self.assertEqual(f.read(), b''.join(bytes([i]) * 1024 for i in range(15)))
+            self.assertEqual(HedgeTestRequestHandler.requests.count('/11.ts'), 2)
+        finally:
+            httpd.shutdown()
+            try_rm(encodeFilename(filename))
+
+
+class TestDelayedCalls(unittest.TestCase):
+    def test_delayed_calls(self):
+        delayed_calls = _DelayedCalls()
+        called = []
+        delayed_calls.schedule(0.2, lambda: called.append(2))
+        cancelled = delayed_calls.schedule(0.1, lambda: called.append(0))
+        delayed_calls.schedule(0.1, lambda: called.append(1))
+        delayed_calls.cancel(cancelled)
+        time.sleep(0.5)
+        self.assertEqual(called, [1, 2])
+        # The thread stops once there are no calls left, and is started again for new ones
+        self.assertIsNone(delayed_calls._thread)
+        delayed_calls.schedule(0, lambda: called.append(3))
+        time.sleep(0.2)
+        self.assertEqual(called, [1, 2, 3])
+
+
+class AESTestRequestHandler(http.server.BaseHTTPRequestHandler):
+    KEYS = {'key1': bytes(range(16)), 'key2': bytes(range(16, 32))}
+    FRAGMENTS = [(f'{i}.ts', 'key1' if i < 3 else 'key2', bytes([i]) * 1000) for i in range(6)]
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        if self.path == '/index.m3u8':
+            key = None
+            content = '#EXTM3U\n#EXT-X-TARGETDURATION:1\n'
+            for name, key_name, _ in self.FRAGMENTS:
+                if key_name != key:
+                    key = key_name
+                    content += f'#EXT-X-KEY:METHOD=AES-128,URI="{key}"\n'
+                content += f'#EXTINF:1,\n{name}\n'
+            data = (content + '#EXT-X-ENDLIST\n').encode()
+        elif self.path[1:] in self.KEYS:
+            data = self.KEYS[self.path[1:]]
+        else:
+            media_sequence = next(i for i, fragment in enumerate(self.FRAGMENTS) if fragment[0] == self.path[1:])
+            _, key_name, content = self.FRAGMENTS[media_sequence]
+            data = aes_cbc_encrypt_bytes(content, self.KEYS[key_name], media_sequence.to_bytes(16, 'big'))
+        self.send_response(200)
+        self.send_header('Content-Length', len(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestAESFragments(unittest.TestCase):
+    def download(self, params):
+        httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), AESTestRequestHandler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        params = {'logger': FakeLogger(), **params}
+        filename = 'testfile.ts'
+        try_rm(encodeFilename(filename))
+        AESTestRequestHandler.requests.clear()
+        try:
+            downloader = HlsFD(YoutubeDL(params), params)
+            # Without pycryptodomex, the download would be delegated to ffmpeg
+            with unittest.mock.patch.object(FFmpegFD, 'available', return_value=False):
+                self.assertTrue(downloader.real_download(filename, {
+                    'url': f'http://127.0.0.1:{http_server_port(httpd)}/index.m3u8',
+                    'ext': 'mp4',
+                }))
+            with open(encodeFilename(filename), 'rb') as f:
+                self.assertEqual(f.read(), b''.join(content for _, _, content in AESTestRequestHandler.FRAGMENTS))
+            # Each key is only requested once, before the fragments
+            for key in AESTestRequestHandler.KEYS:
+                self.assertEqual(AESTestRequestHandler.requests.count(f'/{key}'), 1)
+            self.assertEqual(
+                set(AESTestRequestHandler.requests[1:3]), {f'/{key}' for key in AESTestRequestHandler.KEYS})
+        finally:
+            httpd.shutdown()
+            try_rm(encodeFilename(filename))
+
+    def test_decrypt_in_memory(self):
+        self.download({'concurrent_fragment_downloads': 2})
+
+    def test_decrypt_on_disk(self):
+        self.download({'fragment_buffer_size': 0})
+
+
+class TestMapInOrder(unittest.TestCase):
+    def test_map_in_order(self):
+        started = []
+
+        def func(item):
+            started.append(item)
+            # The first item finishes last
+            time.sleep(0.2 if item == 0 else 0.01)
+            return item * 2
+
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            results = _map_in_order(pool, func, range(20), 8)
+            self.assertEqual(next(results), (0, 0))
+            # The others were downloaded while waiting, but not past the window
+            self.assertEqual(sorted(started), list(range(8)))
+            self.assertEqual(list(results), [(i, i * 2) for i in range(1, 20)])
+
+    def test_discard(self):
+        started, discarded = [], []
+
+        def func(item):
+            started.append(item)
+            time.sleep(0.05)
+            return item
+
+        with concurrent.futures.ThreadPoolExecutor(2) as pool:
+            results = _map_in_order(pool, func, range(20), 6, discarded.append)
+            self.assertEqual(next(results), (0, 0))
+            results.close()
+        # Including the items that were still running when it was closed
+        self.assertEqual(sorted(discarded), sorted(set(started) - {0}))
+        self.assertTrue(discarded)
+
+
+class TestAdaptiveConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.clock = 0
+        self.downloaded = 0
+        self.messages = []
+        patcher = unittest.mock.patch('yt_dlp.downloader.fragment.time.monotonic', lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.concurrency = _AdaptiveConcurrency(8, lambda: self.downloaded, self.messages.append)
+
+    def run_round(self, speed, duration=1, failed=False):
+        # Each round downloads the fragments of one second at the given speed
+        count = 2 * self.concurrency.limit
+        self.clock += 1
+        self.downloaded += speed
+        for _ in range(count):
+            self.concurrency.acquire()
+            self.concurrency.release(duration, failed)
+
+    def test_increase(self):
+        self.assertEqual(self.concurrency.limit, 2)
+        for speed in (1000, 2000, 3000):
+            self.run_round(speed)
+        self.assertEqual(self.concurrency.limit, 5)
+        # The limit stays when the speed no longer improves
+        self.run_round(3000)
+        self.assertEqual(self.concurrency.limit, 5)
+        for speed in range(4000, 20000, 1000):
+            self.run_round(speed)
+        self.assertEqual(self.concurrency.limit, 8)
+        self.assertEqual(self.messages[0], 'Concurrent fragments increased to 3 (download is faster)')
+
+    def test_decrease_on_error(self):
+        for speed in range(1000, 7000, 1000):
+            self.run_round(speed)
+        self.assertEqual(self.concurrency.limit, 8)
+        # Only the first of the errors in a round decreases the limit
+        self.run_round(0, failed=True)
+        self.assertEqual(self.concurrency.limit, 4)
+        self.concurrency.release(1, True)
+        self.assertEqual(self.concurrency.limit, 4)
+        self.concurrency.acquire()
+        self.run_round(1000)
+        self.run_round(1000, failed=True)
+        self.assertEqual(self.concurrency.limit, 2)
+        self.assertIn('Concurrent fragments decreased to 4 (fragment errors)', self.messages)
+
+    def test_decrease_on_slowdown(self):
+        for speed in range(1000, 5000, 1000):
+            self.run_round(speed)
+        self.assertEqual(self.concurrency.limit, 6)
+        self.run_round(5000, duration=3)
+        self.assertEqual(self.concurrency.limit, 4)
+
+    def test_limit(self):
+        self.concurrency.acquire()
+        self.concurrency.acquire()
+        acquired = threading.Event()
+
+        def acquire():
+            self.concurrency.acquire()
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        self.concurrency.release(1)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_shared_rate(self):
+        bucket = TokenBucket(100_000, capacity=1)
+
+        def consume(_):
+            for _ in range(5):
+                bucket.consume(4_000)
+
+        start = time.monotonic()
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            list(pool.map(consume, range(4)))
+        # 80KB at 100KB/s in total, not per thread
+        self.assertGreaterEqual(time.monotonic() - start, 0.75)
+
+    def test_burst(self):
+        bucket = TokenBucket(1000, capacity=5000)
+        start = time.monotonic()
+        bucket.consume(5000)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_shared_between_downloaders(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        self.assertIs(_get_rate_limiter(1234), _get_rate_limiter(1234))
+        self.assertIsNot(_get_rate_limiter(1234), _get_rate_limiter(1234, 'example.com'))
+        consumed = []
+        with unittest.mock.patch.object(TokenBucket, 'consume', lambda self, n: consumed.append((self, n))):
+            HttpFD(ydl, {'ratelimit': 1234}).throttle(10, 'http://example.com/a')
+            HttpFD(ydl, {'ratelimit': 1234, 'ratelimit_per_host': 1234}).throttle(20, 'http://example.com/b')
+        self.assertEqual(consumed, [
+            (_get_rate_limiter(1234), 10),
+            (_get_rate_limiter(1234), 20),
+            (_get_rate_limiter(1234, 'example.com'), 20),
+        ])
+
 
 if __name__ == '__main__':
     unittest.main()
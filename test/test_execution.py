@@ -38,6 +38,20 @@ def test_cmdline_umlauts(self):
         _, stderr = self.run_yt_dlp(opts=('ä', '--version'))
         self.assertFalse(stderr)
 
+    def test_profile_startup(self):
+        _, stderr = self.run_yt_dlp(opts=('--version', '--profile-startup'))
+        self.assertIn('Slowest imports', stderr)
+        self.assertIn('yt_dlp.YoutubeDL', stderr)
+
+        # The package is imported before the options are parsed
+        _, stderr = self.run_yt_dlp(exe=(sys.executable, '-m', 'yt_dlp'), opts=('--version', '--profile-startup'))
+        self.assertIn('Slowest imports', stderr)
+        self.assertNotIn('yt_dlp.YoutubeDL', stderr)
+
+        _, stderr = self.run_yt_dlp(exe=(
+            sys.executable, '-c', 'import sys; sys.argv.append("--profile-startup"); import yt_dlp'))
+        self.assertNotIn('Slowest imports', stderr)
+
     def test_lazy_extractors(self):
         try:
             subprocess.check_call([sys.executable, 'devscripts/make_lazy_extractors.py', LAZY_EXTRACTORS],
@@ -104,6 +104,24 @@ def test_parens(self):
     def test_quotes(self):
         self._test(R'function f(){return "a\"\\("}', R'a"\(')
 
+    def test_increments(self):
+        self._test('function f(){var i = 1, j = 2; var k = i++ + j--; return [i, j, k];}', [2, 1, 3])
+        self._test('function f(){var a = [1, 2, 3], i = 0; a[i++] = 5; return [a, ++i];}', [[5, 2, 3], 2])
+
+    def test_parse_once(self):
+        jsi = JSInterpreter('''
+            function f(x) {
+                var a = [];
+                for (var i = 0; i < x; i++) { a.push((i + 1) * i) }
+                return {n: a.length, a: a};
+            }
+        ''')
+        func = jsi.extract_function('f')
+        self.assertEqual(func([3]), {'n': 3, 'a': [0, 2, 6]})
+        compiled = len(jsi._compiled)
+        self.assertEqual(func([5]), {'n': 5, 'a': [0, 2, 6, 12, 20]})
+        self.assertEqual(len(jsi._compiled), compiled)
+
     def test_assignments(self):
         self._test('function f(){var x = 20; x = 30 + 1; return x;}', 31)
         self._test('function f(){var x = 20; x += 30 + 1; return x;}', 51)
@@ -222,6 +240,11 @@ def test_switch_default(self):
         self._test(jsi, 11, args=[5])
         self._test(jsi, 14, args=[9])
 
+    def test_switch_return(self):
+        jsi = JSInterpreter('function f(x) { switch(x){ case 1: return 5; default: return 6; } }')
+        self._test(jsi, 5, args=[1])
+        self._test(jsi, 6, args=[2])
+
     def test_try(self):
         self._test('function f() { try{return 10} catch(e){return 5} }', 10)
 
@@ -8,16 +8,21 @@
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import concurrent.futures
 import io
 import random
+import socket
 import ssl
+import threading
+import time
 
 from yt_dlp.cookies import YoutubeDLCookieJar
 from yt_dlp.dependencies import certifi
-from yt_dlp.networking import Response
+from yt_dlp.networking import Response, _helper
 from yt_dlp.networking._helper import (
     InstanceStoreMixin,
     add_accept_encoding_header,
+    create_connection,
     get_redirect_method,
     make_socks_proxy_opts,
     select_proxy,
@@ -167,6 +172,111 @@ def test_mixin(self):
         mixin._clear_instances()
         assert mixin._get_instance(t=1234) != m
 
+        # Lists and tuples are not interchangeable
+        assert mixin._get_instance(e=[1, 2]) != mixin._get_instance(e=(1, 2))
+
+    def test_mixin_threads(self):
+        mixin = self.FakeInstanceStoreMixin()
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            instances = set(executor.map(
+                lambda _: mixin._get_instance(d={'a': 1}, e=[1, 2]), range(100)))
+        assert len(instances) == 1
+        assert mixin._get_instances() == list(instances)
+
+
+class TestCreateConnection:
+    IPV4_ADDR = (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 80))
+    IPV6_ADDR = (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 80, 0, 0))
+
+    @pytest.fixture(autouse=True)
+    def fake_getaddrinfo(self, monkeypatch):
+        calls = []
+
+        def getaddrinfo(host, port, *args):
+            calls.append(host)
+            return [self.IPV6_ADDR, self.IPV6_ADDR, self.IPV4_ADDR]
+
+        monkeypatch.setattr(socket, 'getaddrinfo', getaddrinfo)
+        monkeypatch.setattr(_helper, '_address_cache', _helper._AddressCache())
+        monkeypatch.setattr(_helper, 'HAPPY_EYEBALLS_DELAY', 0.05)
+        return calls
+
+    class FakeSocket:
+        def __init__(self, ip_addr):
+            self.ip_addr = ip_addr
+            self.closed = False
+
+        def close(self):
+            self.closed = True
+
+    def test_address_cache(self, fake_getaddrinfo, monkeypatch):
+        connect = lambda ip_addr, timeout, source_address: self.FakeSocket(ip_addr)
+        create_connection(('example.com', 80), _create_socket_func=connect)
+        create_connection(('example.com', 80), _create_socket_func=connect)
+        assert fake_getaddrinfo == ['example.com']
+
+        create_connection(('example.org', 80), _create_socket_func=connect)
+        assert fake_getaddrinfo == ['example.com', 'example.org']
+
+        monkeypatch.setattr(_helper._AddressCache, 'TTL', 0)
+        _helper._address_cache.clear()
+        create_connection(('example.com', 80), _create_socket_func=connect)
+        create_connection(('example.com', 80), _create_socket_func=connect)
+        assert fake_getaddrinfo == ['example.com', 'example.org', 'example.com', 'example.com']
+
+    def test_address_cache_invalidated_on_failure(self, fake_getaddrinfo):
+        def connect(ip_addr, timeout, source_address):
+            raise ConnectionRefusedError
+
+        for _ in range(2):
+            with pytest.raises(ConnectionRefusedError):
+                create_connection(('example.com', 80), _create_socket_func=connect)
+        assert fake_getaddrinfo == ['example.com', 'example.com']
+
+    def test_interleave_addresses(self):
+        assert _helper._interleave_addresses([self.IPV6_ADDR, self.IPV6_ADDR, self.IPV4_ADDR]) == [
+            self.IPV6_ADDR, self.IPV4_ADDR, self.IPV6_ADDR]
+
+    def test_happy_eyeballs(self):
+        sockets = []
+
+        def connect(ip_addr, timeout, source_address):
+            if ip_addr[0] == socket.AF_INET6:
+                # Unreachable IPv6 address that is slow to fail
+                time.sleep(0.5)
+                raise TimeoutError
+            sockets.append(self.FakeSocket(ip_addr))
+            return sockets[-1]
+
+        start = time.monotonic()
+        sock = create_connection(('example.com', 80), _create_socket_func=connect)
+        assert time.monotonic() - start < 0.4
+        assert sock.ip_addr == self.IPV4_ADDR
+
+    def test_happy_eyeballs_closes_losers(self):
+        sockets = []
+        ready = threading.Event()
+
+        def connect(ip_addr, timeout, source_address):
+            sock = self.FakeSocket(ip_addr)
+            sockets.append(sock)
+            if len(sockets) == 1:
+                ready.wait(1)
+            else:
+                ready.set()
+            return sock
+
+        sock = create_connection(('example.com', 80), _create_socket_func=connect)
+        assert sock is sockets[1]
+        time.sleep(0.1)
+        assert sockets[0].closed
+        assert not sock.closed
+
+    def test_source_address(self):
+        connect = lambda ip_addr, timeout, source_address: self.FakeSocket(ip_addr)
+        sock = create_connection(('example.com', 80), source_address=('0.0.0.0', 0), _create_socket_func=connect)
+        assert sock.ip_addr == self.IPV4_ADDR
+
 
 class TestNetworkingExceptions:
 
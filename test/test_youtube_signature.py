@@ -11,6 +11,7 @@
 import contextlib
 import re
 import string
+import tempfile
 import urllib.request
 
 from test.helper import FakeYDL, is_download_test
@@ -210,6 +211,39 @@ def test_youtube_extract_player_info(self):
             self.assertEqual(player_id, expected_player_id)
 
 
+class TestNsigCache(unittest.TestCase):
+    PLAYER_URL = 'https://www.youtube.com/s/player/0123abcd/player_ias.vflset/en_US/base.js'
+    PLAYER_CODE = '''
+        var nfunc=function(a){a=a.split("");a.reverse();return a.join("")};
+        a.get("n"))&&(b=nfunc(b),a.set("n",b))
+    '''
+
+    def _make_ie(self, cachedir, player_code=PLAYER_CODE):
+        ie = YoutubeIE(FakeYDL({'cachedir': cachedir}))
+        if player_code:
+            ie._code_cache['0123abcd'] = player_code
+        return ie
+
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            ie = self._make_ie(cachedir)
+            self.assertEqual(
+                ie._decrypt_nsig_batch(['abc', 'def', 'abc'], 'id', self.PLAYER_URL), {'abc': 'cba', 'def': 'fed'})
+
+            # A new process uses the results from the filesystem, without the player
+            ie = self._make_ie(cachedir, None)
+            self.assertEqual(ie._decrypt_nsig_batch(['def', 'abc'], 'id', self.PLAYER_URL), {'def': 'fed', 'abc': 'cba'})
+            self.assertEqual(ie._cached(ie._decrypt_nsig, 'nsig', 'abc')('abc', 'id', self.PLAYER_URL), 'cba')
+
+    def test_batch_limit(self):
+        with tempfile.TemporaryDirectory() as cachedir:
+            ie = self._make_ie(cachedir)
+            ie._NSIG_CACHE_SIZE = 2
+            ie._decrypt_nsig_batch(['abc', 'def'], 'id', self.PLAYER_URL)
+            ie._decrypt_nsig_batch(['ghi'], 'id', self.PLAYER_URL)
+            self.assertEqual(ie.cache.load('youtube-nsig-results', '0123abcd'), {'def': 'fed', 'ghi': 'ihg'})
+
+
 @is_download_test
 class TestSignature(unittest.TestCase):
     def setUp(self):
@@ -1,4 +1,5 @@
 import collections
+import concurrent.futures
 import contextlib
 import copy
 import datetime as dt
@@ -19,23 +20,25 @@
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import tokenize
 import traceback
 import unicodedata
 
+from .archive import DownloadArchive, load_download_archive
 from .cache import Cache
 from .compat import urllib  # isort: split
 from .compat import compat_os_name, urllib_req_to_req
 from .cookies import CookieLoadError, LenientSimpleCookie, load_cookies
 from .downloader import FFmpegFD, get_suitable_downloader, shorten_protocol_name
-from .downloader.rtmp import rtmpdump_version
 from .extractor import gen_extractor_classes, get_info_extractor
-from .extractor.common import UnsupportedURLIE
-from .extractor.openload import PhantomJSwrapper
+from .extractor._dispatch import URLDispatchIndex
 from .minicurses import format_text
-from .networking import HEADRequest, Request, RequestDirector
-from .networking.common import _REQUEST_HANDLERS, _RH_PREFERENCES
+from .networking import HEADRequest, Request, RequestDirector, _load_request_handlers
+from .networking._cache import ResponseCache
+from .networking._trace import NetworkStats, NetworkTracer
+from .networking.common import _REQUEST_HANDLERS, _RH_PREFERENCES, DEFAULT_POOL_SIZE
 from .networking.exceptions import (
     HTTPError,
     NoSupportingHandlers,
@@ -47,7 +50,6 @@
 from .plugins import directories as plugin_directories
 from .postprocessor import _PLUGIN_CLASSES as plugin_pps
 from .postprocessor import (
-    EmbedThumbnailPP,
     FFmpegFixupDuplicateMoovPP,
     FFmpegFixupDurationPP,
     FFmpegFixupM3u8PP,
@@ -57,7 +59,6 @@
     FFmpegMergerPP,
     FFmpegPostProcessor,
     FFmpegVideoConvertorPP,
-    MoveFilesAfterDownloadPP,
     get_postprocessor,
 )
 from .postprocessor.ffmpeg import resolve_mapping as resolve_recode_mapping
@@ -125,7 +126,6 @@
     iri_to_uri,
     is_path_like,
     join_nonempty,
-    locked_file,
     make_archive_id,
     make_dir,
     number_of_digits,
@@ -171,6 +171,22 @@
     import ctypes
 
 
+class _PlaylistState(threading.local):
+    """Per-thread playlist recursion state"""
+
+    def __init__(self):
+        self.level = 0
+        self.urls = set()
+
+
+class _URLState(threading.local):
+    """Per-thread state of the input URLs that are being downloaded"""
+
+    def __init__(self):
+        # The downloads since the last break, counted separately from YoutubeDL._num_downloads for break_per_url
+        self.num_downloads = 0
+
+
 def _catch_unsafe_extension_error(func):
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
@@ -280,6 +296,8 @@ class YoutubeDL:
     playlist_items:    Specific indices of playlist to download.
     playlistrandom:    Download playlist items in random order.
     lazy_playlist:     Process playlist entries as they are received.
+    playlist_prefetch: Number of upcoming playlist entries to extract in the
+                       background while the current entry is being processed
     matchtitle:        Download only matching titles.
     rejecttitle:       Reject downloads for matching titles.
     logger:            Log messages to a logging.Logger instance.
@@ -313,6 +331,9 @@ class YoutubeDL:
     skip_download:     Skip the actual download of the video file
     cachedir:          Location of the cache files in the filesystem.
                        False to disable filesystem cache.
+    cache_backend:     How the cache is stored; one of "filesystem" (default),
+                       "sqlite", "memory", the http(s) URL of a key-value server,
+                       or an instance of yt_dlp.cache.CacheBackend
     noplaylist:        Download single video instead of a playlist if in doubt.
     age_limit:         An integer representing the user's age in years.
                        Unsuitable videos for the given age are skipped.
@@ -327,10 +348,21 @@ class YoutubeDL:
                        downloaded. None for no limit.
     download_archive:  A set, or the name of a file where all downloads are recorded.
                        Videos already present in the file are not downloaded again.
+                       SQLite databases, and new files ending in .db, .sqlite or
+                       .sqlite3, are used as such. See yt_dlp.archive for the backends
+    download_archive_bloom_filter: Check a persisted Bloom filter before querying
+                       an SQLite download_archive
+    import_download_archive: Name of a text archive file whose IDs are added
+                       to the download_archive at startup
     break_on_existing: Stop the download process after attempting to download a
                        file that is in the archive.
     break_per_url:     Whether break_on_reject and break_on_existing
-                       should act on each input URL as opposed to for the entire queue
+                       should act on each input URL as opposed to for the entire queue.
+                       max_downloads and autonumber then count the downloads since the
+                       last break, separately for each worker of concurrent_downloads
+    concurrent_downloads: Number of input URLs to extract and download concurrently.
+                       Archive writes, max_downloads and screen output are shared
+                       between the workers (default: 1)
     cookiefile:        File name or text stream from where cookies should be read and dumped to
     cookiesfrombrowser:  A tuple containing the name of the browser, the profile
                        name/path from where cookies are loaded, the name of the keyring,
@@ -351,9 +383,21 @@ class YoutubeDL:
     geo_verification_proxy:  URL of the proxy to use for IP address verification
                        on geo-restricted sites.
     socket_timeout:    Time to wait for unresponsive hosts, in seconds
+    http_pool_size:    Maximum number of idle connections to keep open per host.
+                       Defaults to enough for concurrent_fragment_downloads
+                       and http_connections
+    http_cache:        Reuse responses to GET requests as allowed by their
+                       Cache-Control/Expires/ETag headers. Extractors can
+                       opt in or out with their _HTTP_CACHE attribute
+    http_cache_size:   Maximum size of the cached responses kept in memory, and of
+                       the ones kept by http_cache_persist, in bytes
+    http_cache_persist: Also keep the cached responses in the cache directory
     bidi_workaround:   Work around buggy terminals without bidirectional text
                        support, using fridibi
     debug_printtraffic:Print out sent and received HTTP traffic
+    dump_network_stats: Write the timings of the HTTP requests, aggregated per
+                       request handler and per host, to this JSON file when
+                       closing. "-" writes them to stdout
     default_search:    Prepend this string if an input url is not valid.
                        'auto' for elaborate guessing
     encoding:          Use this encoding instead of the system-specified.
@@ -493,10 +537,11 @@ class YoutubeDL:
 
     The following parameters are not used by YoutubeDL itself, they are used by
     the downloader (see yt_dlp/downloader/common.py):
-    nopart, updatetime, buffersize, ratelimit, throttledratelimit, min_filesize,
-    max_filesize, test, noresizebuffer, retries, file_access_retries, fragment_retries,
+    nopart, updatetime, buffersize, ratelimit, ratelimit_per_host, throttledratelimit,
+    min_filesize, max_filesize, test, noresizebuffer, retries, file_access_retries, fragment_retries,
     continuedl, xattr_set_filesize, hls_use_mpegts, http_chunk_size,
-    external_downloader_args, concurrent_fragment_downloads, progress_delta.
+    external_downloader_args, concurrent_fragment_downloads, concurrent_fragments_auto,
+    progress_delta, fragment_buffer_size, hedge_fragments, http_connections.
 
     The following options are used by the post processors:
     ffmpeg_location:   Location of the ffmpeg/avconv binary; either the path
@@ -633,8 +678,10 @@ def __init__(self, params=None, auto_init=True):
         self._download_retcode = 0
         self._num_downloads = 0
         self._num_videos = 0
-        self._playlist_level = 0
-        self._playlist_urls = set()
+        self._playlist_state = _PlaylistState()
+        self._url_state = _URLState()
+        self._lock = threading.RLock()
+        self._prefetched_extractions = {}
         self.cache = Cache(self)
         self.__header_cookies = []
 
@@ -810,23 +857,22 @@ def check_deprecated(param, option, suggestion):
 
         def preload_download_archive(fn):
             """Preload the archive, if any is specified"""
-            archive = set()
             if fn is None:
-                return archive
+                return set()
             elif not is_path_like(fn):
                 return fn
-
-            self.write_debug(f'Loading archive file {fn!r}')
-            try:
-                with locked_file(fn, 'r', encoding='utf-8') as archive_file:
-                    for line in archive_file:
-                        archive.add(line.strip())
-            except OSError as ioe:
-                if ioe.errno != errno.ENOENT:
-                    raise
-            return archive
+            return load_download_archive(fn, self)
 
         self.archive = preload_download_archive(self.params.get('download_archive'))
+        if self.params.get('import_download_archive'):
+            if not isinstance(self.archive, DownloadArchive):
+                raise YoutubeDLError('Importing a download archive requires an archive file')
+            import_fn = self.params['import_download_archive']
+            self.write_debug(f'Importing archive file {import_fn!r}')
+            try:
+                self.archive.import_file(import_fn)
+            except OSError as err:
+                self.report_error(f'Unable to import archive file {import_fn!r}: {err.strerror or err}')
 
     def warn_if_short_id(self, argv):
         # short YouTube ID starting with dash?
@@ -847,6 +893,7 @@ def add_info_extractor(self, ie):
         """Add an InfoExtractor object to the end of the list."""
         ie_key = ie.ie_key()
         self._ies[ie_key] = ie
+        self.__dict__.pop('_url_dispatch_index', None)
         if not isinstance(ie, type):
             self._ies_instances[ie_key] = ie
             ie.set_downloader(self)
@@ -867,6 +914,8 @@ def add_default_info_extractors(self):
         """
         Add the InfoExtractors returned by gen_extractors to the end of the list
         """
+        from .extractor.common import UnsupportedURLIE
+
         all_ies = {ie.IE_NAME.lower(): ie for ie in gen_extractor_classes()}
         all_ies['end'] = UnsupportedURLIE()
         try:
@@ -916,11 +965,12 @@ def _bidi_workaround(self, message):
         return res[:-len('\n')]
 
     def _write_string(self, message, out=None, only_once=False):
-        if only_once:
-            if message in self._printed_messages:
-                return
-            self._printed_messages.add(message)
-        write_string(message, out=out, encoding=self.params.get('encoding'))
+        with self._lock:
+            if only_once:
+                if message in self._printed_messages:
+                    return
+                self._printed_messages.add(message)
+            write_string(message, out=out, encoding=self.params.get('encoding'))
 
     def to_stdout(self, message, skip_eol=False, quiet=None):
         """Print message to stdout"""
@@ -992,10 +1042,48 @@ def __exit__(self, *args):
 
     def close(self):
         self.save_cookies()
+        if isinstance(self.archive, DownloadArchive):
+            # An archive that was passed in is left open for the caller
+            if is_path_like(self.params.get('download_archive')):
+                self.archive.close()
+            else:
+                self.archive.flush()
+        if self.params.get('dump_network_stats'):
+            self._dump_network_stats()
         if '_request_director' in self.__dict__:
+            if self.params.get('verbose'):
+                self._write_connection_stats(self._request_director)
             self._request_director.close()
             del self._request_director
 
+    def _dump_network_stats(self):
+        stats = self._network_stats.to_json()
+        director = self.__dict__.get('_request_director')
+        if director:
+            stats['connections'] = {name: handler.connection_stats() for name, handler in director.handlers.items()}
+            stats['cache'] = director.cache and director.cache.stats
+        filename = self.params['dump_network_stats']
+        if filename == '-':
+            self.to_stdout(json.dumps(stats))
+            return
+        try:
+            write_json_file(stats, filename)
+        except OSError:
+            self.report_error(f'Cannot write network statistics to JSON file {filename}')
+
+    def _write_connection_stats(self, director):
+        if director.cache and any(director.cache.stats.values()):
+            self.write_debug('HTTP cache: {hits} hits, {revalidated} revalidated, {misses} misses'.format(
+                **director.cache.stats))
+        for name, handler in director.handlers.items():
+            stats = handler.connection_stats()
+            if not stats.get('requests'):
+                continue
+            self.write_debug(
+                f'{name} connections: {stats["requests"]} requests over {stats["connections"]} connections '
+                f'({stats["reused"] / stats["requests"]:.0%} reused), {stats["idle"]} idle, '
+                f'{stats["tls_handshakes"]} TLS handshakes')
+
     def trouble(self, message=None, tb=None, is_error=True):
         """Determine action to take when a download problem appears.
 
@@ -1204,8 +1292,10 @@ def prepare_outtmpl(self, outtmpl, info_dict, sanitize=False):
             formatSeconds(info_dict['duration'], '-' if sanitize else ':')
             if info_dict.get('duration', None) is not None
             else None)
-        info_dict['autonumber'] = int(self.params.get('autonumber_start', 1) - 1 + self._num_downloads)
-        info_dict['video_autonumber'] = self._num_videos
+        # The numbers are taken when the download starts, since other threads may have counted more since
+        info_dict['autonumber'] = int(self.params.get('autonumber_start', 1) - 1 + info_dict.get(
+            '__num_downloads', self._num_downloads))
+        info_dict['video_autonumber'] = info_dict.get('__num_videos', self._num_videos)
         if info_dict.get('resolution') is None:
             info_dict['resolution'] = self.format_resolution(info_dict, default=None)
 
@@ -1591,15 +1681,8 @@ def extract_info(self, url, download=True, ie_key=None, extra_info=None,
         if not ie_key and force_generic_extractor:
             ie_key = 'Generic'
 
-        if ie_key:
-            ies = {ie_key: self._ies[ie_key]} if ie_key in self._ies else {}
-        else:
-            ies = self._ies
-
-        for key, ie in ies.items():
-            if not ie.suitable(url):
-                continue
-
+        for key in self._suitable_ie_keys(url, ie_key):
+            ie = self._ies[key]
             if not ie.working():
                 self.report_warning('The program functionality for this site has been marked as broken, '
                                     'and will probably not work.')
@@ -1617,6 +1700,17 @@ def extract_info(self, url, download=True, ie_key=None, extra_info=None,
             self.report_error(f'No suitable extractor{format_field(ie_key, None, " (%s)")} found for URL {url}',
                               tb=False if extractors_restricted else None)
 
+    def _suitable_ie_keys(self, url, ie_key=None):
+        """Yield the keys of the extractors that can handle the URL, in order of priority"""
+        if not ie_key:
+            yield from self._url_dispatch_index.suitable_keys(url)
+        elif ie_key in self._ies and self._ies[ie_key].suitable(url):
+            yield ie_key
+
+    @functools.cached_property
+    def _url_dispatch_index(self):
+        return URLDispatchIndex(self._ies)
+
     def _handle_extraction_exceptions(func):
         @functools.wraps(func)
         def wrapper(self, *args, **kwargs):
@@ -1756,8 +1850,10 @@ def _apply_header_cookies(self, url, cookies=None):
     def __extract_info(self, url, ie, download, extra_info, process):
         self._apply_header_cookies(url)
 
+        with self._lock:
+            prefetched = self._prefetched_extractions.pop((ie.ie_key(), url), None)
         try:
-            ie_result = ie.extract(url)
+            ie_result = prefetched.result() if prefetched else ie.extract(url)
         except UserNotLive as e:
             if process:
                 if self.params.get('wait_for_video'):
@@ -1896,22 +1992,22 @@ def process_ie_result(self, ie_result, download=True, extra_info=None):
             # Protect from infinite recursion due to recursively nested playlists
             # (see https://github.com/ytdl-org/youtube-dl/issues/27833)
             webpage_url = ie_result.get('webpage_url')  # Playlists maynot have webpage_url
-            if webpage_url and webpage_url in self._playlist_urls:
+            if webpage_url and webpage_url in self._playlist_state.urls:
                 self.to_screen(
                     '[download] Skipping already downloaded playlist: {}'.format(
                         ie_result.get('title')) or ie_result.get('id'))
                 return
 
-            self._playlist_level += 1
-            self._playlist_urls.add(webpage_url)
+            self._playlist_state.level += 1
+            self._playlist_state.urls.add(webpage_url)
             self._fill_common_fields(ie_result, False)
             self._sanitize_thumbnails(ie_result)
             try:
                 return self.__process_playlist(ie_result, download)
             finally:
-                self._playlist_level -= 1
-                if not self._playlist_level:
-                    self._playlist_urls.clear()
+                self._playlist_state.level -= 1
+                if not self._playlist_state.level:
+                    self._playlist_state.urls.clear()
         elif result_type == 'compat_list':
             self.report_warning(
                 'Extractor {} returned a compat_list result. '
@@ -2026,46 +2122,57 @@ def __process_playlist(self, ie_result, download):
         if keep_resolved_entries:
             self.write_debug('The information of all playlist entries will be held in memory')
 
-        failures = 0
-        max_failures = self.params.get('skip_playlist_after_errors') or float('inf')
-        for i, (playlist_index, entry) in enumerate(entries):
-            if lazy:
-                resolved_entries.append((playlist_index, entry))
-            if not entry:
-                continue
-
-            entry['__x_forwarded_for_ip'] = ie_result.get('__x_forwarded_for_ip')
-            if not lazy and 'playlist-index' in self.params['compat_opts']:
-                playlist_index = ie_result['requested_entries'][i]
-
-            entry_copy = collections.ChainMap(entry, {
+        def entry_info(i, playlist_index, entry):
+            return collections.ChainMap(entry, {
                 **common_info,
                 'n_entries': int_or_none(n_entries),
                 'playlist_index': playlist_index,
                 'playlist_autonumber': i + 1,
             })
 
-            if self._match_entry(entry_copy, incomplete=True) is not None:
-                # For compatabilty with youtube-dl. See https://github.com/yt-dlp/yt-dlp/issues/4369
-                resolved_entries[i] = (playlist_index, NO_DEFAULT)
-                continue
+        def should_prefetch(i, playlist_index, entry):
+            try:
+                return self._match_entry(entry_info(i, playlist_index, entry), incomplete=True, silent=True) is None
+            except DownloadCancelled:
+                # Raised again when the entry is reached
+                return False
+
+        failures = 0
+        max_failures = self.params.get('skip_playlist_after_errors') or float('inf')
+        with self.__prefetch_playlist_entries(entries, should_prefetch) as entries:
+            for i, (playlist_index, entry) in enumerate(entries):
+                if lazy:
+                    resolved_entries.append((playlist_index, entry))
+                if not entry:
+                    continue
 
-            self.to_screen(
-                f'[download] Downloading item {self._format_screen(i + 1, self.Styles.ID)} '
-                f'of {self._format_screen(n_entries, self.Styles.EMPHASIS)}')
+                entry['__x_forwarded_for_ip'] = ie_result.get('__x_forwarded_for_ip')
+                if not lazy and 'playlist-index' in self.params['compat_opts']:
+                    playlist_index = ie_result['requested_entries'][i]
 
-            entry_result = self.__process_iterable_entry(entry, download, collections.ChainMap({
-                'playlist_index': playlist_index,
-                'playlist_autonumber': i + 1,
-            }, extra))
-            if not entry_result:
-                failures += 1
-            if failures >= max_failures:
-                self.report_error(
-                    f'Skipping the remaining entries in playlist "{title}" since {failures} items failed extraction')
-                break
-            if keep_resolved_entries:
-                resolved_entries[i] = (playlist_index, entry_result)
+                entry_copy = entry_info(i, playlist_index, entry)
+
+                if self._match_entry(entry_copy, incomplete=True) is not None:
+                    # For compatabilty with youtube-dl. See https://github.com/yt-dlp/yt-dlp/issues/4369
+                    resolved_entries[i] = (playlist_index, NO_DEFAULT)
+                    continue
+
+                self.to_screen(
+                    f'[download] Downloading item {self._format_screen(i + 1, self.Styles.ID)} '
+                    f'of {self._format_screen(n_entries, self.Styles.EMPHASIS)}')
+
+                entry_result = self.__process_iterable_entry(entry, download, collections.ChainMap({
+                    'playlist_index': playlist_index,
+                    'playlist_autonumber': i + 1,
+                }, extra))
+                if not entry_result:
+                    failures += 1
+                if failures >= max_failures:
+                    self.report_error(
+                        f'Skipping the remaining entries in playlist "{title}" since {failures} items failed extraction')
+                    break
+                if keep_resolved_entries:
+                    resolved_entries[i] = (playlist_index, entry_result)
 
         # Update with processed data
         ie_result['entries'] = [e for _, e in resolved_entries if e is not NO_DEFAULT]
@@ -2084,6 +2191,73 @@ def __process_playlist(self, ie_result, download):
         self.to_screen(f'[download] Finished downloading playlist: {title}')
         return ie_result
 
+    def __prefetch_entry(self, entry, pool):
+        """Start extracting an unresolved playlist entry in the background"""
+        if not isinstance(entry, dict) or entry.get('_type') not in ('url', 'url_transparent'):
+            return
+        url = sanitize_url(entry['url'], scheme='http' if self.params.get('prefer_insecure') else 'https')
+        key = next(self._suitable_ie_keys(url, entry.get('ie_key')), None)
+        if key is None:
+            return
+        temp_id = self._ies[key].get_temp_id(url)
+        if temp_id is not None and self.in_download_archive({'id': temp_id, 'ie_key': key}):
+            return
+        ie = self.get_info_extractor(key)
+        with self._lock:
+            if (key, url) in self._prefetched_extractions:
+                return
+            self._apply_header_cookies(url)
+            self._prefetched_extractions[key, url] = pool.submit(ie.extract, url)
+        return key, url
+
+    @contextlib.contextmanager
+    def __prefetch_playlist_entries(self, entries, should_prefetch):
+        """
+        Extract the upcoming unresolved entries in the background while the current one is processed
+
+        @param should_prefetch  Called with (index, playlist_index, entry) for each upcoming entry;
+                                the entries it rejects are not extracted in advance
+        """
+        count = self.params.get('playlist_prefetch') or 0
+        if not count or self.params.get('extract_flat') in (True, 'in_playlist'):
+            yield entries
+            return
+
+        self.write_debug(f'Extracting up to {count} playlist entries in the background')
+        pool = concurrent.futures.ThreadPoolExecutor(count)
+        prefetched = set()
+
+        def _entries():
+            it = enumerate(entries)
+            queue = collections.deque()
+
+            def enqueue(n, prefetch=True):
+                for i, (playlist_index, entry) in itertools.islice(it, n):
+                    queue.append((playlist_index, entry))
+                    # Each entry is only considered once, when it enters the queue
+                    if (prefetch and entry and not self._max_downloads_reached()
+                            and should_prefetch(i, playlist_index, entry)):
+                        prefetched.add(self.__prefetch_entry(entry, pool))
+
+            # The first entry is processed right away
+            enqueue(1, prefetch=False)
+            enqueue(count)
+            while queue:
+                yield queue.popleft()
+                enqueue(1)
+
+        try:
+            yield _entries()
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            with self._lock:
+                # Discard the extractions of entries that were skipped
+                for key in prefetched:
+                    self._prefetched_extractions.pop(key, None)
+
     @_handle_extraction_exceptions
     def __process_iterable_entry(self, entry, download, extra_info):
         return self.process_ie_result(
@@ -2718,7 +2892,9 @@ def sort_formats(self, info_dict):
 
     def process_video_result(self, info_dict, download=True):
         assert info_dict.get('_type', 'video') == 'video'
-        self._num_videos += 1
+        with self._lock:
+            self._num_videos += 1
+            info_dict['__num_videos'] = self._num_videos
 
         if 'id' not in info_dict:
             raise ExtractorError('Missing "id" field in extractor result', ie=info_dict['extractor'])
@@ -3237,7 +3413,14 @@ def replace_info_dict(new_info):
 
         new_info, _ = self.pre_process(info_dict, 'video')
         replace_info_dict(new_info)
-        self._num_downloads += 1
+        with self._lock:
+            # Other workers may have reached the limit while this one was extracting
+            if self._max_downloads_reached():
+                raise MaxDownloadsReached
+            self._num_downloads += 1
+            self._url_state.num_downloads += 1
+            info_dict['__num_downloads'] = (
+                self._url_state.num_downloads if self.params.get('break_per_url') else self._num_downloads)
 
         # info_dict['_filename'] needs to be set for backward compatibility
         info_dict['_filename'] = full_filename = self.prepare_filename(info_dict, warn=True)
@@ -3248,7 +3431,7 @@ def replace_info_dict(new_info):
         self.__forced_printings(info_dict, full_filename, incomplete=('format' not in info_dict))
 
         def check_max_downloads():
-            if self._num_downloads >= float(self.params.get('max_downloads') or 'inf'):
+            if self._max_downloads_reached():
                 raise MaxDownloadsReached
 
         if self.params.get('simulate'):
@@ -3357,6 +3540,7 @@ def _write_link_file(link_type):
             info_dict['filepath'] = temp_filename
             info_dict['__finaldir'] = os.path.dirname(os.path.abspath(encodeFilename(full_filename)))
             info_dict['__files_to_move'] = files_to_move
+            from .postprocessor import MoveFilesAfterDownloadPP
             replace_info_dict(self.run_pp(MoveFilesAfterDownloadPP(self, False), info_dict))
             info_dict['__write_download_archive'] = self.params.get('force_write_download_archive')
         else:
@@ -3386,6 +3570,7 @@ def existing_video_file(*filepaths):
                 if info_dict.get('requested_formats') is not None:
                     old_ext = info_dict['ext']
                     if self.params.get('merge_output_format') is None:
+                        from .postprocessor import EmbedThumbnailPP
                         if (info_dict['ext'] == 'webm'
                                 and info_dict.get('thumbnails')
                                 # check with type instead of pp_key, __name__, or isinstance
@@ -3574,6 +3759,11 @@ def ffmpeg_fixup(cndn, msg, cls):
             info_dict['__write_download_archive'] = True
         check_max_downloads()
 
+    def _max_downloads_reached(self):
+        # With break_per_url, the limit applies to the downloads since the last break
+        num_downloads = self._url_state.num_downloads if self.params.get('break_per_url') else self._num_downloads
+        return num_downloads >= float(self.params.get('max_downloads') or 'inf')
+
     def __download_wrapper(self, func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
@@ -3587,7 +3777,7 @@ def wrapper(*args, **kwargs):
                 self.to_screen(f'[info] {e}')
                 if not self.params.get('break_per_url'):
                     raise
-                self._num_downloads = 0
+                self._url_state.num_downloads = 0
             else:
                 if self.params.get('dump_single_json', False):
                     self.post_extract(res)
@@ -3604,12 +3794,37 @@ def download(self, url_list):
                 and self.params.get('max_downloads') != 1):
             raise SameFileError(outtmpl)
 
-        for url in url_list:
-            self.__download_wrapper(self.extract_info)(
-                url, force_generic_extractor=self.params.get('force_generic_extractor', False))
+        download = functools.partial(
+            self.__download_wrapper(self.extract_info),
+            force_generic_extractor=self.params.get('force_generic_extractor', False))
+        max_workers = self.params.get('concurrent_downloads') or 1
+        if max_workers > 1 and len(url_list) > 1:
+            self.__download_concurrently(download, url_list, max_workers)
+        else:
+            for url in url_list:
+                download(url)
 
         return self._download_retcode
 
+    def __download_concurrently(self, download, url_list, max_workers):
+        """Run download(url) for every URL with at most max_workers running at once"""
+        self.write_debug(f'Downloading {len(url_list)} URLs with {max_workers} workers')
+        urls = iter(url_list)
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers)
+        try:
+            pending = {pool.submit(download, url) for url in itertools.islice(urls, max_workers)}
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    # Re-raise MaxDownloadsReached, DownloadCancelled etc. to stop scheduling new URLs
+                    future.result()
+                pending.update(pool.submit(download, url) for url in itertools.islice(urls, len(done)))
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
     def download_with_info_file(self, info_filename):
         with contextlib.closing(fileinput.FileInput(
                 [info_filename], mode='r',
@@ -3742,6 +3957,7 @@ def post_process(self, filename, info, files_to_move=None):
         info['filepath'] = filename
         info['__files_to_move'] = files_to_move or {}
         info = self.run_all_pps('post_process', info, additional_pps=info.get('__postprocessors'))
+        from .postprocessor import MoveFilesAfterDownloadPP
         info = self.run_pp(MoveFilesAfterDownloadPP(self), info)
         del info['__files_to_move']
         return self.run_all_pps('after_move', info)
@@ -3758,11 +3974,8 @@ def _make_archive_id(self, info_dict):
             if not url:
                 return
             # Try to find matching extractor for the URL and take its ie_key
-            for ie_key, ie in self._ies.items():
-                if ie.suitable(url):
-                    extractor = ie_key
-                    break
-            else:
+            extractor = next(self._suitable_ie_keys(url), None)
+            if extractor is None:
                 return
         return make_archive_id(extractor, video_id)
 
@@ -3782,10 +3995,8 @@ def record_download_archive(self, info_dict):
         assert vid_id
 
         self.write_debug(f'Adding to archive: {vid_id}')
-        if is_path_like(fn):
-            with locked_file(fn, 'a', encoding='utf-8') as archive_file:
-                archive_file.write(vid_id + '\n')
-        self.archive.add(vid_id)
+        with self._lock:
+            self.archive.add(vid_id)
 
     @staticmethod
     def format_resolution(format, default='unknown'):
@@ -4053,6 +4264,8 @@ def get_encoding(stream):
         if ffmpeg_features:
             exe_versions['ffmpeg'] += ' ({})'.format(','.join(sorted(ffmpeg_features)))
 
+        from .downloader.rtmp import rtmpdump_version
+        from .extractor.openload import PhantomJSwrapper
         exe_versions['rtmpdump'] = rtmpdump_version()
         exe_versions['phantomjs'] = PhantomJSwrapper._version()
         exe_str = ', '.join(
@@ -4141,8 +4354,7 @@ def _impersonate_target_available(self, target):
             for rh in self._request_director.handlers.values()
             if isinstance(rh, ImpersonateRequestHandler))
 
-    def urlopen(self, req):
-        """ Start an HTTP download """
+    def _prepare_urlopen_request(self, req):
         if isinstance(req, str):
             req = Request(req)
         elif isinstance(req, urllib.request.Request):
@@ -4160,9 +4372,28 @@ def urlopen(self, req):
 
         clean_proxies(proxies=req.proxies, headers=req.headers)
         clean_headers(req.headers)
+        return req
 
-        try:
+    def urlopen(self, req):
+        """ Start an HTTP download """
+        req = self._prepare_urlopen_request(req)
+        with self._urlopen_errors(req):
             return self._request_director.send(req)
+
+    async def urlopen_async(self, req):
+        """
+        Send a request from within an asyncio event loop
+
+        Same as urlopen(), but prefers request handlers that do not need a thread of their own.
+        """
+        req = self._prepare_urlopen_request(req)
+        with self._urlopen_errors(req):
+            return await self._request_director.send_async(req)
+
+    @contextlib.contextmanager
+    def _urlopen_errors(self, req):
+        try:
+            yield
         except NoSupportingHandlers as e:
             for ue in e.unsupported_errors:
                 # FIXME: This depends on the order of errors.
@@ -4213,6 +4444,8 @@ def build_request_director(self, handlers, preferences=None):
         clean_proxies(proxies, headers)
 
         director = RequestDirector(logger=logger, verbose=self.params.get('debug_printtraffic'))
+        pool_size = self.params.get('http_pool_size') or max(
+            DEFAULT_POOL_SIZE, *(self.params.get(key) or 1 for key in ('concurrent_fragment_downloads', 'http_connections')))
         for handler in handlers:
             director.add_handler(handler(
                 logger=logger,
@@ -4221,6 +4454,7 @@ def build_request_director(self, handlers, preferences=None):
                 proxies=proxies,
                 prefer_system_certs='no-certifi' in self.params['compat_opts'],
                 verify=not self.params.get('nocheckcertificate'),
+                pool_size=pool_size,
                 **traverse_obj(self.params, {
                     'verbose': 'debug_printtraffic',
                     'source_address': 'source_address',
@@ -4235,13 +4469,25 @@ def build_request_director(self, handlers, preferences=None):
                     },
                 }),
             ))
+        director.cache = ResponseCache(
+            enabled=bool(self.params.get('http_cache')),
+            max_size=self.params.get('http_cache_size') or 32 * 1024 * 1024,
+            store=self.cache if self.params.get('http_cache_persist') else None,
+            cookiejar=self.cookiejar)
+        if self.params.get('dump_network_stats'):
+            director.tracer = NetworkTracer([self._network_stats.record])
         director.preferences.update(preferences or [])
         if 'prefer-legacy-http-handler' in self.params['compat_opts']:
             director.preferences.add(lambda rh, _: 500 if rh.RH_KEY == 'Urllib' else 0)
         return director
 
+    @functools.cached_property
+    def _network_stats(self):
+        return NetworkStats()
+
     @functools.cached_property
     def _request_director(self):
+        _load_request_handlers()
         return self.build_request_director(_REQUEST_HANDLERS.values(), _RH_PREFERENCES)
 
     def encode(self, s):
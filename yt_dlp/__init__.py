@@ -6,19 +6,25 @@
 
 __license__ = 'The Unlicense'
 
+import os
+
+if os.environ.get('YT_DLP_PROFILE_STARTUP'):
+    # Must be installed before anything else is imported
+    from .importtime import ImportProfiler
+    ImportProfiler.install()
+
 import collections
 import getpass
 import itertools
 import optparse
-import os
 import re
 import traceback
 
+from .cache import Cache
 from .compat import compat_os_name
 from .cookies import SUPPORTED_BROWSERS, SUPPORTED_KEYRINGS, CookieLoadError
 from .downloader.external import get_external_downloader
 from .extractor import list_extractor_classes
-from .extractor.adobepass import MSO_INFO
 from .networking.impersonate import ImpersonateTarget
 from .options import parseOpts
 from .postprocessor import (
@@ -118,6 +124,7 @@ def print_extractor_information(opts, urls):
             ie.description(markdown=False, search_examples=_SEARCHES)
             for ie in list_extractor_classes(opts.age_limit) if ie.working() and ie.IE_DESC is not False)
     elif opts.ap_list_mso:
+        from .extractor.adobepass import MSO_INFO
         out = 'Supported TV Providers:\n{}\n'.format(render_table(
             ['mso', 'mso name'],
             [[mso_id, mso_info['name']] for mso_id, mso_info in MSO_INFO.items()]))
@@ -199,13 +206,28 @@ def validate_minmax(min_val, max_val, min_name, max_name=None):
     validate(opts.password is None or opts.username is not None, 'account username', msg='{name} missing')
     validate(opts.ap_password is None or opts.ap_username is not None,
              'TV Provider account username', msg='{name} missing')
-    validate_in('TV Provider', opts.ap_mso, MSO_INFO,
-                'Unsupported {name} "{value}", use --ap-list-mso to get a list of supported TV Providers')
+    if opts.ap_mso is not None:
+        from .extractor.adobepass import MSO_INFO
+        validate_in('TV Provider', opts.ap_mso, MSO_INFO,
+                    'Unsupported {name} "{value}", use --ap-list-mso to get a list of supported TV Providers')
 
     # Numbers
     validate_positive('autonumber start', opts.autonumber_start)
     validate_positive('autonumber size', opts.autonumber_size, True)
+    opts.concurrent_fragments_auto = opts.concurrent_fragment_downloads == 'auto'
+    if opts.concurrent_fragments_auto:
+        # The most threads that the auto-tuning may use
+        opts.concurrent_fragment_downloads = 32
+    else:
+        try:
+            opts.concurrent_fragment_downloads = int(opts.concurrent_fragment_downloads)
+        except (TypeError, ValueError):
+            validate(False, 'concurrent fragments', opts.concurrent_fragment_downloads)
     validate_positive('concurrent fragments', opts.concurrent_fragment_downloads, True)
+    validate_positive('concurrent downloads', opts.concurrent_downloads, True)
+    validate_positive('http connections', opts.http_connections, True)
+    validate_positive('http pool size', opts.http_pool_size, True)
+    validate_positive('playlist prefetch', opts.playlist_prefetch)
     validate_positive('playlist start', opts.playliststart, True)
     if opts.playlistend != -1:
         validate_minmax(opts.playliststart, opts.playlistend, 'playlist start', 'playlist end')
@@ -241,6 +263,7 @@ def validate_minmax(min_val, max_val, min_name, max_name=None):
     if opts.convertthumbnails == 'none':
         opts.convertthumbnails = None
 
+    validate_regex('cache backend', opts.cache_backend, r'(?:{})$|https?://'.format('|'.join(Cache.BACKENDS)))
     validate_regex('merge output format', opts.merge_output_format,
                    r'({0})(/({0}))*'.format('|'.join(map(re.escape, FFmpegMergerPP.SUPPORTED_EXTS))))
     validate_regex('audio format', opts.audioformat, FFmpegExtractAudioPP.FORMAT_RE)
@@ -300,11 +323,14 @@ def validate_bytes(name, value):
         return numeric_limit
 
     opts.ratelimit = validate_bytes('rate limit', opts.ratelimit)
+    opts.ratelimit_per_host = validate_bytes('rate limit per host', opts.ratelimit_per_host)
     opts.throttledratelimit = validate_bytes('throttled rate limit', opts.throttledratelimit)
     opts.min_filesize = validate_bytes('min filesize', opts.min_filesize)
     opts.max_filesize = validate_bytes('max filesize', opts.max_filesize)
     opts.buffersize = validate_bytes('buffer size', opts.buffersize)
+    opts.fragment_buffer_size = validate_bytes('fragment buffer size', opts.fragment_buffer_size)
     opts.http_chunk_size = validate_bytes('http chunk size', opts.http_chunk_size)
+    opts.http_cache_size = validate_bytes('http cache size', opts.http_cache_size)
 
     # Output templates
     def validate_outtmpl(tmpl, msg):
@@ -450,6 +476,8 @@ def metadataparser_actions(f):
 
     if opts.download_archive is not None:
         opts.download_archive = expand_path(opts.download_archive)
+    if opts.import_download_archive is not None:
+        opts.import_download_archive = expand_path(opts.import_download_archive)
 
     if opts.ffmpeg_location is not None:
         opts.ffmpeg_location = expand_path(opts.ffmpeg_location)
@@ -834,6 +862,7 @@ def parse_options(argv=None):
         'force_generic_extractor': opts.force_generic_extractor,
         'allowed_extractors': opts.allowed_extractors or ['default'],
         'ratelimit': opts.ratelimit,
+        'ratelimit_per_host': opts.ratelimit_per_host,
         'throttledratelimit': opts.throttledratelimit,
         'overwrites': opts.overwrites,
         'retries': opts.retries,
@@ -843,7 +872,12 @@ def parse_options(argv=None):
         'retry_sleep_functions': opts.retry_sleep,
         'skip_unavailable_fragments': opts.skip_unavailable_fragments,
         'keep_fragments': opts.keep_fragments,
+        'fragment_buffer_size': opts.fragment_buffer_size,
+        'hedge_fragments': opts.hedge_fragments,
         'concurrent_fragment_downloads': opts.concurrent_fragment_downloads,
+        'concurrent_fragments_auto': opts.concurrent_fragments_auto,
+        'concurrent_downloads': opts.concurrent_downloads,
+        'http_connections': opts.http_connections,
         'buffersize': opts.buffersize,
         'noresizebuffer': opts.noresizebuffer,
         'http_chunk_size': opts.http_chunk_size,
@@ -857,6 +891,7 @@ def parse_options(argv=None):
         'playlistreverse': opts.playlist_reverse,
         'playlistrandom': opts.playlist_random,
         'lazy_playlist': opts.lazy_playlist,
+        'playlist_prefetch': opts.playlist_prefetch,
         'noplaylist': opts.noplaylist,
         'logtostderr': opts.outtmpl.get('default') == '-',
         'consoletitle': opts.consoletitle,
@@ -897,9 +932,12 @@ def parse_options(argv=None):
         'max_views': opts.max_views,
         'daterange': opts.date,
         'cachedir': opts.cachedir,
+        'cache_backend': opts.cache_backend,
         'youtube_print_sig_code': opts.youtube_print_sig_code,
         'age_limit': opts.age_limit,
         'download_archive': opts.download_archive,
+        'import_download_archive': opts.import_download_archive,
+        'download_archive_bloom_filter': opts.download_archive_bloom_filter,
         'break_on_existing': opts.break_on_existing,
         'break_on_reject': opts.break_on_reject,
         'break_per_url': opts.break_per_url,
@@ -913,8 +951,13 @@ def parse_options(argv=None):
         'http_headers': opts.headers,
         'proxy': opts.proxy,
         'socket_timeout': opts.socket_timeout,
+        'http_pool_size': opts.http_pool_size,
+        'http_cache': opts.http_cache,
+        'http_cache_size': opts.http_cache_size,
+        'http_cache_persist': opts.http_cache_persist,
         'bidi_workaround': opts.bidi_workaround,
         'debug_printtraffic': opts.debug_printtraffic,
+        'dump_network_stats': opts.dump_network_stats,
         'prefer_ffmpeg': opts.prefer_ffmpeg,
         'include_ads': opts.include_ads,
         'default_search': opts.default_search,
@@ -1088,6 +1131,11 @@ def make_row(target, handler):
 def main(argv=None):
     global _IN_CLI
     _IN_CLI = True
+    if '--profile-startup' in (sys.argv[1:] if argv is None else argv):
+        # Before the options are parsed, since some of them exit early
+        from .importtime import ImportProfiler
+        if not ImportProfiler.active:
+            ImportProfiler.install()
     try:
         _exit(*variadic(_real_main(argv)))
     except (CookieLoadError, DownloadError):
@@ -3,15 +3,24 @@
 # Execute with
 # $ python3 -m yt_dlp
 
+import os
 import sys
 
 if __package__ is None and not getattr(sys, 'frozen', False):
     # direct call of __main__.py
-    import os.path
     path = os.path.realpath(os.path.abspath(__file__))
     sys.path.insert(0, os.path.dirname(os.path.dirname(path)))
 
+# Also measure the imports of the package. With `python -m`, it has already been imported
+profile_imports = (__name__ == '__main__' and '--profile-startup' in sys.argv[1:]
+                   and 'yt_dlp' not in sys.modules and 'YT_DLP_PROFILE_STARTUP' not in os.environ)
+if profile_imports:
+    os.environ['YT_DLP_PROFILE_STARTUP'] = '1'
+
 import yt_dlp
 
+if profile_imports:
+    del os.environ['YT_DLP_PROFILE_STARTUP']  # Not for the child processes
+
 if __name__ == '__main__':
     yt_dlp.main()
@@ -20,6 +20,9 @@ def pycryptodome_module():
 def get_hidden_imports():
     yield from ('yt_dlp.compat._legacy', 'yt_dlp.compat._deprecated')
     yield from ('yt_dlp.utils._legacy', 'yt_dlp.utils._deprecated')
+    # These are imported lazily with importlib
+    for package in ('yt_dlp.downloader', 'yt_dlp.networking', 'yt_dlp.postprocessor'):
+        yield from collect_submodules(package)
     yield pycryptodome_module()
     # Only `websockets` is required, others are collected just in case
     for module in ('websockets', 'requests', 'urllib3'):
@@ -1,4 +1,6 @@
 import base64
+import functools
+import struct
 from math import ceil
 
 from .compat import compat_ord
@@ -17,7 +19,7 @@ def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
 else:
     def aes_cbc_decrypt_bytes(data, key, iv):
         """ Decrypt bytes with AES-CBC using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_cbc_decrypt(*map(bytes_to_intlist, (data, key, iv))))
+        return _aes_cbc_decrypt_bytes(data, key, iv)
 
     def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
         """ Decrypt bytes with AES-GCM using native implementation since pycryptodome is unavailable """
@@ -35,6 +37,56 @@ def unpad_pkcs7(data):
     return data[:-compat_ord(data[-1])]
 
 
+class CBCDecrypter:
+    """
+    Decrypts AES-CBC data that is given in pieces of any size
+
+    `update` returns the plaintext of the blocks that are complete, and the last
+    cipher block is used as the IV of the next ones. The last block is only
+    decrypted by `finish`, since it has the PKCS#7 padding. Without pycryptodome,
+    the data is held until _NATIVE_BATCH_SIZE bytes are pending, since the native
+    implementation has a fixed cost per call
+    """
+
+    _NATIVE_BATCH_SIZE = 64 * 1024
+
+    def __init__(self, key, iv):
+        self._iv = bytes(iv)
+        self._pending = bytearray()
+        # The key schedule is only computed once
+        if Cryptodome.AES:
+            # Keeps the last cipher block between the calls
+            self._cipher = Cryptodome.AES.new(key, Cryptodome.AES.MODE_CBC, self._iv)
+        else:
+            self._cipher = None
+            self._decryption_key = _decryption_key_words(_key_expansion_words(key))
+
+    def _decrypt(self, data):
+        if self._cipher:
+            return self._cipher.decrypt(data)
+        plaintext = _cbc_decrypt_blocks(data, self._decryption_key, self._iv)
+        self._iv = data[-BLOCK_SIZE_BYTES:]
+        return plaintext
+
+    def update(self, data):
+        self._pending += data
+        if not self._cipher and len(self._pending) <= self._NATIVE_BATCH_SIZE:
+            return b''
+        size = (len(self._pending) - 1) // BLOCK_SIZE_BYTES * BLOCK_SIZE_BYTES
+        if size <= 0:
+            return b''
+        data = bytes(self._pending[:size])
+        del self._pending[:size]
+        return self._decrypt(data)
+
+    def finish(self):
+        data = bytes(self._pending)
+        self._pending.clear()
+        if not data:
+            return b''
+        return unpad_pkcs7(self._decrypt(_pad_zero(data))[:len(data)])
+
+
 def pkcs7_padding(data):
     """
     PKCS#7 padding
@@ -83,15 +135,10 @@ def aes_ecb_encrypt(data, key, iv=None):
     @param {int[]} iv          Unused for this mode
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-
-    encrypted_data = []
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        encrypted_data += aes_encrypt(pkcs7_padding(block), expanded_key)
-
-    return encrypted_data
+    if len(data) % BLOCK_SIZE_BYTES:
+        last_block_start = len(data) // BLOCK_SIZE_BYTES * BLOCK_SIZE_BYTES
+        data = data[:last_block_start] + pkcs7_padding(data[last_block_start:])
+    return bytes_to_intlist(_encrypt_blocks(intlist_to_bytes(data), intlist_to_bytes(key)))
 
 
 def aes_ecb_decrypt(data, key, iv=None):
@@ -103,14 +150,8 @@ def aes_ecb_decrypt(data, key, iv=None):
     @param {int[]} iv          Unused for this mode
     @returns {int[]}           decrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-
-    encrypted_data = []
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        encrypted_data += aes_decrypt(block, expanded_key)
-    return encrypted_data[:len(data)]
+    decrypted_data = _decrypt_blocks(_pad_zero(intlist_to_bytes(data)), intlist_to_bytes(key))
+    return bytes_to_intlist(decrypted_data[:len(data)])
 
 
 def aes_ctr_decrypt(data, key, iv):
@@ -134,19 +175,7 @@ def aes_ctr_encrypt(data, key, iv):
     @param {int[]} iv          16-Byte initialization vector
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-    counter = iter_vector(iv)
-
-    encrypted_data = []
-    for i in range(block_count):
-        counter_block = next(counter)
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        cipher_counter_block = aes_encrypt(counter_block, expanded_key)
-        encrypted_data += xor(block, cipher_counter_block)
-    return encrypted_data[:len(data)]
+    return bytes_to_intlist(_aes_ctr_encrypt_bytes(*map(intlist_to_bytes, (data, key, iv))))
 
 
 def aes_cbc_decrypt(data, key, iv):
@@ -158,19 +187,7 @@ def aes_cbc_decrypt(data, key, iv):
     @param {int[]} iv          16-Byte IV
     @returns {int[]}           decrypted data
     """
-    expanded_key = key_expansion(key)
-    block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
-
-    decrypted_data = []
-    previous_cipher_block = iv
-    for i in range(block_count):
-        block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block += [0] * (BLOCK_SIZE_BYTES - len(block))
-
-        decrypted_block = aes_decrypt(block, expanded_key)
-        decrypted_data += xor(decrypted_block, previous_cipher_block)
-        previous_cipher_block = block
-    return decrypted_data[:len(data)]
+    return bytes_to_intlist(_aes_cbc_decrypt_bytes(*map(intlist_to_bytes, (data, key, iv))))
 
 
 def aes_cbc_encrypt(data, key, iv, *, padding_mode='pkcs7'):
@@ -183,23 +200,21 @@ def aes_cbc_encrypt(data, key, iv, *, padding_mode='pkcs7'):
     @param padding_mode        Padding mode to use
     @returns {int[]}           encrypted data
     """
-    expanded_key = key_expansion(key)
+    key_words = _key_expansion_words(intlist_to_bytes(key))
     block_count = int(ceil(float(len(data)) / BLOCK_SIZE_BYTES))
 
-    encrypted_data = []
-    previous_cipher_block = iv
+    encrypted_words = []
+    previous_cipher_block = _bytes_to_words(intlist_to_bytes(iv))
     for i in range(block_count):
         block = data[i * BLOCK_SIZE_BYTES: (i + 1) * BLOCK_SIZE_BYTES]
-        block = pad_block(block, padding_mode)
-
-        mixed_block = xor(block, previous_cipher_block)
+        block = _bytes_to_words(intlist_to_bytes(pad_block(block, padding_mode)))
 
-        encrypted_block = aes_encrypt(mixed_block, expanded_key)
-        encrypted_data += encrypted_block
+        mixed_block = [x ^ y for x, y in zip(block, previous_cipher_block)]
 
-        previous_cipher_block = encrypted_block
+        previous_cipher_block = _encrypt_words(mixed_block, key_words)
+        encrypted_words += previous_cipher_block
 
-    return encrypted_data
+    return bytes_to_intlist(_words_to_bytes(encrypted_words))
 
 
 def aes_gcm_decrypt_and_verify(data, key, tag, nonce):
@@ -388,6 +403,37 @@ def aes_decrypt_text(data, password, key_size_bytes):
                       0x67, 0x4a, 0xed, 0xde, 0xc5, 0x31, 0xfe, 0x18, 0x0d, 0x63, 0x8c, 0x80, 0xc0, 0xf7, 0x70, 0x07)
 
 
+def _gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return RIJNDAEL_EXP_TABLE[(RIJNDAEL_LOG_TABLE[a] + RIJNDAEL_LOG_TABLE[b]) % 0xFF]
+
+
+def _make_round_tables(sbox, matrix_column):
+    """
+    Tables of SubBytes and (Inv)MixColumns combined, for each byte of a column
+
+    Each entry is the contribution of the substituted byte to the mixed column,
+    as a 32-bit big endian word. The tables of the rows are rotations of the first one
+    """
+    table = tuple(int.from_bytes(bytes(_gf_mul(x, c) for c in matrix_column), 'big') for x in sbox)
+    tables = [table]
+    for _ in range(3):
+        tables.append(tuple((x >> 8) | ((x & 0xFF) << 24) for x in tables[-1]))
+    return tuple(tables)
+
+
+def _make_multiply_tables(sbox, matrix):
+    """Tables of SubBytes combined with multiplying by each coefficient of the (Inv)MixColumns matrix"""
+    return {c: bytes(_gf_mul(x, c) for x in sbox) for row in matrix for c in row}
+
+
+ENCRYPT_TABLES = _make_round_tables(SBOX, [row[0] for row in MIX_COLUMN_MATRIX])
+DECRYPT_TABLES = _make_round_tables(SBOX_INV, [row[0] for row in MIX_COLUMN_MATRIX_INV])
+ENCRYPT_MULTIPLY_TABLES = _make_multiply_tables(SBOX, MIX_COLUMN_MATRIX)
+DECRYPT_MULTIPLY_TABLES = _make_multiply_tables(SBOX_INV, MIX_COLUMN_MATRIX_INV)
+
+
 def key_expansion(data):
     """
     Generate key schedule
@@ -421,12 +467,6 @@ def key_expansion(data):
     return data[:expanded_key_size_bytes]
 
 
-def iter_vector(iv):
-    while True:
-        yield iv
-        iv = inc(iv)
-
-
 def sub_bytes(data):
     return [SBOX[x] for x in data]
 
@@ -470,20 +510,6 @@ def shift_rows_inv(data):
     return [data[((column - row) & 0b11) * 4 + row] for column in range(4) for row in range(4)]
 
 
-def shift_block(data):
-    data_shifted = []
-
-    bit = 0
-    for n in data:
-        if bit:
-            n |= 0x100
-        bit = n & 1
-        n >>= 1
-        data_shifted.append(n)
-
-    return data_shifted
-
-
 def inc(data):
     data = data[:]  # copy
     for i in range(len(data) - 1, -1, -1):
@@ -495,27 +521,14 @@ def inc(data):
     return data
 
 
-def block_product(block_x, block_y):
+def _gf128_mul(x, y):
     # NIST SP 800-38D, Algorithm 1
-
-    if len(block_x) != BLOCK_SIZE_BYTES or len(block_y) != BLOCK_SIZE_BYTES:
-        raise ValueError(f'Length of blocks need to be {BLOCK_SIZE_BYTES} bytes')
-
-    block_r = [0xE1] + [0] * (BLOCK_SIZE_BYTES - 1)
-    block_v = block_y[:]
-    block_z = [0] * BLOCK_SIZE_BYTES
-
-    for i in block_x:
-        for bit in range(7, -1, -1):
-            if i & (1 << bit):
-                block_z = xor(block_z, block_v)
-
-            do_xor = block_v[-1] & 1
-            block_v = shift_block(block_v)
-            if do_xor:
-                block_v = xor(block_v, block_r)
-
-    return block_z
+    z = 0
+    for bit in range(127, -1, -1):
+        if (x >> bit) & 1:
+            z ^= y
+        y = (y >> 1) ^ (0xE1 << 120) if y & 1 else y >> 1
+    return z
 
 
 def ghash(subkey, data):
@@ -524,15 +537,195 @@ def ghash(subkey, data):
     if len(data) % BLOCK_SIZE_BYTES:
         raise ValueError(f'Length of data should be {BLOCK_SIZE_BYTES} bytes')
 
-    last_y = [0] * BLOCK_SIZE_BYTES
+    subkey = int.from_bytes(intlist_to_bytes(subkey), 'big')
+    data = intlist_to_bytes(data)
+    last_y = 0
     for i in range(0, len(data), BLOCK_SIZE_BYTES):
-        block = data[i: i + BLOCK_SIZE_BYTES]
-        last_y = block_product(xor(last_y, block), subkey)
+        last_y = _gf128_mul(last_y ^ int.from_bytes(data[i: i + BLOCK_SIZE_BYTES], 'big'), subkey)
+
+    return bytes_to_intlist(last_y.to_bytes(BLOCK_SIZE_BYTES, 'big'))
+
+
+# The block cipher on 32-bit words, using the round tables. Each column of
+# the state is a word, with the byte of the first row as the most significant one
+
+def _bytes_to_words(data):
+    return struct.unpack(f'>{len(data) // 4}I', data)
+
+
+def _words_to_bytes(words):
+    return struct.pack(f'>{len(words)}I', *words)
+
+
+def _pad_zero(data):
+    return bytes(data) + bytes(-len(data) % BLOCK_SIZE_BYTES)
+
+
+def _key_expansion_words(key):
+    return _bytes_to_words(intlist_to_bytes(key_expansion(bytes_to_intlist(key))))
+
+
+def _decryption_key_words(key_words):
+    """Round keys of the equivalent inverse cipher, in the order they are used"""
+    td0, td1, td2, td3 = DECRYPT_TABLES
+    rounds = len(key_words) // 4 - 1
+    decryption_key = list(key_words[rounds * 4:])
+    for i in range(rounds - 1, 0, -1):
+        decryption_key += (
+            td0[SBOX[w >> 24]] ^ td1[SBOX[(w >> 16) & 0xFF]] ^ td2[SBOX[(w >> 8) & 0xFF]] ^ td3[SBOX[w & 0xFF]]
+            for w in key_words[i * 4: i * 4 + 4])
+    return decryption_key + list(key_words[:4])
+
+
+def _encrypt_words(words, key_words):
+    """Encrypt each block of 4 words with aes"""
+    te0, te1, te2, te3 = ENCRYPT_TABLES
+    sbox = SBOX
+    k0, k1, k2, k3 = key_words[:4]
+    l0, l1, l2, l3 = key_words[-4:]
+    round_keys = [key_words[i: i + 4] for i in range(4, len(key_words) - 4, 4)]
+
+    encrypted = []
+    for i in range(0, len(words), 4):
+        s0, s1, s2, s3 = words[i] ^ k0, words[i + 1] ^ k1, words[i + 2] ^ k2, words[i + 3] ^ k3
+        for r0, r1, r2, r3 in round_keys:
+            s0, s1, s2, s3 = (
+                te0[s0 >> 24] ^ te1[(s1 >> 16) & 0xFF] ^ te2[(s2 >> 8) & 0xFF] ^ te3[s3 & 0xFF] ^ r0,
+                te0[s1 >> 24] ^ te1[(s2 >> 16) & 0xFF] ^ te2[(s3 >> 8) & 0xFF] ^ te3[s0 & 0xFF] ^ r1,
+                te0[s2 >> 24] ^ te1[(s3 >> 16) & 0xFF] ^ te2[(s0 >> 8) & 0xFF] ^ te3[s1 & 0xFF] ^ r2,
+                te0[s3 >> 24] ^ te1[(s0 >> 16) & 0xFF] ^ te2[(s1 >> 8) & 0xFF] ^ te3[s2 & 0xFF] ^ r3)
+        encrypted += (
+            ((sbox[s0 >> 24] << 24) | (sbox[(s1 >> 16) & 0xFF] << 16) | (sbox[(s2 >> 8) & 0xFF] << 8) | sbox[s3 & 0xFF]) ^ l0,
+            ((sbox[s1 >> 24] << 24) | (sbox[(s2 >> 16) & 0xFF] << 16) | (sbox[(s3 >> 8) & 0xFF] << 8) | sbox[s0 & 0xFF]) ^ l1,
+            ((sbox[s2 >> 24] << 24) | (sbox[(s3 >> 16) & 0xFF] << 16) | (sbox[(s0 >> 8) & 0xFF] << 8) | sbox[s1 & 0xFF]) ^ l2,
+            ((sbox[s3 >> 24] << 24) | (sbox[(s0 >> 16) & 0xFF] << 16) | (sbox[(s1 >> 8) & 0xFF] << 8) | sbox[s2 & 0xFF]) ^ l3)
+    return encrypted
+
+
+def _decrypt_words(words, decryption_key):
+    """Decrypt each block of 4 words with aes, using the key from _decryption_key_words"""
+    td0, td1, td2, td3 = DECRYPT_TABLES
+    sbox = SBOX_INV
+    k0, k1, k2, k3 = decryption_key[:4]
+    l0, l1, l2, l3 = decryption_key[-4:]
+    round_keys = [decryption_key[i: i + 4] for i in range(4, len(decryption_key) - 4, 4)]
+
+    decrypted = []
+    for i in range(0, len(words), 4):
+        s0, s1, s2, s3 = words[i] ^ k0, words[i + 1] ^ k1, words[i + 2] ^ k2, words[i + 3] ^ k3
+        for r0, r1, r2, r3 in round_keys:
+            s0, s1, s2, s3 = (
+                td0[s0 >> 24] ^ td1[(s3 >> 16) & 0xFF] ^ td2[(s2 >> 8) & 0xFF] ^ td3[s1 & 0xFF] ^ r0,
+                td0[s1 >> 24] ^ td1[(s0 >> 16) & 0xFF] ^ td2[(s3 >> 8) & 0xFF] ^ td3[s2 & 0xFF] ^ r1,
+                td0[s2 >> 24] ^ td1[(s1 >> 16) & 0xFF] ^ td2[(s0 >> 8) & 0xFF] ^ td3[s3 & 0xFF] ^ r2,
+                td0[s3 >> 24] ^ td1[(s2 >> 16) & 0xFF] ^ td2[(s1 >> 8) & 0xFF] ^ td3[s0 & 0xFF] ^ r3)
+        decrypted += (
+            ((sbox[s0 >> 24] << 24) | (sbox[(s3 >> 16) & 0xFF] << 16) | (sbox[(s2 >> 8) & 0xFF] << 8) | sbox[s1 & 0xFF]) ^ l0,
+            ((sbox[s1 >> 24] << 24) | (sbox[(s0 >> 16) & 0xFF] << 16) | (sbox[(s3 >> 8) & 0xFF] << 8) | sbox[s2 & 0xFF]) ^ l1,
+            ((sbox[s2 >> 24] << 24) | (sbox[(s1 >> 16) & 0xFF] << 16) | (sbox[(s0 >> 8) & 0xFF] << 8) | sbox[s3 & 0xFF]) ^ l2,
+            ((sbox[s3 >> 24] << 24) | (sbox[(s2 >> 16) & 0xFF] << 16) | (sbox[(s1 >> 8) & 0xFF] << 8) | sbox[s0 & 0xFF]) ^ l3)
+    return decrypted
+
+
+@functools.cache
+def _xor_table(value):
+    return bytes(x ^ value for x in range(256))
+
+
+def _crypt_sliced(data, round_keys, decrypt=False):
+    """
+    Encrypt or decrypt all the blocks of data with aes at once
+
+    The state is one bytes object per position in the block, with the bytes at that
+    position of every block. Each step is then done for all the blocks at once by
+    bytes.translate and xor of integers, which run in C.
+
+    @param {bytes} round_keys  expanded key, or the key from _decryption_key_words for decrypting
+    """
+    count = len(data) // BLOCK_SIZE_BYTES
+    sbox, tables, matrix, direction = (
+        (SBOX_INV, DECRYPT_MULTIPLY_TABLES, MIX_COLUMN_MATRIX_INV, -1) if decrypt
+        else (SBOX, ENCRYPT_MULTIPLY_TABLES, MIX_COLUMN_MATRIX, 1))
+    sbox = bytes(sbox)
+    # The byte of row r in column c is at position 4 * c + r.
+    # After (Inv)ShiftRows, row r of column c is the one of column c + direction * r
+    sources = [[4 * ((column + direction * row) % 4) + row for row in range(4)] for column in range(4)]
+    coefficients = [{row[i] for row in matrix} for i in range(4)]
+
+    state = [data[p::BLOCK_SIZE_BYTES].translate(_xor_table(round_keys[p])) for p in range(BLOCK_SIZE_BYTES)]
+    for offset in range(BLOCK_SIZE_BYTES, len(round_keys) - BLOCK_SIZE_BYTES, BLOCK_SIZE_BYTES):
+        # The (Inv)SubBytes of each position multiplied by each coefficient it is mixed with
+        products = [
+            {c: int.from_bytes(x.translate(tables[c]), 'big') for c in coefficients[p % 4]}
+            for p, x in enumerate(state)]
+        state = [
+            (products[source[0]][row[0]] ^ products[source[1]][row[1]]
+             ^ products[source[2]][row[2]] ^ products[source[3]][row[3]]
+             ).to_bytes(count, 'big').translate(_xor_table(round_keys[offset + 4 * column + i]))
+            for column, source in enumerate(sources) for i, row in enumerate(matrix)]
+
+    result = bytearray(len(data))
+    for column, source in enumerate(sources):
+        for row in range(4):
+            p = 4 * column + row
+            result[p::BLOCK_SIZE_BYTES] = state[source[row]].translate(sbox).translate(
+                _xor_table(round_keys[-BLOCK_SIZE_BYTES + p]))
+    return bytes(result)
+
+
+# Below this size, the fixed cost of _crypt_sliced is higher than the gain
+_SLICED_MIN_SIZE = 64 * BLOCK_SIZE_BYTES
+
+
+def _encrypt_blocks(data, key):
+    """Encrypt each block of bytes with aes, as in ECB mode"""
+    key_words = _key_expansion_words(key)
+    if len(data) >= _SLICED_MIN_SIZE:
+        return _crypt_sliced(data, _words_to_bytes(key_words))
+    return _words_to_bytes(_encrypt_words(_bytes_to_words(data), key_words))
+
+
+def _decrypt_blocks(data, key):
+    """Decrypt each block of bytes with aes, as in ECB mode"""
+    return _decrypt_blocks_with_key(data, _decryption_key_words(_key_expansion_words(key)))
+
+
+def _decrypt_blocks_with_key(data, decryption_key):
+    """_decrypt_blocks with the key from _decryption_key_words"""
+    if len(data) >= _SLICED_MIN_SIZE:
+        return _crypt_sliced(data, _words_to_bytes(decryption_key), decrypt=True)
+    return _words_to_bytes(_decrypt_words(_bytes_to_words(data), decryption_key))
+
+
+def _xor_bytes(data1, data2):
+    return (int.from_bytes(data1, 'big') ^ int.from_bytes(data2, 'big')).to_bytes(len(data1), 'big')
+
+
+def _cbc_decrypt_blocks(data, decryption_key, iv):
+    """Decrypt whole blocks with aes-cbc, using the key from _decryption_key_words"""
+    # The blocks are decrypted independently, and then chained with the previous cipher block
+    return _xor_bytes(_decrypt_blocks_with_key(data, decryption_key), (bytes(iv) + data)[:len(data)])
+
+
+def _aes_cbc_decrypt_bytes(data, key, iv):
+    """aes_cbc_decrypt on bytes"""
+    size = len(data)
+    return _cbc_decrypt_blocks(
+        _pad_zero(data), _decryption_key_words(_key_expansion_words(key)), iv)[:size]
+
 
-    return last_y
+def _aes_ctr_encrypt_bytes(data, key, iv):
+    """aes_ctr_encrypt on bytes"""
+    size = len(data)
+    counter = int.from_bytes(iv, 'big')
+    counter_blocks = b''.join(
+        ((counter + i) % (1 << 128)).to_bytes(BLOCK_SIZE_BYTES, 'big')
+        for i in range(-(-size // BLOCK_SIZE_BYTES)))
+    return _xor_bytes(bytes(data), _encrypt_blocks(counter_blocks, key)[:size])
 
 
 __all__ = [
+    'CBCDecrypter',
     'aes_cbc_decrypt',
     'aes_cbc_decrypt_bytes',
     'aes_ctr_decrypt',
@@ -0,0 +1,324 @@
+import errno
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .dependencies import sqlite3
+from .utils import YoutubeDLError, locked_file
+
+
+class DownloadArchive:
+    """Base class for download archive backends
+
+    An archive is a set of archive IDs (see utils.make_archive_id).
+    Any object that supports `in`, `add` and `update` can be passed
+    as the download_archive param instead of a filename
+    """
+
+    def __init__(self, filename, ydl=None):
+        self.filename = filename
+        self._ydl = ydl
+
+    def _write_debug(self, message):
+        if self._ydl:
+            self._ydl.write_debug(message)
+
+    def __contains__(self, vid_id):
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def __bool__(self):
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def add(self, vid_id):
+        self.update((vid_id, ))
+
+    def update(self, vid_ids):
+        raise NotImplementedError('This method must be implemented by subclasses')
+
+    def import_file(self, filename):
+        """Add all the IDs of a text archive file to this archive"""
+        with locked_file(filename, 'r', encoding='utf-8') as archive_file:
+            self.update(filter(None, map(str.strip, archive_file)))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.flush()
+
+
+class TextDownloadArchive(DownloadArchive):
+    """The default archive format: one ID per line, held in memory as a set"""
+
+    def __init__(self, filename, ydl=None):
+        super().__init__(filename, ydl)
+        self._ids = set()
+        self._write_debug(f'Loading archive file {filename!r}')
+        try:
+            with locked_file(filename, 'r', encoding='utf-8') as archive_file:
+                for line in archive_file:
+                    self._ids.add(line.strip())
+        except OSError as ioe:
+            if ioe.errno != errno.ENOENT:
+                raise
+
+    def __contains__(self, vid_id):
+        return vid_id in self._ids
+
+    def __bool__(self):
+        return bool(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def update(self, vid_ids):
+        new_ids = [vid_id for vid_id in dict.fromkeys(vid_ids) if vid_id not in self._ids]
+        if not new_ids:
+            return
+        with locked_file(self.filename, 'a', encoding='utf-8') as archive_file:
+            archive_file.writelines(f'{vid_id}\n' for vid_id in new_ids)
+        self._ids.update(new_ids)
+
+
+class BloomFilter:
+    """A Bloom filter persisted in a memory-mapped file
+
+    The file starts with a header holding the size of the bit array, the
+    number of hash functions and a caller-defined `count` used to detect
+    whether the filter is in sync with the data it summarizes.
+    Since the file is mapped with MAP_SHARED, processes using the same file
+    share both the memory and the bits set by each other.
+    Setting bits is not atomic; callers must serialize writers
+    """
+
+    _MAGIC = b'YTDLBLM1'
+    _HEADER = struct.Struct('<8sQQQQ')  # magic, capacity, number of bits, number of hashes, count
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'r+b') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0)
+            self._stat = os.fstat(f.fileno())
+        magic, self.capacity, self._nbits, self._nhashes, _ = self._HEADER.unpack_from(self._mmap)
+        if magic != self._MAGIC or len(self._mmap) != self._HEADER.size + -(-self._nbits // 8):
+            self.close()
+            raise ValueError(f'{filename} is not a valid bloom filter')
+
+    @classmethod
+    def create(cls, filename, capacity, error_rate=0.001, items=(), count=0):
+        """Atomically (re)create the filter file, filled with the given items"""
+        capacity = max(capacity, 1)
+        nbits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        nhashes = max(round(nbits / capacity * math.log(2)), 1)
+        bits = bytearray(-(-nbits // 8))
+        for item in items:
+            for pos in cls._positions(item, nbits, nhashes):
+                bits[pos >> 3] |= 1 << (pos & 7)
+        temp_fn = f'{filename}.part'
+        with open(temp_fn, 'wb') as f:
+            f.write(cls._HEADER.pack(cls._MAGIC, capacity, nbits, nhashes, count))
+            f.write(bits)
+        os.replace(temp_fn, filename)
+        return cls(filename)
+
+    @staticmethod
+    def _positions(item, nbits, nhashes):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        return ((h1 + i * h2) % nbits for i in range(nhashes))
+
+    @property
+    def count(self):
+        return self._HEADER.unpack_from(self._mmap)[4]
+
+    @count.setter
+    def count(self, value):
+        struct.pack_into('<Q', self._mmap, self._HEADER.size - 8, value)
+
+    @property
+    def replaced(self):
+        """Whether the file has been recreated since it was opened"""
+        try:
+            stat = os.stat(self.filename)
+        except OSError:
+            return True
+        return (stat.st_dev, stat.st_ino) != (self._stat.st_dev, self._stat.st_ino)
+
+    def __contains__(self, item):
+        offset = self._HEADER.size
+        return all(
+            self._mmap[offset + (pos >> 3)] & (1 << (pos & 7))
+            for pos in self._positions(item, self._nbits, self._nhashes))
+
+    def add(self, item):
+        offset = self._HEADER.size
+        for pos in self._positions(item, self._nbits, self._nhashes):
+            self._mmap[offset + (pos >> 3)] |= 1 << (pos & 7)
+
+    def close(self):
+        self._mmap.close()
+
+
+class SQLiteDownloadArchive(DownloadArchive):
+    """An indexed archive in an SQLite database
+
+    Lookups query the database instead of loading the archive into memory.
+    New IDs are buffered and written in a single transaction once
+    BATCH_SIZE IDs are pending, and at most BATCH_INTERVAL seconds after
+    they were added. The database can be shared by multiple processes
+
+    With bloom_filter=True, a BloomFilter stored next to the database in
+    "<filename>.bloom" is checked first, and the database is only queried
+    when the filter reports a possible match. The number of IDs in the
+    database is tracked by a trigger, and the filter is rebuilt when it
+    is out of sync or over capacity
+    """
+
+    BATCH_SIZE = 100
+    BATCH_INTERVAL = 1
+    TIMEOUT = 30
+    BLOOM_ERROR_RATE = 0.001
+    BLOOM_MIN_CAPACITY = 100_000
+
+    _MAGIC = b'SQLite format 3\x00'
+
+    def __init__(self, filename, ydl=None, *, bloom_filter=False):
+        if not sqlite3:
+            raise YoutubeDLError(
+                'Cannot use an SQLite download archive without sqlite3 support. '
+                'Please use a Python interpreter compiled with sqlite3 support')
+        super().__init__(filename, ydl)
+        self._write_debug(f'Opening archive database {filename!r}')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+        self._flush_timer = None
+        self._conn = sqlite3.connect(filename, timeout=self.TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        with self._conn:
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS archive (id TEXT PRIMARY KEY) WITHOUT ROWID')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)')
+            self._conn.execute(
+                'INSERT OR IGNORE INTO meta (key, value) VALUES (\'count\', (SELECT COUNT(*) FROM archive))')
+            self._conn.execute(
+                'CREATE TRIGGER IF NOT EXISTS archive_count AFTER INSERT ON archive '
+                'BEGIN UPDATE meta SET value = value + 1 WHERE key = \'count\'; END')
+            self._bloom = bloom_filter and self._open_bloom_filter()
+
+    def _db_count(self):
+        return self._conn.execute('SELECT value FROM meta WHERE key = \'count\'').fetchone()[0]
+
+    def _open_bloom_filter(self):
+        """Open the bloom filter, rebuilding it if necessary. Must be called in a write transaction"""
+        bloom_fn, count = f'{self.filename}.bloom', self._db_count()
+        try:
+            bloom = BloomFilter(bloom_fn)
+        except (OSError, ValueError):
+            pass
+        else:
+            if bloom.count == count and count < bloom.capacity:
+                return bloom
+            bloom.close()
+        self._write_debug(f'Building archive bloom filter {bloom_fn!r} for {count} IDs')
+        return BloomFilter.create(
+            bloom_fn, max(count * 2, self.BLOOM_MIN_CAPACITY), self.BLOOM_ERROR_RATE,
+            (row[0] for row in self._conn.execute('SELECT id FROM archive')), count)
+
+    @classmethod
+    def is_sqlite_file(cls, filename):
+        """Whether the file is an SQLite database, or is a new file with an SQLite extension"""
+        try:
+            with open(filename, 'rb') as f:
+                header = f.read(len(cls._MAGIC))
+        except FileNotFoundError:
+            header = b''
+        except OSError:
+            return False
+        if header:
+            return header == cls._MAGIC
+        return os.path.splitext(filename)[1].lower() in ('.db', '.sqlite', '.sqlite3')
+
+    def __contains__(self, vid_id):
+        with self._lock:
+            if vid_id in self._pending:
+                return True
+            if self._bloom and vid_id not in self._bloom:
+                if not self._bloom.replaced:
+                    return False
+                # Another process rebuilt the filter; the new one may have bits we have not seen
+                try:
+                    bloom = BloomFilter(self._bloom.filename)
+                except (OSError, ValueError):
+                    pass
+                else:
+                    self._bloom.close()
+                    self._bloom = bloom
+                    if vid_id not in bloom:
+                        return False
+            return self._conn.execute('SELECT 1 FROM archive WHERE id = ?', (vid_id, )).fetchone() is not None
+
+    def __bool__(self):
+        with self._lock:
+            return bool(self._pending) or self._conn.execute('SELECT 1 FROM archive LIMIT 1').fetchone() is not None
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM archive').fetchone()[0]
+
+    def update(self, vid_ids):
+        with self._lock:
+            self._pending.update(dict.fromkeys(vid_ids))
+            if (len(self._pending) >= self.BATCH_SIZE
+                    or time.monotonic() - self._last_flush >= self.BATCH_INTERVAL):
+                self._flush()
+            elif self._pending and not self._flush_timer and math.isfinite(self.BATCH_INTERVAL):
+                # So that the IDs are written even if no more are added
+                self._flush_timer = threading.Timer(self.BATCH_INTERVAL, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if self._flush_timer:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.execute('BEGIN IMMEDIATE')
+            if self._bloom:
+                if self._bloom.replaced:
+                    self._bloom.close()
+                    self._bloom = self._open_bloom_filter()
+                for vid_id in self._pending:
+                    self._bloom.add(vid_id)
+            self._conn.executemany('INSERT OR IGNORE INTO archive (id) VALUES (?)', ((i, ) for i in self._pending))
+            if self._bloom:
+                self._bloom.count = self._db_count()
+        self._write_debug(f'Wrote {len(self._pending)} IDs to the archive database')
+        self._pending.clear()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        super().close()
+        with self._lock:
+            if self._bloom:
+                self._bloom.close()
+            self._conn.close()
+
+
+def load_download_archive(filename, ydl=None):
+    """Open the archive file with the backend matching its format"""
+    if SQLiteDownloadArchive.is_sqlite_file(filename):
+        return SQLiteDownloadArchive(
+            filename, ydl, bloom_filter=bool(ydl and ydl.params.get('download_archive_bloom_filter')))
+    return TextDownloadArchive(filename, ydl)
@@ -1,18 +1,232 @@
+import collections
 import contextlib
 import json
 import os
 import re
 import shutil
+import threading
 import traceback
 import urllib.parse
 
+from .dependencies import sqlite3
+from .networking import Request
+from .networking.exceptions import HTTPError
 from .utils import expand_path, traverse_obj, version_tuple, write_json_file
 from .version import __version__
 
 
+class CacheBackend:
+    """
+    Storage for the entries of the Cache
+
+    An entry is a JSON-serializable object, addressed by a section and a key.
+    Errors are raised as exceptions, and reported as warnings by the Cache.
+    str() of a backend describes where it keeps the entries.
+    """
+
+    def load(self, section, key):
+        """Return the entry, or None if there is no entry"""
+        raise NotImplementedError
+
+    def store(self, section, key, data):
+        raise NotImplementedError
+
+    def delete(self, section, key):
+        """Remove the entry, if there is one"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove all the entries"""
+        raise NotImplementedError
+
+
+class FilesystemCacheBackend(CacheBackend):
+    """One JSON file per entry, at <root_dir>/<section>/<key>.json"""
+
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+
+    def __str__(self):
+        return f'cache dir {self.root_dir}'
+
+    def _get_cache_fn(self, section, key):
+        key = urllib.parse.quote(key, safe='').replace('%', ',')  # encode non-ascii characters
+        return os.path.join(self.root_dir, section, f'{key}.json')
+
+    def load(self, section, key):
+        cache_fn = self._get_cache_fn(section, key)
+        try:
+            with open(cache_fn, encoding='utf-8') as cachef:
+                return json.load(cachef)
+        except OSError:
+            return None
+        except ValueError as e:
+            try:
+                file_size = os.path.getsize(cache_fn)
+            except OSError as oe:
+                file_size = str(oe)
+            raise ValueError(f'{cache_fn} is invalid ({file_size})') from e
+
+    def store(self, section, key, data):
+        fn = self._get_cache_fn(section, key)
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        write_json_file(data, fn)
+
+    def delete(self, section, key):
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._get_cache_fn(section, key))
+
+    def clear(self):
+        if not any((term in self.root_dir) for term in ('cache', 'tmp')):
+            raise Exception(f'Not removing directory {self.root_dir} - this does not look like a cache dir')
+        if os.path.exists(self.root_dir):
+            shutil.rmtree(self.root_dir)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """All the entries in a single SQLite database file"""
+
+    def __init__(self, path):
+        if not sqlite3:
+            raise ImportError('The sqlite cache needs a Python interpreter compiled with sqlite3 support')
+        self.path = path
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f'cache database {self.path}'
+
+    def _connect(self):
+        if not self._connection:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Shared by the threads of the process, which is why it is used under the lock
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache (section TEXT, key TEXT, data TEXT, PRIMARY KEY (section, key))')
+        return self._connection
+
+    def load(self, section, key):
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT data FROM cache WHERE section = ? AND key = ?', (section, key)).fetchone()
+        return row and json.loads(row[0])
+
+    def store(self, section, key, data):
+        data = json.dumps(data)
+        with self._lock, self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', (section, key, data))
+
+    def delete(self, section, key):
+        with self._lock, self._connect() as connection:
+            connection.execute('DELETE FROM cache WHERE section = ? AND key = ?', (section, key))
+
+    def clear(self):
+        with self._lock:
+            if self._connection:
+                self._connection.close()
+                self._connection = None
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.path)
+
+
+class MemoryCacheBackend(CacheBackend):
+    """The entries that were used last, kept in memory for as long as the process runs"""
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        # Serialized, so that the callers cannot change the stored entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return 'memory cache'
+
+    def load(self, section, key):
+        with self._lock:
+            data = self._entries.get((section, key))
+            if data is None:
+                return None
+            self._entries.move_to_end((section, key))
+        return json.loads(data)
+
+    def store(self, section, key, data):
+        data = json.dumps(data)
+        with self._lock:
+            self._entries[(section, key)] = data
+            self._entries.move_to_end((section, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, section, key):
+        with self._lock:
+            self._entries.pop((section, key), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class HTTPCacheBackend(CacheBackend):
+    """
+    Entries on a key-value server, as JSON documents at <url>/<section>/<key>
+
+    The entries are read with GET, written with PUT and removed with DELETE, and all of them
+    are removed with a DELETE of <url>/. A missing entry is a 404. The requests are sent
+    through the YoutubeDL, so that they use its proxy and network settings
+    """
+
+    def __init__(self, ydl, url):
+        self._ydl = ydl
+        self.url = url.rstrip('/')
+
+    def __str__(self):
+        return f'cache server {self.url}'
+
+    def _request(self, path, data=None, method=None):
+        headers = {'Content-Type': 'application/json'} if data is not None else None
+        # Not in the HTTP cache, which may itself be stored in this backend
+        return self._ydl.urlopen(Request(
+            f'{self.url}/{path}', data, headers, method=method, extensions={'cache': False}))
+
+    def _entry_path(self, section, key):
+        return f'{section}/{urllib.parse.quote(key, safe="")}'
+
+    def load(self, section, key):
+        try:
+            with self._request(self._entry_path(section, key)) as response:
+                return json.loads(response.read())
+        except HTTPError as e:
+            if e.status == 404:
+                return None
+            raise
+
+    def store(self, section, key, data):
+        self._request(self._entry_path(section, key), json.dumps(data).encode(), 'PUT').close()
+
+    def delete(self, section, key):
+        try:
+            self._request(self._entry_path(section, key), method='DELETE').close()
+        except HTTPError as e:
+            if e.status != 404:
+                raise
+
+    def clear(self):
+        self._request('', method='DELETE').close()
+
+
 class Cache:
+    """
+    Data that yt-dlp keeps between runs, such as client ids and signatures
+
+    The entries are stored by a CacheBackend, that is selected by the
+    cache_backend and cachedir parameters of the YoutubeDL
+    """
+
+    BACKENDS = ('filesystem', 'sqlite', 'memory')
+
     def __init__(self, ydl):
         self._ydl = ydl
+        self._backend = None
 
     def _get_root_dir(self):
         res = self._ydl.params.get('cachedir')
@@ -21,10 +235,23 @@ def _get_root_dir(self):
             res = os.path.join(cache_root, 'yt-dlp')
         return expand_path(res)
 
-    def _get_cache_fn(self, section, key, dtype):
-        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
-        key = urllib.parse.quote(key, safe='').replace('%', ',')  # encode non-ascii characters
-        return os.path.join(self._get_root_dir(), section, f'{key}.{dtype}')
+    @property
+    def backend(self):
+        if self._backend is None:
+            backend = self._ydl.params.get('cache_backend') or 'filesystem'
+            if isinstance(backend, CacheBackend):
+                self._backend = backend
+            elif backend == 'filesystem':
+                self._backend = FilesystemCacheBackend(self._get_root_dir())
+            elif backend == 'sqlite':
+                self._backend = SQLiteCacheBackend(os.path.join(self._get_root_dir(), 'cache.sqlite3'))
+            elif backend == 'memory':
+                self._backend = MemoryCacheBackend()
+            elif re.match(r'https?://', backend):
+                self._backend = HTTPCacheBackend(self._ydl, backend)
+            else:
+                raise ValueError(f'Invalid cache backend {backend!r}')
+        return self._backend
 
     @property
     def enabled(self):
@@ -32,18 +259,29 @@ def enabled(self):
 
     def store(self, section, key, data, dtype='json'):
         assert dtype in ('json',)
+        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
 
         if not self.enabled:
             return
 
-        fn = self._get_cache_fn(section, key, dtype)
         try:
-            os.makedirs(os.path.dirname(fn), exist_ok=True)
             self._ydl.write_debug(f'Saving {section}.{key} to cache')
-            write_json_file({'yt-dlp_version': __version__, 'data': data}, fn)
+            self.backend.store(section, key, {'yt-dlp_version': __version__, 'data': data})
         except Exception:
             tb = traceback.format_exc()
-            self._ydl.report_warning(f'Writing cache to {fn!r} failed: {tb}')
+            self._ydl.report_warning(f'Writing {section}.{key} to {self.backend} failed: {tb}')
+
+    def delete(self, section, key):
+        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
+
+        if not self.enabled:
+            return
+
+        try:
+            self._ydl.write_debug(f'Removing {section}.{key} from cache')
+            self.backend.delete(section, key)
+        except Exception as e:
+            self._ydl.report_warning(f'Removing {section}.{key} from {self.backend} failed: {e}')
 
     def _validate(self, data, min_ver):
         version = traverse_obj(data, 'yt-dlp_version')
@@ -55,22 +293,18 @@ def _validate(self, data, min_ver):
 
     def load(self, section, key, dtype='json', default=None, *, min_ver=None):
         assert dtype in ('json',)
+        assert re.match(r'^[\w.-]+$', section), f'invalid section {section!r}'
 
         if not self.enabled:
             return default
 
-        cache_fn = self._get_cache_fn(section, key, dtype)
-        with contextlib.suppress(OSError):
-            try:
-                with open(cache_fn, encoding='utf-8') as cachef:
-                    self._ydl.write_debug(f'Loading {section}.{key} from cache')
-                    return self._validate(json.load(cachef), min_ver)
-            except (ValueError, KeyError):
-                try:
-                    file_size = os.path.getsize(cache_fn)
-                except OSError as oe:
-                    file_size = str(oe)
-                self._ydl.report_warning(f'Cache retrieval from {cache_fn} failed ({file_size})')
+        try:
+            data = self.backend.load(section, key)
+            if data is not None:
+                self._ydl.write_debug(f'Loading {section}.{key} from cache')
+                return self._validate(data, min_ver)
+        except Exception as e:
+            self._ydl.report_warning(f'Cache retrieval of {section}.{key} from {self.backend} failed: {e}')
 
         return default
 
@@ -79,13 +313,6 @@ def remove(self):
             self._ydl.to_screen('Cache is disabled (Did you combine --no-cache-dir and --rm-cache-dir?)')
             return
 
-        cachedir = self._get_root_dir()
-        if not any((term in cachedir) for term in ('cache', 'tmp')):
-            raise Exception(f'Not removing directory {cachedir} - this does not look like a cache dir')
-
-        self._ydl.to_screen(
-            f'Removing cache dir {cachedir} .', skip_eol=True)
-        if os.path.exists(cachedir):
-            self._ydl.to_screen('.', skip_eol=True)
-            shutil.rmtree(cachedir)
-        self._ydl.to_screen('.')
+        self._ydl.to_screen(f'Removing {self.backend} .', skip_eol=True)
+        self.backend.clear()
+        self._ydl.to_screen('..')
@@ -1,96 +1,163 @@
 # flake8: noqa: F401
 """Imports all optional dependencies for the project.
+Each dependency is only imported when it is first accessed, see __getattr__.
 An attribute "_yt_dlp__identifier" may be inserted into the module if it uses an ambiguous namespace"""
 
-try:
-    import brotlicffi as brotli
-except ImportError:
+import importlib
+
+
+def _import_brotli():
     try:
-        import brotli
+        import brotlicffi as brotli
     except ImportError:
-        brotli = None
+        try:
+            import brotli
+        except ImportError:
+            brotli = None
+    return brotli
 
 
-try:
-    import certifi
-except ImportError:
-    certifi = None
-else:
+def _import_certifi():
+    try:
+        import certifi
+    except ImportError:
+        return None
+
     from os.path import exists as _path_exists
 
     # The certificate may not be bundled in executable
     if not _path_exists(certifi.where()):
-        certifi = None
+        return None
+    return certifi
 
 
-try:
-    import mutagen
-except ImportError:
-    mutagen = None
+def _import_mutagen():
+    try:
+        import mutagen
+    except ImportError:
+        mutagen = None
+    return mutagen
 
 
-secretstorage = None
-try:
-    import secretstorage
-    _SECRETSTORAGE_UNAVAILABLE_REASON = None
-except ImportError:
-    _SECRETSTORAGE_UNAVAILABLE_REASON = (
-        'as the `secretstorage` module is not installed. '
-        'Please install by running `python3 -m pip install secretstorage`')
-except Exception as _err:
-    _SECRETSTORAGE_UNAVAILABLE_REASON = f'as the `secretstorage` module could not be initialized. {_err}'
+def _import_secretstorage():
+    global _SECRETSTORAGE_UNAVAILABLE_REASON
+    secretstorage = None
+    try:
+        import secretstorage
+        _SECRETSTORAGE_UNAVAILABLE_REASON = None
+    except ImportError:
+        _SECRETSTORAGE_UNAVAILABLE_REASON = (
+            'as the `secretstorage` module is not installed. '
+            'Please install by running `python3 -m pip install secretstorage`')
+    except Exception as _err:
+        _SECRETSTORAGE_UNAVAILABLE_REASON = f'as the `secretstorage` module could not be initialized. {_err}'
+    return secretstorage
 
 
-try:
-    import sqlite3
-    # We need to get the underlying `sqlite` version, see https://github.com/yt-dlp/yt-dlp/issues/8152
-    sqlite3._yt_dlp__version = sqlite3.sqlite_version
-except ImportError:
-    # although sqlite3 is part of the standard library, it is possible to compile Python without
-    # sqlite support. See: https://github.com/yt-dlp/yt-dlp/issues/544
-    sqlite3 = None
+def _import_sqlite3():
+    try:
+        import sqlite3
+        # We need to get the underlying `sqlite` version, see https://github.com/yt-dlp/yt-dlp/issues/8152
+        sqlite3._yt_dlp__version = sqlite3.sqlite_version
+    except ImportError:
+        # although sqlite3 is part of the standard library, it is possible to compile Python without
+        # sqlite support. See: https://github.com/yt-dlp/yt-dlp/issues/544
+        sqlite3 = None
+    return sqlite3
 
 
-try:
-    import websockets
-except ImportError:
-    websockets = None
+def _import_websockets():
+    try:
+        import websockets
+    except ImportError:
+        websockets = None
+    return websockets
 
-try:
-    import urllib3
-except ImportError:
-    urllib3 = None
 
-try:
-    import requests
-except ImportError:
-    requests = None
+def _import_urllib3():
+    try:
+        import urllib3
+    except ImportError:
+        urllib3 = None
+    return urllib3
+
+
+def _import_requests():
+    try:
+        import requests
+    except ImportError:
+        requests = None
+    return requests
 
-try:
-    import xattr  # xattr or pyxattr
-except ImportError:
-    xattr = None
-else:
-    if hasattr(xattr, 'set'):  # pyxattr
-        xattr._yt_dlp__identifier = 'pyxattr'
 
-try:
-    import curl_cffi
-except ImportError:
-    curl_cffi = None
+def _import_xattr():
+    try:
+        import xattr  # xattr or pyxattr
+    except ImportError:
+        xattr = None
+    else:
+        if hasattr(xattr, 'set'):  # pyxattr
+            xattr._yt_dlp__identifier = 'pyxattr'
+    return xattr
 
-from . import Cryptodome
 
-all_dependencies = {k: v for k, v in globals().items() if not k.startswith('_')}
-available_dependencies = {k: v for k, v in all_dependencies.items() if v}
+def _import_curl_cffi():
+    try:
+        import curl_cffi
+    except ImportError:
+        curl_cffi = None
+    return curl_cffi
 
 
-# Deprecated
-Cryptodome_AES = Cryptodome.AES
+def _import_h2():
+    try:
+        import h2
+    except ImportError:
+        h2 = None
+    return h2
+
+
+def _import_cryptodome():
+    return importlib.import_module('.Cryptodome', __name__)
+
+
+_DEPENDENCIES = {
+    'brotli': _import_brotli,
+    'certifi': _import_certifi,
+    'mutagen': _import_mutagen,
+    'secretstorage': _import_secretstorage,
+    'sqlite3': _import_sqlite3,
+    'websockets': _import_websockets,
+    'urllib3': _import_urllib3,
+    'requests': _import_requests,
+    'xattr': _import_xattr,
+    'curl_cffi': _import_curl_cffi,
+    'h2': _import_h2,
+    'Cryptodome': _import_cryptodome,
+}
+
+
+def __getattr__(name):
+    if name in _DEPENDENCIES:
+        value = globals()[name] = _DEPENDENCIES[name]()
+        return value
+    elif name == '_SECRETSTORAGE_UNAVAILABLE_REASON':
+        __getattr__('secretstorage')
+        return globals()[name]
+    elif name == 'all_dependencies':
+        return {
+            dependency: globals()[dependency] if dependency in globals() else __getattr__(dependency)
+            for dependency in _DEPENDENCIES}
+    elif name == 'available_dependencies':
+        return {k: v for k, v in __getattr__('all_dependencies').items() if v}
+    # Deprecated
+    elif name == 'Cryptodome_AES':
+        return __getattr__('Cryptodome').AES
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 __all__ = [
     'all_dependencies',
     'available_dependencies',
-    *all_dependencies.keys(),
+    *_DEPENDENCIES.keys(),
 ]
@@ -1,3 +1,5 @@
+import importlib
+
 from ..utils import NO_DEFAULT, determine_protocol
 
 
@@ -9,55 +11,76 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
     protocols = (protocol or info_copy['protocol']).split('+')
     downloaders = [_get_suitable_downloader(info_copy, proto, params, default) for proto in protocols]
 
+    FFmpegFD = _get_downloader('FFmpegFD')
     if set(downloaders) == {FFmpegFD} and FFmpegFD.can_merge_formats(info_copy, params):
         return FFmpegFD
-    elif (set(downloaders) == {DashSegmentsFD}
+    elif (set(protocols) == {'http_dash_segments_generator'}
           and not (to_stdout and len(protocols) > 1)
-          and set(protocols) == {'http_dash_segments_generator'}):
-        return DashSegmentsFD
+          and set(downloaders) == {_get_downloader('DashSegmentsFD')}):
+        return _get_downloader('DashSegmentsFD')
     elif len(downloaders) == 1:
         return downloaders[0]
     return None
 
 
-# Some of these require get_suitable_downloader
-from .common import FileDownloader
-from .dash import DashSegmentsFD
-from .external import FFmpegFD, get_external_downloader
-from .f4m import F4mFD
-from .fc2 import FC2LiveFD
-from .hls import HlsFD
-from .http import HttpFD
-from .ism import IsmFD
-from .mhtml import MhtmlFD
-from .niconico import NiconicoDmcFD, NiconicoLiveFD
-from .rtmp import RtmpFD
-from .rtsp import RtspFD
-from .websocket import WebSocketFragmentFD
-from .youtube_live_chat import YoutubeLiveChatFD
-
-PROTOCOL_MAP = {
-    'rtmp': RtmpFD,
-    'rtmpe': RtmpFD,
-    'rtmp_ffmpeg': FFmpegFD,
-    'm3u8_native': HlsFD,
-    'm3u8': FFmpegFD,
-    'mms': RtspFD,
-    'rtsp': RtspFD,
-    'f4m': F4mFD,
-    'http_dash_segments': DashSegmentsFD,
-    'http_dash_segments_generator': DashSegmentsFD,
-    'ism': IsmFD,
-    'mhtml': MhtmlFD,
-    'niconico_dmc': NiconicoDmcFD,
-    'niconico_live': NiconicoLiveFD,
-    'fc2_live': FC2LiveFD,
-    'websocket_frag': WebSocketFragmentFD,
-    'youtube_live_chat': YoutubeLiveChatFD,
-    'youtube_live_chat_replay': YoutubeLiveChatFD,
+# The downloaders are only imported when first accessed, see __getattr__
+_DOWNLOADER_MODULES = {
+    'FileDownloader': 'common',
+    'DashSegmentsFD': 'dash',
+    'FFmpegFD': 'external',
+    'get_external_downloader': 'external',
+    'F4mFD': 'f4m',
+    'FC2LiveFD': 'fc2',
+    'HlsFD': 'hls',
+    'HttpFD': 'http',
+    'IsmFD': 'ism',
+    'MhtmlFD': 'mhtml',
+    'NiconicoDmcFD': 'niconico',
+    'NiconicoLiveFD': 'niconico',
+    'RtmpFD': 'rtmp',
+    'RtspFD': 'rtsp',
+    'WebSocketFragmentFD': 'websocket',
+    'YoutubeLiveChatFD': 'youtube_live_chat',
+}
+
+_PROTOCOL_DOWNLOADERS = {
+    'rtmp': 'RtmpFD',
+    'rtmpe': 'RtmpFD',
+    'rtmp_ffmpeg': 'FFmpegFD',
+    'm3u8_native': 'HlsFD',
+    'm3u8': 'FFmpegFD',
+    'mms': 'RtspFD',
+    'rtsp': 'RtspFD',
+    'f4m': 'F4mFD',
+    'http_dash_segments': 'DashSegmentsFD',
+    'http_dash_segments_generator': 'DashSegmentsFD',
+    'ism': 'IsmFD',
+    'mhtml': 'MhtmlFD',
+    'niconico_dmc': 'NiconicoDmcFD',
+    'niconico_live': 'NiconicoLiveFD',
+    'fc2_live': 'FC2LiveFD',
+    'websocket_frag': 'WebSocketFragmentFD',
+    'youtube_live_chat': 'YoutubeLiveChatFD',
+    'youtube_live_chat_replay': 'YoutubeLiveChatFD',
 }
 
 
+def __getattr__(name):
+    if name == 'PROTOCOL_MAP':
+        # Built once, so that changes made to it by the callers are kept
+        value = globals()[name] = {protocol: _get_downloader(fd) for protocol, fd in _PROTOCOL_DOWNLOADERS.items()}
+        return value
+    module = _DOWNLOADER_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = getattr(importlib.import_module(f'.{module}', __name__), name)
+    return value
+
+
+def _get_downloader(name):
+    return globals().get(name) or __getattr__(name)
+
+
 def shorten_protocol_name(proto, simplify=False):
     short_protocol_names = {
         'm3u8_native': 'm3u8',
@@ -84,8 +107,9 @@ def shorten_protocol_name(proto, simplify=False):
 
 def _get_suitable_downloader(info_dict, protocol, params, default):
     """Get the downloader class that can handle the info dict."""
+    FFmpegFD, HlsFD = _get_downloader('FFmpegFD'), _get_downloader('HlsFD')
     if default is NO_DEFAULT:
-        default = HttpFD
+        default = _get_downloader('HttpFD')
 
     if (info_dict.get('section_start') or info_dict.get('section_end')) and FFmpegFD.can_download(info_dict):
         return FFmpegFD
@@ -100,7 +124,7 @@ def _get_suitable_downloader(info_dict, protocol, params, default):
         if info_dict['to_stdout'] and FFmpegFD.can_merge_formats(info_dict, params):
             return FFmpegFD
     elif external_downloader.lower() != 'native':
-        ed = get_external_downloader(external_downloader)
+        ed = _get_downloader('get_external_downloader')(external_downloader)
         if ed.can_download(info_dict, external_downloader):
             return ed
 
@@ -121,7 +145,10 @@ def _get_suitable_downloader(info_dict, protocol, params, default):
         elif params.get('hls_prefer_native') is False:
             return FFmpegFD
 
-    return PROTOCOL_MAP.get(protocol, default)
+    if 'PROTOCOL_MAP' in globals():  # It may have been changed since it was built
+        return globals()['PROTOCOL_MAP'].get(protocol, default)
+    fd = _PROTOCOL_DOWNLOADERS.get(protocol)
+    return _get_downloader(fd) if fd else default
 
 
 __all__ = [
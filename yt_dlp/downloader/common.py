@@ -6,6 +6,7 @@
 import re
 import threading
 import time
+import urllib.parse
 
 from ..minicurses import (
     BreaklineStatusPrinter,
@@ -35,6 +36,43 @@
 )
 
 
+class TokenBucket:
+    """
+    Thread-safe token bucket, allowing `rate` tokens per second on average
+    and bursts of up to `capacity` tokens
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, tokens):
+        """Take tokens from the bucket, sleeping until the bucket is no longer in debt"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate) - tokens
+            self._updated = now
+            wait = -self._tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+_RATE_LIMITERS = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def _get_rate_limiter(rate, host=None):
+    # Shared by all downloaders in the process, so that concurrent downloads and fragments draw from the same bucket
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get((rate, host))
+        if not limiter:
+            limiter = _RATE_LIMITERS[rate, host] = TokenBucket(rate)
+        return limiter
+
+
 class FileDownloader:
     """File Downloader class.
 
@@ -49,7 +87,9 @@ class FileDownloader:
 
     verbose:            Print additional info to stdout.
     quiet:              Do not print messages to stdout.
-    ratelimit:          Download speed limit, in bytes/sec.
+    ratelimit:          Download speed limit, in bytes/sec. Shared by all downloads
+                        and fragments being downloaded at the same time.
+    ratelimit_per_host: Download speed limit for each host, in bytes/sec.
     throttledratelimit: Assume the download is being throttled below this speed (bytes/sec)
     retries:            Number of times to retry for expected network errors.
                         Default is 0 for API, but 10 for CLI
@@ -200,8 +240,17 @@ def parse_bytes(bytestr):
                             'may be removed in the future. Use yt_dlp.utils.parse_bytes instead')
         return parse_bytes(bytestr)
 
+    def throttle(self, num_bytes, url=None):
+        """Sleep as long as needed to keep all downloads within the rate limits, after num_bytes were downloaded"""
+        rate_limit = self.params.get('ratelimit')
+        if rate_limit:
+            _get_rate_limiter(rate_limit).consume(num_bytes)
+        host_rate_limit = self.params.get('ratelimit_per_host')
+        if host_rate_limit and url:
+            _get_rate_limiter(host_rate_limit, urllib.parse.urlparse(url).netloc).consume(num_bytes)
+
     def slow_down(self, start_time, now, byte_counter):
-        """Sleep if the download speed is over the rate limit."""
+        """Sleep if the speed of this download is over the rate limit. Deprecated; use throttle() instead"""
         rate_limit = self.params.get('ratelimit')
         if rate_limit is None or byte_counter == 0:
             return
@@ -430,12 +479,11 @@ def download(self, filename, info_dict, subtitle=False):
         """Download to a filename using the info from info_dict
         Return True on success and False otherwise
         """
-        nooverwrites_and_exists = (
-            not self.params.get('overwrites', True)
-            and os.path.exists(encodeFilename(filename))
-        )
-
         if not hasattr(filename, 'write'):
+            nooverwrites_and_exists = (
+                not self.params.get('overwrites', True)
+                and os.path.exists(encodeFilename(filename))
+            )
             continuedl_and_exists = (
                 self.params.get('continuedl', True)
                 and os.path.isfile(encodeFilename(filename))
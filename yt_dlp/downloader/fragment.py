@@ -1,14 +1,20 @@
+import collections
 import concurrent.futures
 import contextlib
+import heapq
+import io
+import itertools
 import json
 import math
 import os
 import struct
+import tempfile
+import threading
 import time
 
 from .common import FileDownloader
 from .http import HttpFD
-from ..aes import aes_cbc_decrypt_bytes, unpad_pkcs7
+from ..aes import CBCDecrypter, aes_cbc_decrypt_bytes, unpad_pkcs7
 from ..compat import compat_os_name
 from ..networking import Request
 from ..networking.exceptions import HTTPError, IncompleteRead
@@ -24,6 +30,290 @@ def to_screen(self, *args, **kargs):
     to_console_title = to_screen
 
 
+class _FragmentMemoryBudget:
+    """The number of bytes that all the fragment buffers of a download may hold in memory"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def reserve(self, size):
+        with self._lock:
+            if self.used + size > self.limit:
+                return False
+            self.used += size
+            return True
+
+    def release(self, size):
+        with self._lock:
+            self.used -= size
+
+
+class _FragmentCancelled(Exception):
+    pass
+
+
+class FragmentBuffer:
+    """
+    A file-like object that a fragment is downloaded into
+
+    The data is kept in memory while the shared budget allows it,
+    and is moved to an anonymous temporary file in `spill_dir` after that
+
+    With `aes_cbc` as (key, iv), the data is decrypted with AES-128 while it is
+    written, and only the plaintext is kept. `tell` then counts the written
+    (encrypted) bytes, and the buffer can only be restarted from the beginning
+    """
+
+    def __init__(self, budget, spill_dir=None, aes_cbc=None):
+        self._budget = budget
+        self._spill_dir = spill_dir
+        self._reserved = 0
+        self._file = io.BytesIO()
+        self._cancelled = False
+        self.spilled = False
+        self.aes_cbc = aes_cbc
+        self._decrypter = aes_cbc and CBCDecrypter(*aes_cbc)
+        self._written = 0
+
+    @property
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """Abort the download that is writing to this buffer, at its next write"""
+        self._cancelled = True
+
+    def _release(self):
+        self._budget.release(self._reserved)
+        self._reserved = 0
+
+    def _spill(self):
+        spill_file = tempfile.TemporaryFile(dir=self._spill_dir)
+        with self._file.getbuffer() as data:
+            spill_file.write(data)
+        spill_file.seek(self._file.tell())
+        self._file.close()
+        self._file = spill_file
+        self._release()
+        self.spilled = True
+
+    def _write(self, data):
+        if not self.spilled:
+            if self._budget.reserve(len(data)):
+                self._reserved += len(data)
+            else:
+                self._spill()
+        return self._file.write(data)
+
+    def write(self, data):
+        if self._cancelled:
+            raise _FragmentCancelled
+        if not self.aes_cbc:
+            return self._write(data)
+        if self._decrypter is None:
+            raise io.UnsupportedOperation('The decryption of the buffer was already finished')
+        self._written += len(data)
+        self._write(self._decrypter.update(data))
+        return len(data)
+
+    def tell(self):
+        return self._written if self.aes_cbc else self._file.tell()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def truncate(self, size=None):
+        if self.aes_cbc:
+            if size or self._file.tell():
+                raise io.UnsupportedOperation('A decrypted buffer can only be truncated to the beginning')
+            self._decrypter = CBCDecrypter(*self.aes_cbc)
+            self._written = 0
+        return self._file.truncate(size)
+
+    def flush(self):
+        self._file.flush()
+
+    def getvalue(self):
+        if self._decrypter:
+            self._file.seek(0, os.SEEK_END)
+            self._write(self._decrypter.finish())
+            self._decrypter = None
+        if not self.spilled:
+            return self._file.getvalue()
+        position = self._file.tell()
+        self._file.seek(0)
+        try:
+            return self._file.read()
+        finally:
+            self._file.seek(position)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        self._file.close()
+        self._release()
+
+
+class _DelayedCalls:
+    """Calls functions after a delay, from a single thread that only runs while calls are pending"""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._calls = []  # Heap of [time, sequence number, func]
+        self._counter = itertools.count()
+        self._thread = None
+
+    def schedule(self, delay, func):
+        """Call func in `delay` seconds, unless the returned call is cancelled before that"""
+        call = [time.monotonic() + delay, next(self._counter), func]
+        with self._cond:
+            heapq.heappush(self._calls, call)
+            if not self._thread:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return call
+
+    def cancel(self, call):
+        with self._cond:
+            if call in self._calls:
+                self._calls.remove(call)
+                heapq.heapify(self._calls)
+                self._cond.notify()
+
+    def _run(self):
+        with self._cond:
+            while self._calls:
+                remaining = self._calls[0][0] - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                func = heapq.heappop(self._calls)[2]
+                self._cond.release()
+                try:
+                    func()
+                finally:
+                    self._cond.acquire()
+            self._thread = None
+
+
+def _map_in_order(pool, func, iterable, window, discard=None):
+    """
+    Like `pool.map`, but at most `window` items are scheduled ahead of the
+    oldest unfinished one, and `iterable` is only consumed as needed
+
+    The items may finish in any order; the results that finished early are
+    held until all the ones before them are yielded. When the generator is
+    closed early, `discard` is called with the results that were not yielded,
+    including those of the items that are still running
+    """
+    pending = collections.deque()
+    iterator = iter(iterable)
+    try:
+        while True:
+            for item in iterator:
+                pending.append((item, pool.submit(func, item)))
+                if len(pending) >= window:
+                    break
+            if not pending:
+                return
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            if not future.cancel() and discard:
+                future.add_done_callback(
+                    lambda future: future.exception() is None and discard(future.result()))
+
+
+class _AdaptiveConcurrency:
+    """
+    Limits how many fragments are downloaded at once, and tunes the limit during
+    the download (additive increase, multiplicative decrease)
+
+    The fragments are measured in rounds of twice the current limit. The limit is
+    increased by one after a round that was faster than the one before it, and is
+    reduced when a fragment needed a retry or the fragments took much longer than
+    in the best round so far
+
+    @param max_limit:   The highest limit, i.e. the number of threads available
+    @param downloaded:  Callable that returns the total number of bytes downloaded so far
+    @param report:      Callable that is given a message when the limit changes, or None
+    """
+
+    _INITIAL_LIMIT = 2
+    # A round must be this much faster than the previous one to increase the limit
+    _MIN_SPEEDUP = 1.1
+    # The limit is reduced once the median fragment takes this much longer than in the best round
+    _MAX_SLOWDOWN = 2
+    _ERROR_DECREASE = 0.5
+    _SLOWDOWN_DECREASE = 0.75
+
+    def __init__(self, max_limit, downloaded, report=None):
+        self.max_limit = max_limit
+        self.limit = min(self._INITIAL_LIMIT, max_limit)
+        self._downloaded = downloaded
+        self._report = report
+        self._active = 0
+        self._condition = threading.Condition()
+        self._best_latency = None
+        self._last_speed = None
+        self._start_round()
+
+    def _start_round(self):
+        self._round_durations = []
+        self._round_failed = False
+        self._round_start = time.monotonic()
+        self._round_bytes = self._downloaded()
+
+    def _set_limit(self, limit, reason):
+        limit = max(1, min(int(limit), self.max_limit))
+        if limit != self.limit:
+            if self._report:
+                self._report(f'Concurrent fragments {"in" if limit > self.limit else "de"}creased to {limit} ({reason})')
+            self.limit = limit
+            self._condition.notify_all()
+
+    def acquire(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._active < self.limit)
+            self._active += 1
+
+    def release(self, duration, failed=False):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+            if failed:
+                if not self._round_failed:
+                    self._set_limit(self.limit * self._ERROR_DECREASE, 'fragment errors')
+                    self._last_speed = None
+                self._start_round()
+                # Further errors of fragments that were started before the decrease are not counted again
+                self._round_failed = True
+                return
+            self._round_durations.append(duration)
+            if len(self._round_durations) < 2 * self.limit:
+                return
+
+            elapsed = time.monotonic() - self._round_start
+            speed = (self._downloaded() - self._round_bytes) / elapsed if elapsed > 0 else None
+            latency = sorted(self._round_durations)[len(self._round_durations) // 2]
+            if self._best_latency is None or latency < self._best_latency:
+                self._best_latency = latency
+            if latency > self._best_latency * self._MAX_SLOWDOWN:
+                self._set_limit(self.limit * self._SLOWDOWN_DECREASE, 'fragments are slower')
+                self._last_speed = None
+            else:
+                if speed and (self._last_speed is None or speed > self._last_speed * self._MIN_SPEEDUP):
+                    self._set_limit(self.limit + 1, 'download is faster')
+                self._last_speed = speed
+            self._start_round()
+
+
 class FragmentFD(FileDownloader):
     """
     A base file downloader class for fragmented media (e.g. f4m/m3u8 manifests).
@@ -36,7 +326,16 @@ class FragmentFD(FileDownloader):
                         Skip unavailable fragments (DASH and hlsnative only)
     keep_fragments:     Keep downloaded fragments on disk after downloading is
                         finished
+    fragment_buffer_size: Maximum number of bytes of downloaded fragments to
+                        hold in memory before they are appended to the file.
+                        Fragments beyond this are written to temporary files.
+                        0 writes every fragment to its own file on disk
+    hedge_fragments:    Request a fragment a second time if it takes longer than
+                        most of the previous fragments, and use whichever
+                        response finishes first. Needs fragment_buffer_size
     concurrent_fragment_downloads:  The number of threads to use for native hls and dash downloads
+    concurrent_fragments_auto: Tune the number of fragments that are downloaded at once
+                        during the download, up to concurrent_fragment_downloads
     _no_ytdl_file:      Don't use .ytdl file
 
     For each incomplete fragment download yt-dlp keeps on disk a special
@@ -60,6 +359,22 @@ class FragmentFD(FileDownloader):
     This feature is experimental and file format may change in future.
     """
 
+    _DEFAULT_FRAGMENT_BUFFER_SIZE = 64 * 1024 * 1024
+    # How many fragments each thread may download ahead of the next one to be appended
+    _FRAGMENT_WINDOW_PER_THREAD = 4
+    # A fragment is hedged once it is slower than this percentile of the previous ones
+    _HEDGE_PERCENTILE = 95
+    _HEDGE_MIN_SAMPLES = 10
+
+    def __init__(self, ydl, params):
+        super().__init__(ydl, params)
+        buffer_size = self.params.get('fragment_buffer_size')
+        # Shared by all the formats that are downloaded together
+        self._fragment_memory = _FragmentMemoryBudget(
+            self._DEFAULT_FRAGMENT_BUFFER_SIZE if buffer_size is None else buffer_size)
+        self._aes_keys = {}
+        self._hedges = _DelayedCalls()
+
     def report_retry_fragment(self, err, frag_index, count, retries):
         self.deprecation_warning('yt_dlp.downloader.FragmentFD.report_retry_fragment is deprecated. '
                                  'Use yt_dlp.downloader.FileDownloader.report_retry instead')
@@ -109,7 +424,9 @@ def _write_ytdl_file(self, ctx):
         finally:
             frag_index_stream.close()
 
-    def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_data=None):
+    def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_data=None, aes_cbc=None):
+        # A fragment that was downloaded again without being appended, e.g. when it is retried
+        self._discard_fragment(ctx)
         fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], ctx['fragment_index'])
         fragment_info_dict = {
             'url': frag_url,
@@ -117,20 +434,135 @@ def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_dat
             'request_data': request_data,
             'ctx_id': ctx.get('ctx_id'),
         }
+        if self.params.get('concurrent_fragment_downloads', 1) > 1:
+            # Lets the fragments share a connection when the server supports it
+            fragment_info_dict['request_extensions'] = {'multiplex': True}
         frag_resume_len = 0
         if ctx['dl'].params.get('continuedl', True):
             frag_resume_len = self.filesize_or_none(self.temp_name(fragment_filename))
         fragment_info_dict['frag_resume_len'] = ctx['frag_resume_len'] = frag_resume_len
 
-        success, _ = ctx['dl'].download(fragment_filename, fragment_info_dict)
+        # A partially downloaded fragment file is resumed in place
+        fragment_buffer = None
+        if self._fragment_memory.limit and not frag_resume_len and not self.params.get('keep_fragments'):
+            fragment_buffer = FragmentBuffer(
+                self._fragment_memory, os.path.dirname(ctx['tmpfilename']) or None, aes_cbc)
+        hedge_delay = self.params.get('hedge_fragments') and fragment_buffer and ctx.get('progress') and (
+            ctx['progress'].duration_percentile(self._HEDGE_PERCENTILE, self._HEDGE_MIN_SAMPLES))
+
+        started = time.monotonic()
+        try:
+            if hedge_delay:
+                success, fragment_buffer, fragment_info_dict = self._download_hedged_fragment(
+                    ctx, fragment_buffer, fragment_info_dict, hedge_delay)
+            else:
+                success, _ = ctx['dl'].download(fragment_buffer or fragment_filename, fragment_info_dict)
+        except BaseException:
+            if fragment_buffer:
+                fragment_buffer.close()
+            raise
         if not success:
+            if fragment_buffer:
+                fragment_buffer.close()
             return False
+        if ctx.get('progress'):
+            ctx['progress'].add_duration(time.monotonic() - started)
         if fragment_info_dict.get('filetime'):
             ctx['fragment_filetime'] = fragment_info_dict.get('filetime')
-        ctx['fragment_filename_sanitized'] = fragment_filename
+        if fragment_buffer:
+            ctx['fragment_buffer'] = fragment_buffer
+        else:
+            ctx['fragment_filename_sanitized'] = fragment_filename
         return True
 
+    def _download_hedged_fragment(self, ctx, fragment_buffer, fragment_info_dict, delay):
+        """
+        Download a fragment into fragment_buffer, and if that takes longer than
+        `delay` seconds, race it against a second request for the same fragment
+
+        The first request is made from the calling thread, and the second one from a thread
+        that is only started once the delay has passed. When the second one finishes first,
+        the first one is aborted at its next write, and this then returns
+
+        @returns (success, buffer, info_dict) of the download that finished first
+        """
+        condition = threading.Condition()
+        state = {'winner': None, 'running': 1, 'error': None, 'primary_success': False}
+        buffers = [fragment_buffer]
+
+        def attempt(dl, buffer, info_dict):
+            is_primary = buffer is fragment_buffer
+            success, error = False, None
+            try:
+                success, _ = dl.download(buffer, info_dict)
+            except _FragmentCancelled:
+                pass
+            except Exception as err:
+                error = err
+            if is_primary and not success and ctx.get('progress'):
+                ctx['progress'].thread_discard()
+            with condition:
+                state['running'] -= 1
+                if is_primary:
+                    state['primary_success'] = success
+                    state['error'] = error
+                if success and not state['winner']:
+                    state['winner'] = buffer, info_dict
+                    # The others are aborted at their next write
+                    for other in buffers:
+                        if other is not buffer:
+                            other.cancel()
+                else:
+                    buffer.close()
+                condition.notify_all()
+
+        def is_done():
+            return state['winner'] or not state['running']
+
+        def hedge():
+            with condition:
+                if is_done():
+                    return
+                self.write_debug(
+                    f'Fragment {ctx["fragment_index"]} is taking longer than {delay:.2f}s; requesting it again')
+                buffer = FragmentBuffer(
+                    self._fragment_memory, os.path.dirname(ctx['tmpfilename']) or None, fragment_buffer.aes_cbc)
+                buffers.append(buffer)
+                state['running'] += 1
+            # Without the progress hooks, so that the fragment is only counted once
+            threading.Thread(target=attempt, daemon=True, args=(
+                HttpQuietDownloader(self.ydl, ctx['dl'].params), buffer, dict(fragment_info_dict))).start()
+
+        call = self._hedges.schedule(delay, hedge)
+        try:
+            attempt(ctx['dl'], fragment_buffer, fragment_info_dict)
+        finally:
+            self._hedges.cancel(call)
+        with condition:
+            # The first request may have failed while the second one is still running
+            condition.wait_for(is_done)
+            winner, error, primary_success = state['winner'], state['error'], state['primary_success']
+
+        if not winner:
+            if error:
+                raise error
+            return False, None, fragment_info_dict
+        buffer, info_dict = winner
+        if not primary_success:
+            size = buffer.tell()
+            ctx['dl']._hook_progress({
+                'status': 'finished',
+                'downloaded_bytes': size,
+                'total_bytes': size,
+                'filename': buffer,
+                'ctx_id': info_dict.get('ctx_id'),
+            }, info_dict)
+        return True, buffer, info_dict
+
     def _read_fragment(self, ctx):
+        if ctx.get('fragment_buffer'):
+            # Not consumed, since the fragment may be read again before it is appended
+            return ctx['fragment_buffer'].getvalue()
         if not ctx.get('fragment_filename_sanitized'):
             return None
         try:
@@ -144,6 +576,13 @@ def _read_fragment(self, ctx):
         down.close()
         return frag_content
 
+    @staticmethod
+    def _discard_fragment(ctx):
+        """Close the buffer of a downloaded fragment that will not be appended"""
+        fragment_buffer = ctx.pop('fragment_buffer', None)
+        if fragment_buffer:
+            fragment_buffer.close()
+
     def _append_fragment(self, ctx, frag_content):
         try:
             ctx['dest_stream'].write(frag_content)
@@ -151,9 +590,10 @@ def _append_fragment(self, ctx, frag_content):
         finally:
             if self.__do_ytdl_file(ctx):
                 self._write_ytdl_file(ctx)
-            if not self.params.get('keep_fragments', False):
-                self.try_remove(encodeFilename(ctx['fragment_filename_sanitized']))
-            del ctx['fragment_filename_sanitized']
+            self._discard_fragment(ctx)
+            fragment_filename = ctx.pop('fragment_filename_sanitized', None)
+            if fragment_filename and not self.params.get('keep_fragments', False):
+                self.try_remove(encodeFilename(fragment_filename))
 
     def _prepare_frag_download(self, ctx):
         if not ctx.setdefault('live', False):
@@ -238,7 +678,7 @@ def _start_frag_download(self, ctx, info_dict):
         }
 
         ctx['started'] = time.time()
-        progress = ProgressCalculator(resume_len)
+        progress = ctx['progress'] = ProgressCalculator(resume_len)
 
         def frag_progress_hook(s):
             if s['status'] not in ('downloading', 'finished'):
@@ -339,29 +779,58 @@ def _prepare_external_frag_download(self, ctx):
             'fragment_index': 0,
         })
 
-    def decrypter(self, info_dict):
-        _key_cache = {}
-
-        def _get_key(url):
-            if url not in _key_cache:
-                _key_cache[url] = self.ydl.urlopen(self._prepare_url(info_dict, url)).read()
-            return _key_cache[url]
+    def _get_aes_key(self, info_dict, url):
+        if url not in self._aes_keys:
+            self._aes_keys[url] = self.ydl.urlopen(self._prepare_url(info_dict, url)).read()
+        return self._aes_keys[url]
+
+    @staticmethod
+    def _aes_key_url(fragment, info_dict):
+        """The URL of the AES-128 key of the fragment, if it still has to be downloaded"""
+        decrypt_info = fragment.get('decrypt_info')
+        if decrypt_info and decrypt_info['METHOD'] == 'AES-128' and not decrypt_info.get('KEY'):
+            return traverse_obj(info_dict, ('hls_aes', 'uri')) or decrypt_info['URI']
+
+    def _prefetch_aes_keys(self, fragments, info_dict):
+        """Download the distinct AES-128 keys of the fragments at once, before the fragments need them"""
+        urls = {self._aes_key_url(fragment, info_dict) for fragment in fragments if fragment} - {None}
+        urls.difference_update(self._aes_keys)
+        if not urls:
+            return
+        self.write_debug(f'Downloading {len(urls)} decryption keys')
+
+        def fetch(url):
+            try:
+                self._get_aes_key(info_dict, url)
+            except Exception as err:
+                # The fragment that needs the key tries again
+                self.write_debug(f'Unable to prefetch decryption key {url}: {err}')
+
+        max_workers = min(len(urls), self.params.get('concurrent_fragment_downloads', 1))
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+            pool.map(fetch, urls)
+
+    def _aes_key_iv(self, fragment, info_dict):
+        """The (key, iv) to decrypt an AES-128 encrypted fragment with, or None"""
+        decrypt_info = fragment.get('decrypt_info')
+        if not decrypt_info or decrypt_info['METHOD'] != 'AES-128':
+            return None
+        iv = decrypt_info.get('IV') or struct.pack('>8xq', fragment['media_sequence'])
+        decrypt_info['KEY'] = decrypt_info.get('KEY') or self._get_aes_key(
+            info_dict, self._aes_key_url(fragment, info_dict))
+        return decrypt_info['KEY'], iv
 
+    def decrypter(self, info_dict):
         def decrypt_fragment(fragment, frag_content):
             if frag_content is None:
                 return
-            decrypt_info = fragment.get('decrypt_info')
-            if not decrypt_info or decrypt_info['METHOD'] != 'AES-128':
-                return frag_content
-            iv = decrypt_info.get('IV') or struct.pack('>8xq', fragment['media_sequence'])
-            decrypt_info['KEY'] = (decrypt_info.get('KEY')
-                                   or _get_key(traverse_obj(info_dict, ('hls_aes', 'uri')) or decrypt_info['URI']))
+            aes_cbc = self._aes_key_iv(fragment, info_dict)
             # Don't decrypt the content in tests since the data is explicitly truncated and it's not to a valid block
             # size (see https://github.com/ytdl-org/youtube-dl/pull/27660). Tests only care that the correct data downloaded,
             # not what it decrypts to.
-            if self.params.get('test', False):
+            if not aes_cbc or self.params.get('test', False):
                 return frag_content
-            return unpad_pkcs7(aes_cbc_decrypt_bytes(frag_content, decrypt_info['KEY'], iv))
+            return unpad_pkcs7(aes_cbc_decrypt_bytes(frag_content, *aes_cbc))
 
         return decrypt_fragment
 
@@ -460,8 +929,10 @@ def error_callback(err, count, retries):
             for retry in RetryManager(self.params.get('fragment_retries'), error_callback):
                 try:
                     ctx['fragment_count'] = fragment.get('fragment_count')
+                    # The fragment is decrypted while it is downloaded, when it is kept in memory
+                    aes_cbc = not self.params.get('test') and self._aes_key_iv(fragment, info_dict)
                     if not self._download_fragment(
-                            ctx, fragment['url'], info_dict, headers, info_dict.get('request_data')):
+                            ctx, fragment['url'], info_dict, headers, info_dict.get('request_data'), aes_cbc or None):
                         return
                 except (HTTPError, IncompleteRead) as err:
                     retry.error = err
@@ -483,43 +954,71 @@ def append_fragment(frag_content, frag_index, ctx):
 
         decrypt_fragment = self.decrypter(info_dict)
 
+        def read_fragment(fragment, ctx):
+            fragment_buffer = ctx.get('fragment_buffer')
+            if fragment_buffer and fragment_buffer.aes_cbc:
+                return fragment_buffer.getvalue()
+            return decrypt_fragment(fragment, self._read_fragment(ctx))
+
         max_workers = math.ceil(
             self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1))
-        if max_workers > 1:
-            def _download_fragment(fragment):
-                ctx_copy = ctx.copy()
-                download_fragment(fragment, ctx_copy)
-                return fragment, fragment['frag_index'], ctx_copy.get('fragment_filename_sanitized')
-
-            with tpe or concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
-                try:
-                    for fragment, frag_index, frag_filename in pool.map(_download_fragment, fragments):
-                        ctx.update({
-                            'fragment_filename_sanitized': frag_filename,
-                            'fragment_index': frag_index,
-                        })
-                        if not append_fragment(decrypt_fragment(fragment, self._read_fragment(ctx)), frag_index, ctx):
-                            return False
-                except KeyboardInterrupt:
-                    self._finish_multiline_status()
-                    self.report_error(
-                        'Interrupted by user. Waiting for all threads to shutdown...', is_error=False, tb=False)
-                    pool.shutdown(wait=False)
-                    raise
-        else:
-            for fragment in fragments:
-                if not interrupt_trigger[0]:
-                    break
-                try:
-                    download_fragment(fragment, ctx)
-                    result = append_fragment(
-                        decrypt_fragment(fragment, self._read_fragment(ctx)), fragment['frag_index'], ctx)
-                except KeyboardInterrupt:
-                    if info_dict.get('is_live'):
+        try:
+            if max_workers > 1:
+                concurrency = self.params.get('concurrent_fragments_auto') and _AdaptiveConcurrency(
+                    max_workers, lambda: ctx['progress'].downloaded, self.ydl.write_debug)
+
+                def _download_fragment(fragment):
+                    ctx_copy = ctx.copy()
+                    # The previous fragment may not have been appended yet, and must not be returned for this one
+                    ctx_copy.pop('fragment_buffer', None)
+                    ctx_copy.pop('fragment_filename_sanitized', None)
+                    if not concurrency:
+                        download_fragment(fragment, ctx_copy)
+                    else:
+                        concurrency.acquire()
+                        started, failed = time.monotonic(), True
+                        try:
+                            download_fragment(fragment, ctx_copy)
+                            failed = bool(ctx_copy.get('last_error'))
+                        finally:
+                            concurrency.release(time.monotonic() - started, failed)
+                    return {key: ctx_copy.get(key) for key in ('fragment_filename_sanitized', 'fragment_buffer')}
+
+                # A slow fragment only holds back the appends after it, not the downloads
+                window = max_workers * self._FRAGMENT_WINDOW_PER_THREAD
+                with tpe or concurrent.futures.ThreadPoolExecutor(max_workers) as pool, contextlib.closing(
+                        _map_in_order(pool, _download_fragment, fragments, window, self._discard_fragment)) as results:
+                    try:
+                        for fragment, frag_output in results:
+                            frag_index = fragment['frag_index']
+                            ctx.update({
+                                **frag_output,
+                                'fragment_index': frag_index,
+                            })
+                            if not append_fragment(read_fragment(fragment, ctx), frag_index, ctx):
+                                return False
+                    except KeyboardInterrupt:
+                        self._finish_multiline_status()
+                        self.report_error(
+                            'Interrupted by user. Waiting for all threads to shutdown...', is_error=False, tb=False)
+                        pool.shutdown(wait=False)
+                        raise
+            else:
+                for fragment in fragments:
+                    if not interrupt_trigger[0]:
                         break
-                    raise
-                if not result:
-                    return False
+                    try:
+                        download_fragment(fragment, ctx)
+                        result = append_fragment(read_fragment(fragment, ctx), fragment['frag_index'], ctx)
+                    except KeyboardInterrupt:
+                        if info_dict.get('is_live'):
+                            break
+                        raise
+                    if not result:
+                        return False
+        finally:
+            # A fragment that was downloaded, but not appended since the download stopped
+            self._discard_fragment(ctx)
 
         if finish_func is not None:
             ctx['dest_stream'].write(finish_func())
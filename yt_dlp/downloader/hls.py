@@ -282,6 +282,8 @@ def is_ad_fragment_end(s):
             #     fd.add_progress_hook(ph)
             return fd.real_download(filename, info_dict)
 
+        self._prefetch_aes_keys(fragments, info_dict)
+
         if is_webvtt:
             def pack_fragment(frag_content, frag_index):
                 output = io.StringIO()
@@ -1,5 +1,8 @@
+import concurrent.futures
+import json
 import os
 import random
+import threading
 import time
 
 from .common import FileDownloader
@@ -7,10 +10,12 @@
 from ..networking.exceptions import (
     CertificateVerifyError,
     HTTPError,
+    RequestError,
     TransportError,
 )
 from ..utils import (
     ContentTooShortError,
+    DownloadError,
     RetryManager,
     ThrottledDownload,
     XAttrMetadataError,
@@ -18,16 +23,38 @@
     encodeFilename,
     int_or_none,
     parse_http_range,
+    timeconvert,
+    traverse_obj,
     try_call,
     write_xattr,
 )
 from ..utils.networking import HTTPHeaderDict
+from ..utils.progress import ProgressCalculator
 
 
 class HttpFD(FileDownloader):
+    """
+    File Downloader for plain HTTP(S) URLs
+
+    The destination may also be a writable binary stream instead of a filename,
+    in which case the data is written to it as-is and the stream is not closed.
+    To restart a download, the stream is rewound and truncated
+
+    Available options:
+
+    http_connections:   Number of connections to download a file with, each
+                        requesting a different range of it. Only used if the
+                        server supports range requests. Default is 1
+    """
+
+    # Smallest range to give its own connection
+    _MIN_SEGMENT_SIZE = 1024 * 1024
+
     def real_download(self, filename, info_dict):
         url = info_dict['url']
         request_data = info_dict.get('request_data', None)
+        # Media is only read once, and is usually too large to be kept in the response cache
+        request_extensions = {'cache': False, **(info_dict.get('request_extensions') or {})}
 
         class DownloadContext(dict):
             __getattr__ = dict.get
@@ -36,7 +63,10 @@ class DownloadContext(dict):
 
         ctx = DownloadContext()
         ctx.filename = filename
-        ctx.tmpfilename = self.temp_name(filename)
+        to_stream = hasattr(filename, 'write')
+        ctx.tmpfilename = filename if to_stream else self.temp_name(filename)
+        # Streams given by the caller, as well as stdout, are never closed
+        ctx.keep_open = to_stream or ctx.tmpfilename == '-'
         ctx.stream = None
 
         # Disable compression
@@ -48,6 +78,12 @@ class DownloadContext(dict):
             or info_dict.get('downloader_options', {}).get('http_chunk_size')
             or 0)
 
+        if ((self.params.get('http_connections') or 1) > 1 and not ctx.keep_open
+                and not is_test and not request_data and 'Range' not in headers):
+            result = self._download_segmented(filename, ctx.tmpfilename, info_dict, headers, chunk_size)
+            if result is not None:
+                return result
+
         ctx.open_mode = 'wb'
         ctx.resume_len = 0
         ctx.block_size = self.params.get('buffersize', 1024)
@@ -56,7 +92,7 @@ class DownloadContext(dict):
         # parse given Range
         req_start, req_end, _ = parse_http_range(headers.get('Range'))
 
-        if self.params.get('continuedl', True):
+        if not to_stream and self.params.get('continuedl', True):
             # Establish possible resume length
             if os.path.isfile(encodeFilename(ctx.tmpfilename)):
                 ctx.resume_len = os.path.getsize(
@@ -111,7 +147,7 @@ def establish_connection():
             if try_call(lambda: range_end >= ctx.content_len):
                 range_end = ctx.content_len - 1
 
-            request = Request(url, request_data, headers)
+            request = Request(url, request_data, headers, extensions=request_extensions)
             has_range = range_start is not None
             if has_range:
                 request.headers['Range'] = f'bytes={int(range_start)}-{int_or_none(range_end) or ""}'
@@ -152,7 +188,7 @@ def establish_connection():
                     try:
                         # Open the connection again without the range header
                         ctx.data = self.ydl.urlopen(
-                            Request(url, request_data, headers))
+                            Request(url, request_data, headers, extensions=request_extensions))
                         content_length = ctx.data.headers['Content-Length']
                     except HTTPError as err:
                         if err.status < 500 or err.status >= 600:
@@ -169,7 +205,8 @@ def establish_connection():
                             # completely downloaded if the file size differs less than 100 bytes from
                             # the one in the hard drive.
                             self.report_file_already_downloaded(ctx.filename)
-                            self.try_rename(ctx.tmpfilename, ctx.filename)
+                            if not to_stream:
+                                self.try_rename(ctx.tmpfilename, ctx.filename)
                             self._hook_progress({
                                 'filename': ctx.filename,
                                 'status': 'finished',
@@ -194,7 +231,7 @@ def establish_connection():
 
         def close_stream():
             if ctx.stream is not None:
-                if ctx.tmpfilename != '-':
+                if not ctx.keep_open:
                     ctx.stream.close()
                 ctx.stream = None
 
@@ -229,15 +266,16 @@ def download():
 
             byte_counter = 0 + ctx.resume_len
             block_size = ctx.block_size
+            # Blocks are read into the same buffer, which only grows with block_size
+            buffer = bytearray(block_size)
             start = time.time()
 
-            # measure time over whole while-loop, so slow_down() and best_block_size() work together properly
-            now = None  # needed for slow_down() in the first loop run
+            # measure time over whole while-loop, so throttle() and best_block_size() work together properly
             before = start  # start measuring
 
             def retry(e):
                 close_stream()
-                if ctx.tmpfilename == '-':
+                if ctx.keep_open:
                     ctx.resume_len = byte_counter
                 else:
                     try:
@@ -247,11 +285,15 @@ def retry(e):
                 raise RetryDownload(e)
 
             while True:
+                if len(buffer) < block_size:
+                    buffer = bytearray(block_size)
                 try:
                     # Download and write
-                    data_block = ctx.data.read(block_size if not is_test else min(block_size, data_len - byte_counter))
+                    read_size = ctx.data.readinto(memoryview(buffer)[
+                        :block_size if not is_test else min(block_size, data_len - byte_counter)])
                 except TransportError as err:
                     retry(err)
+                data_block = memoryview(buffer)[:read_size]
 
                 byte_counter += len(data_block)
 
@@ -260,7 +302,13 @@ def retry(e):
                     break
 
                 # Open destination file just in time
-                if ctx.stream is None:
+                if ctx.stream is None and to_stream:
+                    ctx.stream = filename
+                    if ctx.open_mode == 'wb' and ctx.stream.tell():
+                        # The server does not support resuming; start over
+                        ctx.stream.seek(0)
+                        ctx.stream.truncate()
+                elif ctx.stream is None:
                     try:
                         ctx.stream, ctx.tmpfilename = self.sanitize_open(
                             ctx.tmpfilename, ctx.open_mode)
@@ -285,7 +333,7 @@ def retry(e):
                     return False
 
                 # Apply rate limit
-                self.slow_down(start, now, byte_counter - ctx.resume_len)
+                self.throttle(len(data_block), url)
 
                 # end measuring of one loop run
                 now = time.time()
@@ -325,7 +373,7 @@ def retry(e):
                     if ctx.throttle_start is None:
                         ctx.throttle_start = now
                     elif now - ctx.throttle_start > 3:
-                        if ctx.stream is not None and ctx.tmpfilename != '-':
+                        if ctx.stream is not None and not ctx.keep_open:
                             ctx.stream.close()
                         raise ThrottledDownload
                 elif speed:
@@ -340,18 +388,24 @@ def retry(e):
                 ctx.resume_len = byte_counter
                 raise NextFragment
 
-            if ctx.tmpfilename != '-':
+            if not ctx.keep_open:
                 ctx.stream.close()
 
             if data_len is not None and byte_counter != data_len:
                 err = ContentTooShortError(byte_counter, int(data_len))
                 retry(err)
 
-            self.try_rename(ctx.tmpfilename, ctx.filename)
+            if not to_stream:
+                self.try_rename(ctx.tmpfilename, ctx.filename)
 
             # Update file modification time
             if self.params.get('updatetime', True):
-                info_dict['filetime'] = self.try_utime(ctx.filename, ctx.data.headers.get('last-modified', None))
+                last_modified = ctx.data.headers.get('last-modified', None)
+                if to_stream:
+                    # There is no file to update, but the caller may still use the time
+                    info_dict['filetime'] = timeconvert(last_modified) if last_modified else None
+                else:
+                    info_dict['filetime'] = self.try_utime(ctx.filename, last_modified)
 
             self._hook_progress({
                 'downloaded_bytes': byte_counter,
@@ -381,3 +435,202 @@ def retry(e):
                 close_stream()
                 raise
         return False
+
+    def _probe_ranges(self, url, headers):
+        """Return the response to a one byte range request, if the server supports range requests"""
+        request = Request(url, None, headers)
+        request.headers['Range'] = 'bytes=0-0'
+        try:
+            with self.ydl.urlopen(request) as response:
+                if response.status != 206 or response.headers.get('Content-Encoding'):
+                    return None
+                return response
+        except RequestError:
+            # Let the normal download report the error
+            return None
+
+    def _read_segments(self, filename, tmpfilename, filesize):
+        """
+        Load the state of an interrupted segmented download from the .ytdl file
+
+        @returns the segments to resume, [] to start over, or None if the
+                 partial file can only be resumed over a single connection
+        """
+        if not self.params.get('continuedl', True) or not os.path.isfile(encodeFilename(tmpfilename)):
+            return []
+        try:
+            with open(encodeFilename(self.ytdl_filename(filename)), encoding='utf-8') as f:
+                state = traverse_obj(json.load(f), ('downloader', 'http_segments', {dict}))
+        except (OSError, ValueError):
+            state = None
+        if not state:
+            # A file of the full size is a preallocated one whose state was lost, not a finished download
+            if os.path.getsize(encodeFilename(tmpfilename)) == filesize:
+                self.report_unable_to_resume()
+                return []
+            return None
+        elif state.get('filesize') != filesize or os.path.getsize(encodeFilename(tmpfilename)) != filesize:
+            self.report_unable_to_resume()
+            return []
+        return state['segments']
+
+    def _write_segments(self, filename, filesize, segments):
+        stream, _ = self.sanitize_open(self.ytdl_filename(filename), 'w')
+        try:
+            stream.write(json.dumps({
+                'downloader': {'http_segments': {'filesize': filesize, 'segments': segments}},
+            }))
+        finally:
+            stream.close()
+
+    def _download_segmented(self, filename, tmpfilename, info_dict, headers, chunk_size):
+        """
+        Download the file over several connections, each writing its own range
+        of a preallocated file. The progress is kept in the .ytdl file
+
+        @returns None if the file cannot be downloaded this way
+        """
+        url = info_dict['url']
+        response = self._probe_ranges(url, headers)
+        filesize = response and parse_http_range(response.headers.get('Content-Range'))[2]
+        if not filesize or filesize < 2 * self._MIN_SEGMENT_SIZE:
+            return None
+
+        min_filesize, max_filesize = self.params.get('min_filesize'), self.params.get('max_filesize')
+        if min_filesize is not None and filesize < min_filesize:
+            self.to_screen(
+                f'\r[download] File is smaller than min-filesize ({filesize} bytes < {min_filesize} bytes). Aborting.')
+            return False
+        if max_filesize is not None and filesize > max_filesize:
+            self.to_screen(
+                f'\r[download] File is larger than max-filesize ({filesize} bytes > {max_filesize} bytes). Aborting.')
+            return False
+
+        segments = self._read_segments(filename, tmpfilename, filesize)
+        if segments is None:
+            return None
+        elif segments:
+            resume_len = sum(segment['downloaded'] for segment in segments)
+            self.report_resuming_byte(resume_len)
+        else:
+            resume_len = 0
+            count = min(self.params['http_connections'], filesize // self._MIN_SEGMENT_SIZE)
+            bounds = [filesize * i // count for i in range(count + 1)]
+            segments = [{'start': start, 'end': end - 1, 'downloaded': 0} for start, end in zip(bounds, bounds[1:])]
+            # Before the file is preallocated, so that it is never mistaken for a complete one
+            self._write_segments(filename, filesize, segments)
+            try:
+                stream, tmpfilename = self.sanitize_open(tmpfilename, 'wb')
+                with stream:
+                    stream.truncate(filesize)
+            except OSError as err:
+                self.report_error(f'unable to open for writing: {err}')
+                return False
+        self.report_destination(filename)
+        if self.params.get('xattr_set_filesize', False):
+            try:
+                write_xattr(tmpfilename, 'user.ytdl.filesize', str(filesize).encode())
+            except (XAttrUnavailableError, XAttrMetadataError) as err:
+                self.report_error(f'unable to set filesize xattr: {err}')
+
+        start_time = time.time()
+        progress = ProgressCalculator(resume_len)
+        progress.total = filesize
+        progress_lock = threading.Lock()
+        stop = threading.Event()
+
+        def report_progress(downloaded):
+            progress.update(downloaded)
+            with progress_lock:
+                self._hook_progress({
+                    'status': 'downloading',
+                    'downloaded_bytes': progress.downloaded,
+                    'total_bytes': filesize,
+                    'tmpfilename': tmpfilename,
+                    'filename': filename,
+                    'eta': progress.eta.smooth,
+                    'speed': progress.speed.smooth,
+                    'elapsed': progress.elapsed,
+                    'ctx_id': info_dict.get('ctx_id'),
+                }, info_dict)
+
+        def download_range(segment, stream, resume_len):
+            position = segment['start'] + segment['downloaded']
+            range_end = segment['end']
+            if chunk_size:
+                range_end = min(range_end, position + random.randint(int(chunk_size * 0.95), chunk_size) - 1)
+            request = Request(url, None, headers)
+            request.headers['Range'] = f'bytes={position}-{range_end}'
+            with self.ydl.urlopen(request) as response:
+                if parse_http_range(response.headers.get('Content-Range'))[0] != position:
+                    raise DownloadError(f'Server did not return the requested range {position}-{range_end}')
+                stream.seek(position)
+                block_size = self.params.get('buffersize', 1024)
+                buffer = bytearray(block_size)
+                before = time.time()
+                while position <= range_end and not stop.is_set():
+                    if len(buffer) < block_size:
+                        buffer = bytearray(block_size)
+                    data_block = memoryview(buffer)[
+                        :response.readinto(memoryview(buffer)[:min(block_size, range_end + 1 - position)])]
+                    if not data_block:
+                        raise ContentTooShortError(position - segment['start'], range_end + 1 - segment['start'])
+                    stream.write(data_block)
+                    stream.flush()
+                    # Only count the data once it is in the file, since the state is saved concurrently
+                    segment['downloaded'] += len(data_block)
+                    position += len(data_block)
+                    # From the segment, so that the data of a failed attempt is still counted on retry
+                    report_progress(segment['downloaded'] - resume_len)
+                    self.throttle(len(data_block), url)
+                    after = time.time()
+                    if not self.params.get('noresizebuffer', False):
+                        block_size = self.best_block_size(after - before, len(data_block))
+                    before = after
+
+        def download_segment(segment):
+            resume_len = segment['downloaded']
+            with open(encodeFilename(tmpfilename), 'r+b') as stream:
+                for retry in RetryManager(self.params.get('retries'), self.report_retry):
+                    try:
+                        while not stop.is_set() and segment['downloaded'] < segment['end'] + 1 - segment['start']:
+                            download_range(segment, stream, resume_len)
+                    except HTTPError as err:
+                        if err.status < 500 or err.status >= 600:
+                            raise
+                        retry.error = err
+                    except (TransportError, ContentTooShortError) as err:
+                        if isinstance(err, CertificateVerifyError):
+                            raise
+                        retry.error = err
+
+        pool = concurrent.futures.ThreadPoolExecutor(len(segments))
+        try:
+            futures = [pool.submit(download_segment, segment) for segment in segments]
+            while futures:
+                done, futures = concurrent.futures.wait(
+                    futures, timeout=1, return_when=concurrent.futures.FIRST_EXCEPTION)
+                self._write_segments(filename, filesize, segments)
+                for future in done:
+                    future.result()
+        finally:
+            stop.set()
+            pool.shutdown(wait=True)
+            self._write_segments(filename, filesize, segments)
+
+        if sum(segment['downloaded'] for segment in segments) != filesize:
+            return False
+        self.try_remove(self.ytdl_filename(filename))
+        self.try_rename(tmpfilename, filename)
+        if self.params.get('updatetime', True):
+            info_dict['filetime'] = self.try_utime(filename, response.headers.get('last-modified', None))
+
+        self._hook_progress({
+            'downloaded_bytes': filesize,
+            'total_bytes': filesize,
+            'filename': filename,
+            'status': 'finished',
+            'elapsed': time.time() - start_time,
+            'ctx_id': info_dict.get('ctx_id'),
+        }, info_dict)
+        return True
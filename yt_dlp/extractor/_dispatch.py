@@ -0,0 +1,364 @@
+"""Index of extractors by URL host, used to avoid trying every _VALID_URL
+
+For each extractor, ie_host_keys derives the literal host suffixes that any URL
+matched by its _VALID_URL must end with. Given a URL, only the extractors whose
+suffixes match its host need to be checked, in addition to those for which no
+suffixes could be derived. The derivation is conservative, so that the extractor
+chosen for a URL is always the same as when trying every extractor in order.
+"""
+import functools
+import heapq
+import re
+import sys
+
+try:
+    from re import _constants as sre_constants  # noqa: ICN003
+    from re import _parser as sre_parse  # noqa: ICN003
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+from ..utils import NO_DEFAULT, variadic
+
+_MAX_ALTERNATIVES = 256
+_MAX_CLASS_EXPANSION = 4
+
+
+class _Wildcard:
+    """A part of the pattern that is not a fixed string"""
+
+    def __init__(self, slash):
+        self.slash = slash  # Whether it can match "/"
+
+
+_END = object()
+_SLASH_WILDCARD = _Wildcard(True)
+_NO_SLASH_WILDCARD = _Wildcard(False)
+
+_NOT_SLASH_CATEGORIES = {
+    sre_constants.CATEGORY_DIGIT, sre_constants.CATEGORY_WORD, sre_constants.CATEGORY_SPACE,
+    sre_constants.CATEGORY_LINEBREAK,
+}
+_END_ATS = {sre_constants.AT_END, sre_constants.AT_END_STRING}
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, 'POSSESSIVE_REPEAT', None)}
+_GROUPS = {sre_constants.SUBPATTERN, getattr(sre_constants, 'ATOMIC_GROUP', None)}
+
+
+def _class_matches_slash(items):
+    slash, negate = ord('/'), False
+    for op, av in items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL and av == slash:
+            return not negate
+        elif op is sre_constants.RANGE and av[0] <= slash <= av[1]:
+            return not negate
+        elif op is sre_constants.CATEGORY and av not in _NOT_SLASH_CATEGORIES:
+            return not negate
+        elif op not in (sre_constants.LITERAL, sre_constants.RANGE, sre_constants.CATEGORY):
+            return True
+    return negate
+
+
+def _may_match_slash(op, av):
+    if op is sre_constants.LITERAL:
+        return av == ord('/')
+    elif op is sre_constants.NOT_LITERAL:
+        return av != ord('/')
+    elif op is sre_constants.IN:
+        return _class_matches_slash(av)
+    elif op is sre_constants.CATEGORY:
+        return av not in _NOT_SLASH_CATEGORIES
+    elif op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return False
+    elif op in _REPEATS:
+        return any(_may_match_slash(*item) for item in av[2])
+    elif op in _GROUPS:
+        return any(_may_match_slash(*item) for item in av[-1])
+    elif op is sre_constants.BRANCH:
+        return any(_may_match_slash(*item) for branch in av[1] for item in branch)
+    return True
+
+
+def _is_complete(tokens):
+    """Whether the tokens extend past the host, so that further expansion is not needed"""
+    slashes = 0
+    for i, token in enumerate(tokens):
+        if token is _END or (isinstance(token, _Wildcard) and token.slash):
+            return True
+        elif token == '/':
+            slashes += 1
+            if slashes == 1 and i + 1 < len(tokens) and tokens[i + 1] != '/':
+                return True
+            elif slashes == 3:
+                return True
+    return False
+
+
+def _expand(items, top=False):
+    """Expand the parsed pattern into a list of alternative token tuples, or None if there are too many
+
+    @param top  Whether the items are the whole pattern. Alternatives are then
+                only expanded as far as needed to determine the host
+    """
+    is_complete = _is_complete if top else lambda _: False
+    alternatives = [()]
+    for op, av in items:
+        if all(map(is_complete, alternatives)):
+            break
+        item_alternatives = _expand_item(op, av)
+        if item_alternatives is None:
+            item_alternatives = [(_SLASH_WILDCARD if _may_match_slash(op, av) else _NO_SLASH_WILDCARD, )]
+        alternatives = list(dict.fromkeys(
+            alt if is_complete(alt) else alt + item_alt
+            for alt in alternatives for item_alt in item_alternatives))
+        if len(alternatives) > _MAX_ALTERNATIVES:
+            return None
+    return alternatives
+
+
+def _expand_item(op, av):
+    if op is sre_constants.LITERAL:
+        return [(chr(av).lower(), )]
+    elif op is sre_constants.IN:
+        if (len(av) <= _MAX_CLASS_EXPANSION
+                and all(item_op is sre_constants.LITERAL for item_op, _ in av)):
+            return [(chr(char).lower(), ) for _, char in av]
+    elif op is sre_constants.AT:
+        return [(_END, )] if av in _END_ATS else [()]
+    elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        return [()]
+    elif op in _GROUPS:
+        return _expand(av[-1])
+    elif op is sre_constants.BRANCH:
+        alternatives = []
+        for branch in av[1]:
+            branch_alternatives = _expand(branch)
+            if branch_alternatives is None:
+                return None
+            alternatives.extend(branch_alternatives)
+        return alternatives
+    elif op in _REPEATS and av[:2] == (0, 1):
+        alternatives = _expand(av[2])
+        return alternatives and [(), *alternatives]
+    return None
+
+
+def _host_region(tokens, start):
+    for i in range(start, len(tokens)):
+        token = tokens[i]
+        if token == '/' or token is _END:
+            return tokens[start:i], i
+        elif isinstance(token, _Wildcard) and token.slash:
+            return None
+    return None  # The pattern ends here, but the URL may continue
+
+
+def _host_key(tokens):
+    region = _host_region(tokens, 0)
+    if region is None:
+        return None
+    host, end = region
+    if tokens[end] == '/':
+        if end + 1 == len(tokens) or isinstance(tokens[end + 1], _Wildcard):
+            return None
+        elif tokens[end + 1] == '/':
+            region = _host_region(tokens, end + 2)
+            if region is None:
+                return None
+            kind, (host, _) = 'netloc', region
+        else:
+            kind = 'start'
+    else:
+        kind = 'start'
+
+    suffix = []
+    for token in reversed(host):
+        if not isinstance(token, str):
+            break
+        suffix.append(token)
+    return (kind, ''.join(reversed(suffix))) if suffix else None
+
+
+def pattern_host_keys(pattern):
+    """Return the (kind, suffix) keys of which URLs matching the pattern must have one, or None"""
+    try:
+        alternatives = _expand(sre_parse.parse(pattern), top=True)
+    except Exception:
+        return None
+    if not alternatives:
+        return None
+    keys = set()
+    for alternative in alternatives:
+        key = _host_key(alternative)
+        if key is None:
+            return None
+        keys.add(key)
+    return tuple(sorted(keys))
+
+
+def url_host_keys(url):
+    """Return the (kind, suffix) keys that the URL could match, or None if the URL cannot be indexed"""
+    if not url.isascii():
+        return None
+    url = url.lower()
+    slash = url.find('/')
+    if slash == -1:
+        kind, host = 'start', url
+    elif url[slash + 1:slash + 2] == '/':
+        host_end = url.find('/', slash + 2)
+        kind, host = 'netloc', url[slash + 2:host_end if host_end != -1 else None]
+    else:
+        kind, host = 'start', url[:slash]
+    keys = [(kind, host[i:]) for i in range(len(host))]
+    if host.endswith('\n'):  # "$" also matches before a trailing newline
+        keys.extend((kind, host[i:-1]) for i in range(len(host) - 1))
+    return keys
+
+
+def ie_host_keys(ie, default_suitable):
+    """Return the host keys of an extractor class, or None if every URL must be checked with it"""
+    keys = ie.__dict__.get('_URL_HOST_KEYS', NO_DEFAULT)
+    if keys is not NO_DEFAULT:
+        return keys
+    if getattr(ie.suitable, '__func__', None) not in default_suitable:
+        return None
+    elif ie._VALID_URL is False:
+        return ()
+    keys = set()
+    for pattern in variadic(ie._VALID_URL):
+        pattern_keys = pattern_host_keys(pattern)
+        if pattern_keys is None:
+            return None
+        keys.update(pattern_keys)
+    return tuple(sorted(keys))
+
+
+def default_suitable_funcs():
+    """The implementations of suitable that only match _VALID_URL"""
+    from .common import InfoExtractor
+
+    funcs = {InfoExtractor.suitable.__func__}
+    lazy_extractors = sys.modules.get(f'{__package__}.lazy_extractors')
+    if lazy_extractors:
+        funcs.add(lazy_extractors.LazyLoadExtractor.suitable.__func__)
+    return funcs
+
+
+def _combinable_pattern(pattern):
+    """Convert a pattern into one that can be used as a part of an alternation
+
+    Returns the converted pattern and its number of groups, or None.
+    Checks are done on the source so that only the original pattern, which
+    suitable compiles anyway, needs to be compiled here
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error:
+        return None
+    if re.search(r'\\[1-9]|\(\?P=|\(\?\(', pattern):  # backreferences
+        return None
+    named_groups = re.compile(r'(?<!\\)\(\?P<\w+>')
+    if len(named_groups.findall(pattern)) != len(compiled.groupindex):
+        return None
+    flags = ''
+    while mobj := re.match(r'\(\?([aiLmsux]+)\)', pattern):
+        flags += mobj.group(1)
+        pattern = pattern[mobj.end():]
+    pattern = named_groups.sub('(?:', pattern)
+    if flags:
+        pattern = f'(?{flags}:{pattern}{chr(10) if "x" in flags else ""})'
+    return pattern, compiled.groups - len(compiled.groupindex)
+
+
+class URLDispatchIndex:
+    """Find the extractors suitable for a URL in their order of priority
+
+    Deriving the host keys requires parsing every _VALID_URL, which costs more
+    than trying them all once. So unless the keys of all but MAX_UNINDEXED
+    extractors were precomputed by devscripts/make_lazy_extractors.py, the
+    index is only built after BUILD_AFTER lookups, and every extractor is
+    tried in order until then
+    """
+
+    BUILD_AFTER = 50
+    MAX_UNINDEXED = 16
+
+    def __init__(self, ies):
+        self._ies = [ie if isinstance(ie, type) else type(ie) for ie in ies.values()]
+        self._keys = list(ies.keys())
+        self._lookups = 0
+        self._built = False
+        if sum('_URL_HOST_KEYS' not in ie.__dict__ for ie in self._ies) <= self.MAX_UNINDEXED:
+            self._build()
+
+    def _build(self):
+        default_suitable = default_suitable_funcs()
+        hosts, always, regex_only = {}, [], []
+        for idx, ie in enumerate(self._ies):
+            host_keys = ie_host_keys(ie, default_suitable)
+            if host_keys is not None:
+                for key in host_keys:
+                    hosts.setdefault(key, []).append(idx)
+            elif getattr(ie.suitable, '__func__', None) in default_suitable:
+                regex_only.append(idx)
+            else:
+                always.append(idx)
+
+        # Extractors whose hosts could not be determined are matched together in one regex
+        patterns, regex_groups, combined, group = [], {}, [], 1
+        for idx in regex_only:
+            converted = list(map(_combinable_pattern, variadic(self._ies[idx]._VALID_URL)))
+            if None in converted:
+                always.append(idx)
+                continue
+            combined.append(idx)
+            for pattern, groups in converted:
+                patterns.append(f'({pattern})')
+                regex_groups[group] = idx
+                group += groups + 1
+
+        # Lookups may be running in other threads, so only publish the finished index
+        self._hosts, self._always, self._regex_only = hosts, sorted(always), combined
+        self._regex_groups, self._combined_patterns, self._combined_groups = regex_groups, patterns, group - 1
+        self._built = True
+
+    @functools.cached_property
+    def _combined_regex(self):
+        if not self._combined_patterns:
+            return None
+        try:
+            regex = re.compile('|'.join(self._combined_patterns))
+        except re.error:
+            regex = None
+        if not regex or regex.groups != self._combined_groups:
+            # Should not happen; fall back to checking these extractors for every URL
+            self._always = sorted((*self._always, *self._regex_only))
+            self._regex_only = []
+            return None
+        return regex
+
+    def _candidates(self, url):
+        if not self._built:
+            self._lookups += 1
+            if self._lookups <= self.BUILD_AFTER:
+                return range(len(self._ies))
+            self._build()
+        host_keys = url_host_keys(url)
+        if host_keys is None:
+            return range(len(self._ies))
+        candidates = {idx for key in host_keys for idx in self._hosts.get(key, ())}
+        regex = self._combined_regex
+        mobj = regex and regex.match(url)
+        if not mobj:
+            return heapq.merge(sorted(candidates), self._always)
+        first = self._regex_groups[mobj.lastindex]
+        candidates.add(first)
+        return heapq.merge(
+            sorted(candidates), self._always, (idx for idx in self._regex_only if idx > first))
+
+    def suitable_keys(self, url):
+        """Yield the keys of the extractors that can handle the URL, in order of priority"""
+        for idx in self._candidates(url):
+            if self._ies[idx].suitable(url):
+                yield self._keys[idx]
@@ -555,6 +555,9 @@ class InfoExtractor:
 
     The _WORKING attribute should be set to False for broken IEs
     in order to warn the users and skip the tests.
+
+    The _HTTP_CACHE attribute may be set to True or False to always or never
+    reuse cached responses for the requests of an IE, regardless of http_cache.
     """
 
     _ready = False
@@ -566,6 +569,7 @@ class InfoExtractor:
     _WORKING = True
     _ENABLED = True
     _NETRC_MACHINE = None
+    _HTTP_CACHE = None
     IE_DESC = None
     SEARCH_KEY = None
     _VALID_URL = None
@@ -871,6 +875,8 @@ def _request_webpage(self, url_or_request, video_id, note=None, errnote=None, fa
             headers.setdefault('X-Forwarded-For', self._x_forwarded_for_ip)
 
         extensions = {}
+        if self._HTTP_CACHE is not None:
+            extensions['cache'] = self._HTTP_CACHE
 
         if impersonate in (True, ''):
             impersonate = ImpersonateTarget()
@@ -1,6 +1,7 @@
 import base64
 import calendar
 import collections
+import contextlib
 import copy
 import datetime as dt
 import enum
@@ -1454,6 +1455,8 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
         r'/(?P<id>[a-zA-Z0-9_-]{8,})/player(?:_ias\.vflset(?:/[a-zA-Z]{2,3}_[a-zA-Z]{2,3})?|-plasma-ias-(?:phone|tablet)-[a-z]{2}_[A-Z]{2}\.vflset)/base\.js$',
         r'\b(?P<id>vfl[a-zA-Z0-9_-]+)\b.*?\.js$',
     )
+    # Maximum number of n values of a player whose results are kept in the filesystem cache
+    _NSIG_CACHE_SIZE = 1000
     _formats = {  # NB: Used in YoutubeWebArchiveIE and GoogleDriveIE
         '5': {'ext': 'flv', 'width': 400, 'height': 240, 'acodec': 'mp3', 'abr': 64, 'vcodec': 'h263'},
         '6': {'ext': 'flv', 'width': 450, 'height': 270, 'acodec': 'mp3', 'abr': 64, 'vcodec': 'h263'},
@@ -3061,6 +3064,7 @@ def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._code_cache = {}
         self._player_cache = {}
+        self._nsig_results = {}
 
     def _prepare_live_from_start_formats(self, formats, video_id, live_start_time, url, webpage_url, smuggled_data, is_live):
         lock = threading.Lock()
@@ -3405,6 +3409,45 @@ def _decrypt_nsig(self, s, video_id, player_url):
         self.write_debug(f'Decrypted nsig {s} => {ret}')
         return ret
 
+    def _decrypt_nsig_batch(self, n_values, video_id, player_url):
+        """
+        Decrypt all the given n fields at once, returning a dict of n => result
+
+        The results are kept in the filesystem cache per player, so that
+        later runs do not need to evaluate the nsig function for them again.
+        Raises the error of the first n that could not be decrypted
+        """
+        if player_url is None:
+            raise ExtractorError('Cannot decrypt nsig without player_url')
+        player_id = self._extract_player_info(urljoin('https://www.youtube.com', player_url))
+        results = self._nsig_results.get(player_id)
+        if results is None:
+            results = self._nsig_results[player_id] = self.cache.load('youtube-nsig-results', player_id) or {}
+
+        ret, decrypted, error = {}, {}, None
+        for n in orderedSet(n_values):
+            if n in results:
+                ret[n] = results[n]
+                # Also used by _extract_formats_and_subtitles
+                self._player_cache.setdefault(('nsig', n), ret[n])
+                continue
+            try:
+                ret[n] = decrypted[n] = self._cached(self._decrypt_nsig, 'nsig', n)(n, video_id, player_url)
+            except ExtractorError as e:
+                error = e
+                break
+
+        if decrypted:
+            self.write_debug(f'Caching {len(decrypted)} nsig results of player {player_id}')
+            # Other processes may have added results since they were loaded
+            results.update({**(self.cache.load('youtube-nsig-results', player_id) or {}), **results, **decrypted})
+            for n in list(results)[:-self._NSIG_CACHE_SIZE]:
+                del results[n]
+            self.cache.store('youtube-nsig-results', player_id, results)
+        if error:
+            raise error
+        return ret
+
     def _extract_n_function_name(self, jscode, player_url=None):
         # Examples (with placeholders nfunc, narray, idx):
         # *  .get("n"))&&(b=nfunc(b)
@@ -4224,6 +4267,13 @@ def build_fragments(f):
                 }),
             } for range_start in range(0, f['filesize'], CHUNK_SIZE))
 
+        if player_url:
+            # The errors are reported for each format below
+            with contextlib.suppress(ExtractorError):
+                self._decrypt_nsig_batch(traverse_obj(streaming_formats, (
+                    ..., (('url', {str}), ('signatureCipher', {urllib.parse.parse_qs}, 'url', 0)),
+                    {parse_qs}, 'n', 0)), video_id, player_url)
+
         for fmt in streaming_formats:
             if fmt.get('targetDurationSec'):
                 continue
@@ -0,0 +1,105 @@
+"""Measure the time spent importing each module (--profile-startup, YT_DLP_PROFILE_STARTUP)
+
+This module must only import from the standard library, since it is
+installed before the rest of yt-dlp is imported
+"""
+import atexit
+import sys
+import threading
+import time
+
+
+class _TimedLoader:
+    def __init__(self, profiler, loader):
+        self._profiler = profiler
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hide the wrapper from the module, e.g. for `isinstance(__loader__, zipimporter)`
+        module.__loader__ = module.__spec__.loader = self._loader
+        with self._profiler._measure(module.__name__):
+            self._loader.exec_module(module)
+
+
+class _Measurement:
+    def __init__(self, profiler, name):
+        self._profiler = profiler
+        self._name = name
+        self.children = 0
+
+    def __enter__(self):
+        local = self._profiler._local
+        self._parent = getattr(local, 'current', None)
+        local.current = self
+        self._start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self._start
+        self._profiler._local.current = self._parent
+        if self._parent:
+            self._parent.children += elapsed
+        else:
+            self._profiler.total += elapsed
+        self._profiler.timings[self._name] = (elapsed - self.children, elapsed)
+
+
+class ImportProfiler:
+    """A meta path finder that records the time taken by each module import
+
+    The timings are similar to those of `python -X importtime`:
+    the cumulative time of a module includes the imports made while executing it
+    """
+
+    active = None  # The installed profiler
+
+    def __init__(self):
+        self.timings = {}  # name: (self time, cumulative time)
+        self.total = 0  # Excluding the time spent in nested imports
+        self._local = threading.local()
+        self._started = time.perf_counter()
+
+    @classmethod
+    def install(cls, report_at_exit=True):
+        profiler = ImportProfiler.active = cls()
+        sys.meta_path.insert(0, profiler)
+        if report_at_exit:
+            atexit.register(lambda: sys.stderr.write(profiler.report()))
+        return profiler
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+        if ImportProfiler.active is self:
+            ImportProfiler.active = None
+
+    def find_spec(self, fullname, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(self, spec.loader)
+                return spec
+        return None
+
+    def _measure(self, name):
+        return _Measurement(self, name)
+
+    def report(self, limit=30):
+        """Return a table of the slowest imports, by cumulative time"""
+        lines = [
+            (f'[debug] Spent {self.total:.3f}s importing {len(self.timings)} modules '
+             f'in the first {time.perf_counter() - self._started:.3f}s. Slowest imports:'),
+            f'[debug] {"self (ms)":>10} | {"cumulative (ms)":>15} | module',
+        ]
+        slowest = sorted(self.timings.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (self_time, cumulative) in slowest[:limit]:
+            lines.append(f'[debug] {self_time * 1000:10.1f} | {cumulative * 1000:15.1f} | {name}')
+        return '\n'.join(lines) + '\n'
@@ -1,5 +1,6 @@
 import collections
 import contextlib
+import copy
 import itertools
 import json
 import math
@@ -134,6 +135,27 @@ def _js_ternary(cndn, if_true=True, if_false=False):
 _MATCHING_PARENS = dict(zip(*zip('()', '{}', '[]')))
 _QUOTES = '\'"/'
 
+_OPERATION_RE = re.compile(fr'''(?x)
+    (?P<assign>
+        (?P<out>{_NAME_RE})(?:\[(?P<index>[^\]]+?)\])?\s*
+        (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
+        =(?!=)(?P<expr>.*)$
+    )|(?P<return>
+        (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
+    )|(?P<indexing>
+        (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
+    )|(?P<attribute>
+        (?P<var>{_NAME_RE})(?:(?P<nullish>\?)?\.(?P<member>[^(]+)|\[(?P<member2>[^\]]+)\])\s*
+    )|(?P<function>
+        (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
+    )''')
+
+_BUILTIN_TYPES = {
+    'String': str,
+    'Math': float,
+    'Array': list,
+}
+
 
 class JS_Undefined:
     pass
@@ -215,6 +237,8 @@ class JSInterpreter:
     def __init__(self, code, objects=None):
         self.code, self._functions = code, {}
         self._objects = {} if objects is None else objects
+        # Functions compiled from the code, see _compile
+        self._compiled = {}
 
     class Exception(ExtractorError):  # noqa: A001
         def __init__(self, msg, expr=None, *args, **kwargs):
@@ -222,9 +246,12 @@ def __init__(self, msg, expr=None, *args, **kwargs):
                 msg = f'{msg.rstrip()} in: {truncate_string(expr, 50, 50)}'
             super().__init__(msg, *args, **kwargs)
 
-    def _named_object(self, namespace, obj):
+    def _new_name(self):
         self.__named_object_counter += 1
-        name = f'__yt_dlp_jsinterp_obj{self.__named_object_counter}'
+        return f'__yt_dlp_jsinterp_obj{self.__named_object_counter}'
+
+    def _named_object(self, namespace, obj):
+        name = self._new_name()
         if callable(obj) and not isinstance(obj, function_with_repr):
             obj = function_with_repr(obj, f'F<{self.__named_object_counter}>')
         namespace[name] = obj
@@ -297,7 +324,7 @@ def _operator(self, op, left_val, right_expr, expr, local_vars, allow_recursion)
             if left_val not in (None, JS_Undefined):
                 return left_val
         elif op == '?':
-            right_expr = _js_ternary(left_val, *self._separate(right_expr, ':', 1))
+            right_expr = _js_ternary(left_val, *self._compile(self._split_ternary, right_expr))
 
         right_val = self.interpret_expression(right_expr, local_vars, allow_recursion)
         if not _OPERATORS.get(op):
@@ -308,6 +335,9 @@ def _operator(self, op, left_val, right_expr, expr, local_vars, allow_recursion)
         except Exception as e:
             raise self.Exception(f'Failed to evaluate {left_val!r} {op} {right_val!r}', expr, cause=e)
 
+    def _split_ternary(self, expr):
+        return tuple(self._separate(expr, ':', 1))
+
     def _index(self, obj, idx, allow_undefined=False):
         if idx == 'length':
             return len(obj)
@@ -318,35 +348,77 @@ def _index(self, obj, idx, allow_undefined=False):
                 return JS_Undefined
             raise self.Exception(f'Cannot get index {idx}', repr(obj), cause=e)
 
-    def _dump(self, obj, namespace):
+    @staticmethod
+    def _copy(obj):
+        """Copies the value like dumping it to JSON and interpreting that would, if it can be dumped"""
         try:
-            return json.dumps(obj)
+            return json.loads(json.dumps(obj))
         except TypeError:
-            return self._named_object(namespace, obj)
+            return obj
+
+    def _compile(self, compiler, *args):
+        """Returns the function that `compiler` makes of the source in `args`, which is only parsed once"""
+        key = (compiler.__name__, *args)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = compiler(*args)
+        return compiled
+
+    @staticmethod
+    def _constant(value, should_return):
+        if isinstance(value, (list, dict)):
+            # Every evaluation of a literal makes a new object
+            return lambda local_vars, allow_recursion: (copy.deepcopy(value), should_return)
+        return lambda local_vars, allow_recursion: (value, should_return)
+
+    def _compile_continuation(self, outer, stmt, should_return):
+        """
+        Compiles `outer` as applied to a value that is only known when running it,
+        such as `.length` after `(a+b)`. The value is given to the returned function
+        """
+        if not outer:
+            return lambda value, local_vars, allow_recursion: (value, should_return)
+        name = self._new_name()
+        expr = name + outer
+
+        def run(value, local_vars, allow_recursion):
+            local_vars[name] = value
+            return self._compile(self._compile_expression, expr, stmt, should_return)(local_vars, allow_recursion)
+        return run
 
     @Debugger.wrap_interpreter
     def interpret_statement(self, stmt, local_vars, allow_recursion=100):
         if allow_recursion < 0:
             raise self.Exception('Recursion limit reached')
-        allow_recursion -= 1
+        return self._compile(self._compile_statement, stmt)(local_vars, allow_recursion - 1)
 
-        should_return = False
+    def _compile_statement(self, stmt):
         sub_statements = list(self._separate(stmt, ';')) or ['']
         expr = stmt = sub_statements.pop().strip()
-
-        for sub_stmt in sub_statements:
-            ret, should_return = self.interpret_statement(sub_stmt, local_vars, allow_recursion)
-            if should_return:
-                return ret, should_return
+        should_return, throw = False, False
 
         m = re.match(r'(?P<var>(?:var|const|let)\s)|return(?:\s+|(?=["\'])|$)|(?P<throw>throw\s+)', stmt)
         if m:
             expr = stmt[len(m.group(0)):].strip()
-            if m.group('throw'):
-                raise JS_Throw(self.interpret_expression(expr, local_vars, allow_recursion))
+            throw = bool(m.group('throw'))
             should_return = not m.group('var')
+        if not sub_statements and not throw:
+            return self._compile(self._compile_expression, expr, stmt, should_return)
+
+        def run(local_vars, allow_recursion):
+            for sub_stmt in sub_statements:
+                ret, should_abort = self.interpret_statement(sub_stmt, local_vars, allow_recursion)
+                if should_abort:
+                    return ret, should_abort
+            if throw:
+                raise JS_Throw(self.interpret_expression(expr, local_vars, allow_recursion))
+            # Parsed only once the sub-statements ran, so that errors are raised in the same order
+            return self._compile(self._compile_expression, expr, stmt, should_return)(local_vars, allow_recursion)
+        return run
+
+    def _compile_expression(self, expr, stmt, should_return):
         if not expr:
-            return None, should_return
+            return self._constant(None, should_return)
 
         if expr[0] in _QUOTES:
             inner, outer = self._separate(expr, expr[0], 1)
@@ -358,59 +430,62 @@ def interpret_statement(self, stmt, local_vars, allow_recursion=100):
                 # inner = re.compile(inner[1:].replace('[[', r'[\['), flags=flags)
             else:
                 inner = json.loads(js_to_json(f'{inner}{expr[0]}', strict=True))
-            if not outer:
-                return inner, should_return
-            expr = self._named_object(local_vars, inner) + outer
+            continuation = self._compile_continuation(outer, stmt, should_return)
+            return lambda local_vars, allow_recursion: continuation(inner, local_vars, allow_recursion)
 
         if expr.startswith('new '):
             obj = expr[4:]
-            if obj.startswith('Date('):
-                left, right = self._separate_at_paren(obj[4:])
+            if not obj.startswith('Date('):
+                raise self.Exception(f'Unsupported object {obj}', expr)
+            left, right = self._separate_at_paren(obj[4:])
+            continuation = self._compile_continuation(right, stmt, should_return)
+
+            def new_date(local_vars, allow_recursion):
                 date = unified_timestamp(
                     self.interpret_expression(left, local_vars, allow_recursion), False)
                 if date is None:
                     raise self.Exception(f'Failed to parse date {left!r}', expr)
-                expr = self._dump(int(date * 1000), local_vars) + right
-            else:
-                raise self.Exception(f'Unsupported object {obj}', expr)
+                return continuation(int(date * 1000), local_vars, allow_recursion)
+            return new_date
 
         if expr.startswith('void '):
-            left = self.interpret_expression(expr[5:], local_vars, allow_recursion)
-            return None, should_return
+            def void(local_vars, allow_recursion):
+                self.interpret_expression(expr[5:], local_vars, allow_recursion)
+                return None, should_return
+            return void
 
         if expr.startswith('{'):
             inner, outer = self._separate_at_paren(expr)
             # try for object expression (Map)
             sub_expressions = [list(self._separate(sub_expr.strip(), ':', 1)) for sub_expr in self._separate(inner)]
             if all(len(sub_expr) == 2 for sub_expr in sub_expressions):
-                def dict_item(key, val):
+                def dict_item(key, val, local_vars, allow_recursion):
                     val = self.interpret_expression(val, local_vars, allow_recursion)
                     if re.match(_NAME_RE, key):
                         return key, val
                     return self.interpret_expression(key, local_vars, allow_recursion), val
 
-                return dict(dict_item(k, v) for k, v in sub_expressions), should_return
-
-            inner, should_abort = self.interpret_statement(inner, local_vars, allow_recursion)
-            if not outer or should_abort:
-                return inner, should_abort or should_return
-            else:
-                expr = self._dump(inner, local_vars) + outer
+                return lambda local_vars, allow_recursion: (dict(
+                    dict_item(k, v, local_vars, allow_recursion) for k, v in sub_expressions), should_return)
 
-        if expr.startswith('('):
+        if expr.startswith(('{', '(')):
             inner, outer = self._separate_at_paren(expr)
-            inner, should_abort = self.interpret_statement(inner, local_vars, allow_recursion)
-            if not outer or should_abort:
-                return inner, should_abort or should_return
-            else:
-                expr = self._dump(inner, local_vars) + outer
+            continuation = self._compile_continuation(outer, stmt, should_return)
+
+            def block(local_vars, allow_recursion):
+                ret, should_abort = self.interpret_statement(inner, local_vars, allow_recursion)
+                if not outer or should_abort:
+                    return ret, should_abort or should_return
+                return continuation(self._copy(ret), local_vars, allow_recursion)
+            return block
 
         if expr.startswith('['):
             inner, outer = self._separate_at_paren(expr)
-            name = self._named_object(local_vars, [
+            items = list(self._separate(inner))
+            continuation = self._compile_continuation(outer, stmt, should_return)
+            return lambda local_vars, allow_recursion: continuation([
                 self.interpret_expression(item, local_vars, allow_recursion)
-                for item in self._separate(inner)])
-            expr = name + outer
+                for item in items], local_vars, allow_recursion)
 
         m = re.match(r'''(?x)
                 (?P<try>try)\s*\{|
@@ -418,23 +493,76 @@ def dict_item(key, val):
                 (?P<switch>switch)\s*\(|
                 (?P<for>for)\s*\(
                 ''', expr)
-        md = m.groupdict() if m else {}
-        if md.get('if'):
-            cndn, expr = self._separate_at_paren(expr[m.end() - 1:])
-            if_expr, expr = self._separate_at_paren(expr.lstrip())
-            # TODO: "else if" is not handled
-            else_expr = None
-            m = re.match(r'else\s*{', expr)
-            if m:
-                else_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
-            cndn = _js_ternary(self.interpret_expression(cndn, local_vars, allow_recursion))
-            ret, should_abort = self.interpret_statement(
-                if_expr if cndn else else_expr, local_vars, allow_recursion)
-            if should_abort:
-                return ret, True
+        if m:
+            compiler = getattr(self, f'_compile_{m.lastgroup}')
+            run_block, expr = compiler(expr[m.end() - 1:])
+
+            def run(local_vars, allow_recursion):
+                ret, should_abort = run_block(local_vars, allow_recursion)
+                if should_abort:
+                    return ret, True
+                ret, should_abort = self.interpret_statement(expr, local_vars, allow_recursion)
+                return ret, should_abort or should_return
+            return run
+
+        # Comma separated statements
+        sub_expressions = list(self._separate(expr))
+        if len(sub_expressions) > 1:
+            def comma(local_vars, allow_recursion):
+                for sub_expr in sub_expressions:
+                    ret, should_abort = self.interpret_statement(sub_expr, local_vars, allow_recursion)
+                    if should_abort:
+                        return ret, True
+                return ret, False
+            return comma
 
-        if md.get('try'):
-            try_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+        increments = []
+        for m in reversed(list(re.finditer(rf'''(?x)
+                (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
+                (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''', expr))):
+            name = self._new_name()
+            sign = m.group('pre_sign') or m.group('post_sign')
+            increments.insert(0, (
+                name, m.group('var1') or m.group('var2'), 1 if sign[0] == '+' else -1, bool(m.group('pre_sign'))))
+            start, end = m.span()
+            expr = expr[:start] + name + expr[end:]
+        if increments:
+            def increment(local_vars, allow_recursion):
+                for name, var, step, pre in increments:
+                    ret = local_vars[var]
+                    local_vars[var] += step
+                    local_vars[name] = local_vars[var] if pre else ret
+                return self._compile(self._compile_operation, expr, stmt, should_return)(local_vars, allow_recursion)
+            return increment
+
+        return self._compile_operation(expr, stmt, should_return)
+
+    def _compile_if(self, expr):
+        cndn, expr = self._separate_at_paren(expr)
+        if_expr, expr = self._separate_at_paren(expr.lstrip())
+        # TODO: "else if" is not handled
+        else_expr = None
+        m = re.match(r'else\s*{', expr)
+        if m:
+            else_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+
+        def run(local_vars, allow_recursion):
+            cndn_val = _js_ternary(self.interpret_expression(cndn, local_vars, allow_recursion))
+            return self.interpret_statement(if_expr if cndn_val else else_expr, local_vars, allow_recursion)
+        return run, expr
+
+    def _compile_try(self, expr):
+        try_expr, expr = self._separate_at_paren(expr)
+        catch_expr, err_name, finally_expr = None, None, None
+        m = re.match(fr'catch\s*(?P<err>\(\s*{_NAME_RE}\s*\))?\{{', expr)
+        if m:
+            catch_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+            err_name = m.group('err')
+        m = re.match(r'finally\s*\{', expr)
+        if m:
+            finally_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
+
+        def run(local_vars, allow_recursion):
             err = None
             try:
                 ret, should_abort = self.interpret_statement(try_expr, local_vars, allow_recursion)
@@ -445,20 +573,15 @@ def dict_item(key, val):
                 err = e
 
             pending = (None, False)
-            m = re.match(fr'catch\s*(?P<err>\(\s*{_NAME_RE}\s*\))?\{{', expr)
-            if m:
-                sub_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
-                if err:
-                    catch_vars = {}
-                    if m.group('err'):
-                        catch_vars[m.group('err')] = err.error if isinstance(err, JS_Throw) else err
-                    catch_vars = local_vars.new_child(catch_vars)
-                    err, pending = None, self.interpret_statement(sub_expr, catch_vars, allow_recursion)
-
-            m = re.match(r'finally\s*\{', expr)
-            if m:
-                sub_expr, expr = self._separate_at_paren(expr[m.end() - 1:])
-                ret, should_abort = self.interpret_statement(sub_expr, local_vars, allow_recursion)
+            if catch_expr is not None and err:
+                catch_vars = {}
+                if err_name:
+                    catch_vars[err_name] = err.error if isinstance(err, JS_Throw) else err
+                catch_vars = local_vars.new_child(catch_vars)
+                err, pending = None, self.interpret_statement(catch_expr, catch_vars, allow_recursion)
+
+            if finally_expr is not None:
+                ret, should_abort = self.interpret_statement(finally_expr, local_vars, allow_recursion)
                 if should_abort:
                     return ret, True
 
@@ -468,20 +591,24 @@ def dict_item(key, val):
 
             if err:
                 raise err
-
-        elif md.get('for'):
-            constructor, remaining = self._separate_at_paren(expr[m.end() - 1:])
-            if remaining.startswith('{'):
-                body, expr = self._separate_at_paren(remaining)
+            return None, False
+        return run, expr
+
+    def _compile_for(self, expr):
+        constructor, remaining = self._separate_at_paren(expr)
+        if remaining.startswith('{'):
+            body, expr = self._separate_at_paren(remaining)
+        else:
+            switch_m = re.match(r'switch\s*\(', remaining)  # FIXME: ?
+            if switch_m:
+                switch_val, remaining = self._separate_at_paren(remaining[switch_m.end() - 1:])
+                body, expr = self._separate_at_paren(remaining, '}')
+                body = 'switch(%s){%s}' % (switch_val, body)
             else:
-                switch_m = re.match(r'switch\s*\(', remaining)  # FIXME: ?
-                if switch_m:
-                    switch_val, remaining = self._separate_at_paren(remaining[switch_m.end() - 1:])
-                    body, expr = self._separate_at_paren(remaining, '}')
-                    body = 'switch(%s){%s}' % (switch_val, body)
-                else:
-                    body, expr = remaining, ''
-            start, cndn, increment = self._separate(constructor, ';')
+                body, expr = remaining, ''
+        start, cndn, increment = self._separate(constructor, ';')
+
+        def run(local_vars, allow_recursion):
             self.interpret_expression(start, local_vars, allow_recursion)
             while True:
                 if not _js_ternary(self.interpret_expression(cndn, local_vars, allow_recursion)):
@@ -495,114 +622,93 @@ def dict_item(key, val):
                 except JS_Continue:
                     pass
                 self.interpret_expression(increment, local_vars, allow_recursion)
-
-        elif md.get('switch'):
-            switch_val, remaining = self._separate_at_paren(expr[m.end() - 1:])
-            switch_val = self.interpret_expression(switch_val, local_vars, allow_recursion)
-            body, expr = self._separate_at_paren(remaining, '}')
-            items = body.replace('default:', 'case default:').split('case ')[1:]
+            return None, False
+        return run, expr
+
+    def _compile_switch(self, expr):
+        switch_val, remaining = self._separate_at_paren(expr)
+        body, expr = self._separate_at_paren(remaining, '}')
+        items = [
+            tuple(i.strip() for i in self._separate(item, ':', 1))
+            for item in body.replace('default:', 'case default:').split('case ')[1:]]
+
+        def run(local_vars, allow_recursion):
+            value = self.interpret_expression(switch_val, local_vars, allow_recursion)
             for default in (False, True):
                 matched = False
-                for item in items:
-                    case, stmt = (i.strip() for i in self._separate(item, ':', 1))
+                for case, stmt in items:
                     if default:
                         matched = matched or case == 'default'
                     elif not matched:
                         matched = (case != 'default'
-                                   and switch_val == self.interpret_expression(case, local_vars, allow_recursion))
+                                   and value == self.interpret_expression(case, local_vars, allow_recursion))
                     if not matched:
                         continue
                     try:
                         ret, should_abort = self.interpret_statement(stmt, local_vars, allow_recursion)
                         if should_abort:
-                            return ret
+                            return ret, True
                     except JS_Break:
                         break
                 if matched:
                     break
+            return None, False
+        return run, expr
 
-        if md:
-            ret, should_abort = self.interpret_statement(expr, local_vars, allow_recursion)
-            return ret, should_abort or should_return
-
-        # Comma separated statements
-        sub_expressions = list(self._separate(expr))
-        if len(sub_expressions) > 1:
-            for sub_expr in sub_expressions:
-                ret, should_abort = self.interpret_statement(sub_expr, local_vars, allow_recursion)
-                if should_abort:
-                    return ret, True
-            return ret, False
-
-        for m in re.finditer(rf'''(?x)
-                (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
-                (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''', expr):
-            var = m.group('var1') or m.group('var2')
-            start, end = m.span()
-            sign = m.group('pre_sign') or m.group('post_sign')
-            ret = local_vars[var]
-            local_vars[var] += 1 if sign[0] == '+' else -1
-            if m.group('pre_sign'):
-                ret = local_vars[var]
-            expr = expr[:start] + self._dump(ret, local_vars) + expr[end:]
-
+    def _compile_operation(self, expr, stmt, should_return):
         if not expr:
-            return None, should_return
-
-        m = re.match(fr'''(?x)
-            (?P<assign>
-                (?P<out>{_NAME_RE})(?:\[(?P<index>[^\]]+?)\])?\s*
-                (?P<op>{"|".join(map(re.escape, set(_OPERATORS) - _COMP_OPERATORS))})?
-                =(?!=)(?P<expr>.*)$
-            )|(?P<return>
-                (?!if|return|true|false|null|undefined|NaN)(?P<name>{_NAME_RE})$
-            )|(?P<indexing>
-                (?P<in>{_NAME_RE})\[(?P<idx>.+)\]$
-            )|(?P<attribute>
-                (?P<var>{_NAME_RE})(?:(?P<nullish>\?)?\.(?P<member>[^(]+)|\[(?P<member2>[^\]]+)\])\s*
-            )|(?P<function>
-                (?P<fname>{_NAME_RE})\((?P<args>.*)\)$
-            )''', expr)
+            return self._constant(None, should_return)
+
+        m = _OPERATION_RE.match(expr)
         if m and m.group('assign'):
-            left_val = local_vars.get(m.group('out'))
-
-            if not m.group('index'):
-                local_vars[m.group('out')] = self._operator(
-                    m.group('op'), left_val, m.group('expr'), expr, local_vars, allow_recursion)
-                return local_vars[m.group('out')], should_return
-            elif left_val in (None, JS_Undefined):
-                raise self.Exception(f'Cannot index undefined variable {m.group("out")}', expr)
-
-            idx = self.interpret_expression(m.group('index'), local_vars, allow_recursion)
-            if not isinstance(idx, (int, float)):
-                raise self.Exception(f'List index {idx} must be integer', expr)
-            idx = int(idx)
-            left_val[idx] = self._operator(
-                m.group('op'), self._index(left_val, idx), m.group('expr'), expr, local_vars, allow_recursion)
-            return left_val[idx], should_return
+            out, index, op, right_expr = m.group('out', 'index', 'op', 'expr')
+
+            def assign(local_vars, allow_recursion):
+                left_val = local_vars.get(out)
+
+                if not index:
+                    local_vars[out] = self._operator(op, left_val, right_expr, expr, local_vars, allow_recursion)
+                    return local_vars[out], should_return
+                elif left_val in (None, JS_Undefined):
+                    raise self.Exception(f'Cannot index undefined variable {out}', expr)
+
+                idx = self.interpret_expression(index, local_vars, allow_recursion)
+                if not isinstance(idx, (int, float)):
+                    raise self.Exception(f'List index {idx} must be integer', expr)
+                idx = int(idx)
+                left_val[idx] = self._operator(
+                    op, self._index(left_val, idx), right_expr, expr, local_vars, allow_recursion)
+                return left_val[idx], should_return
+            return assign
 
         elif expr.isdigit():
-            return int(expr), should_return
+            return self._constant(int(expr), should_return)
+
+        elif expr in ('break', 'continue'):
+            error = JS_Break if expr == 'break' else JS_Continue
 
-        elif expr == 'break':
-            raise JS_Break
-        elif expr == 'continue':
-            raise JS_Continue
+            def raise_error(local_vars, allow_recursion):
+                raise error
+            return raise_error
         elif expr == 'undefined':
-            return JS_Undefined, should_return
+            return self._constant(JS_Undefined, should_return)
         elif expr == 'NaN':
-            return float('NaN'), should_return
+            return self._constant(float('NaN'), should_return)
 
         elif m and m.group('return'):
-            return local_vars.get(m.group('name'), JS_Undefined), should_return
+            name = m.group('name')
+            return lambda local_vars, allow_recursion: (local_vars.get(name, JS_Undefined), should_return)
 
         with contextlib.suppress(ValueError):
-            return json.loads(js_to_json(expr, strict=True)), should_return
+            return self._constant(json.loads(js_to_json(expr, strict=True)), should_return)
 
         if m and m.group('indexing'):
-            val = local_vars[m.group('in')]
-            idx = self.interpret_expression(m.group('idx'), local_vars, allow_recursion)
-            return self._index(val, idx), should_return
+            name, idx = m.group('in', 'idx')
+
+            def indexing(local_vars, allow_recursion):
+                val = local_vars[name]
+                return self._index(val, self.interpret_expression(idx, local_vars, allow_recursion)), should_return
+            return indexing
 
         for op in _OPERATORS:
             separated = list(self._separate(expr, op))
@@ -617,174 +723,183 @@ def dict_item(key, val):
                     right_expr = f'{separated.pop()}{op}{right_expr}'
             if not separated:
                 continue
-            left_val = self.interpret_expression(op.join(separated), local_vars, allow_recursion)
-            return self._operator(op, left_val, right_expr, expr, local_vars, allow_recursion), should_return
+            return self._compile_operator(op, op.join(separated), right_expr, expr, should_return)
 
         if m and m.group('attribute'):
-            variable, member, nullish = m.group('var', 'member', 'nullish')
-            if not member:
-                member = self.interpret_expression(m.group('member2'), local_vars, allow_recursion)
-            arg_str = expr[m.end():]
-            if arg_str.startswith('('):
-                arg_str, remaining = self._separate_at_paren(arg_str)
-            else:
-                arg_str, remaining = None, arg_str
+            return self._compile_attribute(m, expr, should_return)
+
+        elif m and m.group('function'):
+            fname = m.group('fname')
+            args = list(self._separate(m.group('args')))
+
+            def call(local_vars, allow_recursion):
+                argvals = [self.interpret_expression(v, local_vars, allow_recursion) for v in args]
+                if fname in local_vars:
+                    return local_vars[fname](argvals, allow_recursion=allow_recursion), should_return
+                elif fname not in self._functions:
+                    self._functions[fname] = self.extract_function(fname)
+                return self._functions[fname](argvals, allow_recursion=allow_recursion), should_return
+            return call
+
+        raise self.Exception(
+            f'Unsupported JS expression {truncate_string(expr, 20, 20) if expr != stmt else ""}', stmt)
+
+    def _compile_operator(self, op, left_expr, right_expr, expr, should_return):
+        def run(local_vars, allow_recursion):
+            left_val = self.interpret_expression(left_expr, local_vars, allow_recursion)
+            return self._operator(op, left_val, right_expr, expr, local_vars, allow_recursion), should_return
+        return run
+
+    def _compile_attribute(self, m, expr, should_return):
+        variable, nullish = m.group('var', 'nullish')
+        member_expr = None if m.group('member') else m.group('member2')
+        arg_str = expr[m.end():]
+        if arg_str.startswith('('):
+            arg_str, remaining = self._separate_at_paren(arg_str)
+        else:
+            arg_str, remaining = None, arg_str
+        args = None if arg_str is None else list(self._separate(arg_str))
+        if remaining:
+            # The result is used like a new statement
+            result_name = self._new_name()
+            remaining = result_name + remaining
+
+        def eval_method(local_vars, allow_recursion):
+            member = self.interpret_expression(member_expr, local_vars, allow_recursion) if member_expr else m.group('member')
 
             def assertion(cndn, msg):
                 """ assert, but without risk of getting optimized out """
                 if not cndn:
                     raise self.Exception(f'{member} {msg}', expr)
 
-            def eval_method():
-                nonlocal member
-
-                if (variable, member) == ('console', 'debug'):
-                    if Debugger.ENABLED:
-                        Debugger.write(self.interpret_expression(f'[{arg_str}]', local_vars, allow_recursion))
-                    return
+            if (variable, member) == ('console', 'debug'):
+                if Debugger.ENABLED:
+                    Debugger.write(self.interpret_expression(f'[{arg_str}]', local_vars, allow_recursion))
+                return
 
-                types = {
-                    'String': str,
-                    'Math': float,
-                    'Array': list,
-                }
-                obj = local_vars.get(variable, types.get(variable, NO_DEFAULT))
-                if obj is NO_DEFAULT:
-                    if variable not in self._objects:
-                        try:
-                            self._objects[variable] = self.extract_object(variable)
-                        except self.Exception:
-                            if not nullish:
-                                raise
-                    obj = self._objects.get(variable, JS_Undefined)
-
-                if nullish and obj is JS_Undefined:
-                    return JS_Undefined
-
-                # Member access
-                if arg_str is None:
-                    return self._index(obj, member, nullish)
-
-                # Function call
-                argvals = [
-                    self.interpret_expression(v, local_vars, allow_recursion)
-                    for v in self._separate(arg_str)]
-
-                # Fixup prototype call
-                if isinstance(obj, type) and member.startswith('prototype.'):
-                    new_member, _, func_prototype = member.partition('.')[2].partition('.')
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(isinstance(argvals[0], obj), f'needs binding to type {obj}')
-                    if func_prototype == 'call':
-                        obj, *argvals = argvals
-                    elif func_prototype == 'apply':
-                        assertion(len(argvals) == 2, 'takes two arguments')
-                        obj, argvals = argvals
-                        assertion(isinstance(argvals, list), 'second argument needs to be a list')
-                    else:
-                        raise self.Exception(f'Unsupported Function method {func_prototype}', expr)
-                    member = new_member
-
-                if obj is str:
-                    if member == 'fromCharCode':
-                        assertion(argvals, 'takes one or more arguments')
-                        return ''.join(map(chr, argvals))
-                    raise self.Exception(f'Unsupported String method {member}', expr)
-                elif obj is float:
-                    if member == 'pow':
-                        assertion(len(argvals) == 2, 'takes two arguments')
-                        return argvals[0] ** argvals[1]
-                    raise self.Exception(f'Unsupported Math method {member}', expr)
-
-                if member == 'split':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) == 1, 'with limit argument is not implemented')
-                    return obj.split(argvals[0]) if argvals[0] else list(obj)
-                elif member == 'join':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    return argvals[0].join(obj)
-                elif member == 'reverse':
-                    assertion(not argvals, 'does not take any arguments')
-                    obj.reverse()
-                    return obj
-                elif member == 'slice':
-                    assertion(isinstance(obj, (list, str)), 'must be applied on a list or string')
-                    assertion(len(argvals) <= 2, 'takes between 0 and 2 arguments')
-                    return obj[slice(*argvals, None)]
-                elif member == 'splice':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(argvals, 'takes one or more arguments')
-                    index, how_many = map(int, ([*argvals, len(obj)])[:2])
-                    if index < 0:
-                        index += len(obj)
-                    add_items = argvals[2:]
-                    res = []
-                    for _ in range(index, min(index + how_many, len(obj))):
-                        res.append(obj.pop(index))
-                    for i, item in enumerate(add_items):
-                        obj.insert(index + i, item)
-                    return res
-                elif member == 'unshift':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(argvals, 'takes one or more arguments')
-                    for item in reversed(argvals):
-                        obj.insert(0, item)
-                    return obj
-                elif member == 'pop':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(not argvals, 'does not take any arguments')
-                    if not obj:
-                        return
-                    return obj.pop()
-                elif member == 'push':
-                    assertion(argvals, 'takes one or more arguments')
-                    obj.extend(argvals)
-                    return obj
-                elif member == 'forEach':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
-                    f, this = ([*argvals, ''])[:2]
-                    return [f((item, idx, obj), {'this': this}, allow_recursion) for idx, item in enumerate(obj)]
-                elif member == 'indexOf':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
-                    idx, start = ([*argvals, 0])[:2]
+            obj = local_vars.get(variable, _BUILTIN_TYPES.get(variable, NO_DEFAULT))
+            if obj is NO_DEFAULT:
+                if variable not in self._objects:
                     try:
-                        return obj.index(idx, start)
-                    except ValueError:
-                        return -1
-                elif member == 'charCodeAt':
-                    assertion(isinstance(obj, str), 'must be applied on a string')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    idx = argvals[0] if isinstance(argvals[0], int) else 0
-                    if idx >= len(obj):
-                        return None
-                    return ord(obj[idx])
-
-                idx = int(member) if isinstance(obj, list) else member
-                return obj[idx](argvals, allow_recursion=allow_recursion)
-
-            if remaining:
-                ret, should_abort = self.interpret_statement(
-                    self._named_object(local_vars, eval_method()) + remaining,
-                    local_vars, allow_recursion)
-                return ret, should_return or should_abort
-            else:
-                return eval_method(), should_return
+                        self._objects[variable] = self.extract_object(variable)
+                    except self.Exception:
+                        if not nullish:
+                            raise
+                obj = self._objects.get(variable, JS_Undefined)
 
-        elif m and m.group('function'):
-            fname = m.group('fname')
-            argvals = [self.interpret_expression(v, local_vars, allow_recursion)
-                       for v in self._separate(m.group('args'))]
-            if fname in local_vars:
-                return local_vars[fname](argvals, allow_recursion=allow_recursion), should_return
-            elif fname not in self._functions:
-                self._functions[fname] = self.extract_function(fname)
-            return self._functions[fname](argvals, allow_recursion=allow_recursion), should_return
+            if nullish and obj is JS_Undefined:
+                return JS_Undefined
 
-        raise self.Exception(
-            f'Unsupported JS expression {truncate_string(expr, 20, 20) if expr != stmt else ""}', stmt)
+            # Member access
+            if args is None:
+                return self._index(obj, member, nullish)
+
+            # Function call
+            argvals = [self.interpret_expression(v, local_vars, allow_recursion) for v in args]
+
+            # Fixup prototype call
+            if isinstance(obj, type) and member.startswith('prototype.'):
+                new_member, _, func_prototype = member.partition('.')[2].partition('.')
+                assertion(argvals, 'takes one or more arguments')
+                assertion(isinstance(argvals[0], obj), f'needs binding to type {obj}')
+                if func_prototype == 'call':
+                    obj, *argvals = argvals
+                elif func_prototype == 'apply':
+                    assertion(len(argvals) == 2, 'takes two arguments')
+                    obj, argvals = argvals
+                    assertion(isinstance(argvals, list), 'second argument needs to be a list')
+                else:
+                    raise self.Exception(f'Unsupported Function method {func_prototype}', expr)
+                member = new_member
+
+            if obj is str:
+                if member == 'fromCharCode':
+                    assertion(argvals, 'takes one or more arguments')
+                    return ''.join(map(chr, argvals))
+                raise self.Exception(f'Unsupported String method {member}', expr)
+            elif obj is float:
+                if member == 'pow':
+                    assertion(len(argvals) == 2, 'takes two arguments')
+                    return argvals[0] ** argvals[1]
+                raise self.Exception(f'Unsupported Math method {member}', expr)
+
+            if member == 'split':
+                assertion(argvals, 'takes one or more arguments')
+                assertion(len(argvals) == 1, 'with limit argument is not implemented')
+                return obj.split(argvals[0]) if argvals[0] else list(obj)
+            elif member == 'join':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(len(argvals) == 1, 'takes exactly one argument')
+                return argvals[0].join(obj)
+            elif member == 'reverse':
+                assertion(not argvals, 'does not take any arguments')
+                obj.reverse()
+                return obj
+            elif member == 'slice':
+                assertion(isinstance(obj, (list, str)), 'must be applied on a list or string')
+                assertion(len(argvals) <= 2, 'takes between 0 and 2 arguments')
+                return obj[slice(*argvals, None)]
+            elif member == 'splice':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(argvals, 'takes one or more arguments')
+                index, how_many = map(int, ([*argvals, len(obj)])[:2])
+                if index < 0:
+                    index += len(obj)
+                add_items = argvals[2:]
+                res = []
+                for _ in range(index, min(index + how_many, len(obj))):
+                    res.append(obj.pop(index))
+                for i, item in enumerate(add_items):
+                    obj.insert(index + i, item)
+                return res
+            elif member == 'unshift':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(argvals, 'takes one or more arguments')
+                for item in reversed(argvals):
+                    obj.insert(0, item)
+                return obj
+            elif member == 'pop':
+                assertion(isinstance(obj, list), 'must be applied on a list')
+                assertion(not argvals, 'does not take any arguments')
+                if not obj:
+                    return
+                return obj.pop()
+            elif member == 'push':
+                assertion(argvals, 'takes one or more arguments')
+                obj.extend(argvals)
+                return obj
+            elif member == 'forEach':
+                assertion(argvals, 'takes one or more arguments')
+                assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
+                f, this = ([*argvals, ''])[:2]
+                return [f((item, idx, obj), {'this': this}, allow_recursion) for idx, item in enumerate(obj)]
+            elif member == 'indexOf':
+                assertion(argvals, 'takes one or more arguments')
+                assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
+                idx, start = ([*argvals, 0])[:2]
+                try:
+                    return obj.index(idx, start)
+                except ValueError:
+                    return -1
+            elif member == 'charCodeAt':
+                assertion(isinstance(obj, str), 'must be applied on a string')
+                assertion(len(argvals) == 1, 'takes exactly one argument')
+                idx = argvals[0] if isinstance(argvals[0], int) else 0
+                if idx >= len(obj):
+                    return None
+                return ord(obj[idx])
+
+            idx = int(member) if isinstance(obj, list) else member
+            return obj[idx](argvals, allow_recursion=allow_recursion)
+
+        if not remaining:
+            return lambda local_vars, allow_recursion: (eval_method(local_vars, allow_recursion), should_return)
+
+        def run(local_vars, allow_recursion):
+            local_vars[result_name] = eval_method(local_vars, allow_recursion)
+            ret, should_abort = self.interpret_statement(remaining, local_vars, allow_recursion)
+            return ret, should_return or should_abort
+        return run
 
     def interpret_expression(self, expr, local_vars, allow_recursion):
         ret, should_return = self.interpret_statement(expr, local_vars, allow_recursion)
@@ -860,12 +975,13 @@ def call_function(self, funcname, *args):
     def build_function(self, argnames, code, *global_stack):
         global_stack = list(global_stack) or [{}]
         argnames = tuple(argnames)
+        code = code.replace('\n', ' ')
 
         def resf(args, kwargs={}, allow_recursion=100):
             global_stack[0].update(itertools.zip_longest(argnames, args, fillvalue=None))
             global_stack[0].update(kwargs)
             var_stack = LocalNameSpace(*global_stack)
-            ret, should_abort = self.interpret_statement(code.replace('\n', ' '), var_stack, allow_recursion - 1)
+            ret, should_abort = self.interpret_statement(code, var_stack, allow_recursion - 1)
             if should_abort:
                 return ret
         return resf
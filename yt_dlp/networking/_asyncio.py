@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import http.client
+import io
+import ssl
+import urllib.parse
+import urllib.request
+import urllib.response
+
+from ._helper import HAPPY_EYEBALLS_DELAY, add_accept_encoding_header, get_redirect_method, trace_phase
+from ._urllib import CONTENT_DECODE_ERRORS, SUPPORTED_ENCODINGS, HTTPHandler, handle_sslerror
+from .common import AsyncRequestHandler, Response, register_rh
+from .exceptions import (
+    HTTPError,
+    IncompleteRead,
+    RequestError,
+    TransportError,
+)
+from ..utils.networking import normalize_url
+
+# asyncio is imported when a request is first sent, since this module is loaded on every run
+
+
+def _decode_content(data, content_encoding):
+    # Content-Encoding header lists the encodings in order that they were applied, so decode in reverse
+    for encoding in (e.strip() for e in reversed(content_encoding.split(','))):
+        if encoding == 'gzip':
+            data = HTTPHandler.gz(data)
+        elif encoding == 'deflate':
+            data = HTTPHandler.deflate(data)
+        elif encoding == 'br' and 'br' in SUPPORTED_ENCODINGS:
+            data = HTTPHandler.brotli(data)
+    return data
+
+
+def _encode_header(name, value):
+    """Return the header line, validated in the same way as http.client.HTTPConnection.putheader"""
+    try:
+        name, value = name.encode('ascii'), str(value).encode('latin-1')
+    except UnicodeEncodeError as e:
+        raise RequestError(f'Invalid header {name!r}: {e}', cause=e) from e
+    if not http.client._is_legal_header_name(name):
+        raise RequestError(f'Invalid header name {name!r}')
+    if http.client._is_illegal_header_value(value):
+        raise RequestError(f'Invalid header value {value!r}')
+    return b'%s: %s' % (name, value)
+
+
+@register_rh
+class AsyncioRH(AsyncRequestHandler):
+    """
+    HTTP/1.1 request handler running on an asyncio event loop, using only the standard library
+
+    Every request uses a new connection, the request body is held in memory
+    and the whole response body is read before the response is returned.
+    This makes it suitable for many concurrent API and webpage requests,
+    but not for downloading media.
+    Proxies are not supported; such requests are passed to the other handlers.
+    """
+    _SUPPORTED_URL_SCHEMES = ('http', 'https')
+    _SUPPORTED_PROXY_SCHEMES = ()
+    _SUPPORTED_FEATURES = ()
+    RH_NAME = 'asyncio'
+
+    # Same limits as urllib.request.HTTPRedirectHandler
+    _MAX_REDIRECTIONS = 10
+    _MAX_REPEATS = 4
+
+    def _check_extensions(self, extensions):
+        super()._check_extensions(extensions)
+        extensions.pop('cookiejar', None)
+        extensions.pop('timeout', None)
+        extensions.pop('legacy_ssl', None)
+
+    async def _send_async(self, request):
+        headers = self._merge_headers(request.headers)
+        add_accept_encoding_header(headers, SUPPORTED_ENCODINGS)
+        cookiejar = self._get_cookiejar(request)
+        timeout = self._calculate_timeout(request)
+        ssl_context = None
+        url, method, data = request.url, request.method, request.data
+        if data is not None and not isinstance(data, bytes):
+            data = data.read() if hasattr(data, 'read') else b''.join(data)
+
+        visited = {}
+        while True:
+            # The cookie handling of urllib works on its own request and response objects
+            cookie_request = urllib.request.Request(url, headers=dict(headers), method=method)
+            cookiejar.add_cookie_header(cookie_request)
+            request_headers = dict(cookie_request.header_items())
+
+            if url.startswith('https:') and not ssl_context:
+                ssl_context = self._make_sslcontext(legacy_ssl_support=request.extensions.get('legacy_ssl'))
+            response = await self._request(url, method, request_headers, data, timeout, ssl_context)
+            cookiejar.extract_cookies(
+                urllib.response.addinfourl(io.BytesIO(), response.headers, url, response.status), cookie_request)
+
+            location = response.headers.get('Location')
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                break
+            visited[url] = visited.get(url, 0) + 1
+            if visited[url] >= self._MAX_REPEATS or sum(visited.values()) >= self._MAX_REDIRECTIONS:
+                raise HTTPError(response, redirect_loop=True)
+
+            # As of RFC 2616 default charset is iso-8859-1 that is respected by Python 3
+            url = normalize_url(urllib.parse.urljoin(url, location.encode('iso-8859-1').decode()))
+            # A Cookie header given by the caller is not sent to the redirect target
+            remove_headers = ['Cookie']
+            new_method = get_redirect_method(method, response.status)
+            # only remove payload if method changed (e.g. POST to GET)
+            if new_method != method:
+                data = None
+                remove_headers.extend(['Content-Length', 'Content-Type'])
+            method = new_method
+            headers = {k: v for k, v in headers.items() if k.title() not in remove_headers}
+
+        if not 200 <= response.status < 300:
+            raise HTTPError(response)
+        return response
+
+    async def _request(self, url, method, headers, data, timeout, ssl_context):
+        import asyncio
+
+        parsed_url = urllib.parse.urlsplit(url)
+        is_https = parsed_url.scheme == 'https'
+        host, port = parsed_url.hostname, parsed_url.port or (443 if is_https else 80)
+        try:
+            # The name resolution and TLS handshake are not measured separately here
+            with trace_phase('connect'):
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(
+                    host, port, ssl=ssl_context if is_https else None,
+                    local_addr=(self.source_address, 0) if self.source_address else None,
+                    happy_eyeballs_delay=HAPPY_EYEBALLS_DELAY, interleave=1), timeout)
+        except ssl.SSLError as e:
+            handle_sslerror(e)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise TransportError(cause=e) from e
+
+        try:
+            return await self._exchange(
+                reader, writer, url, method, headers, data, lambda aw: asyncio.wait_for(aw, timeout))
+        except RequestError:
+            raise
+        except ssl.SSLError as e:
+            handle_sslerror(e)
+        except asyncio.IncompleteReadError as e:
+            raise IncompleteRead(partial=len(e.partial), expected=e.expected - len(e.partial), cause=e) from e
+        except (OSError, EOFError, ValueError, http.client.HTTPException, asyncio.TimeoutError, *CONTENT_DECODE_ERRORS) as e:
+            raise TransportError(cause=e) from e
+        finally:
+            writer.close()
+
+    async def _exchange(self, reader, writer, url, method, headers, data, with_timeout):
+        parsed_url = urllib.parse.urlsplit(url)
+        target = urllib.parse.urlunsplit(('', '', parsed_url.path or '/', parsed_url.query, ''))
+        headers = {
+            'Host': parsed_url.netloc.rpartition('@')[2],
+            **headers,
+            'Connection': 'close',
+        }
+        if data is not None:
+            headers['Content-Length'] = str(len(data))
+        lines = [f'{method} {target} HTTP/1.1'.encode('latin-1'),
+                 *(_encode_header(name, value) for name, value in headers.items())]
+        writer.write(b'\r\n'.join(lines) + b'\r\n\r\n' + (data or b''))
+        await with_timeout(writer.drain())
+
+        while True:
+            status_line = (await with_timeout(reader.readline())).decode('latin-1')
+            version, _, status = status_line.partition(' ')
+            status, _, reason = status.partition(' ')
+            if not version.startswith('HTTP/') or not status.isdecimal():
+                raise http.client.BadStatusLine(status_line)
+            header_lines = []
+            while (line := await with_timeout(reader.readline())) not in (b'\r\n', b'\n', b''):
+                header_lines.append(line)
+            if not 100 <= int(status) < 200:
+                break
+        response_headers = http.client.parse_headers(io.BytesIO(b''.join(header_lines) + b'\r\n'))
+        status = int(status)
+
+        if method == 'HEAD' or status in (204, 304):
+            body = b''
+        elif response_headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while size := int((await with_timeout(reader.readline())).split(b';')[0], 16):
+                chunks.append(await with_timeout(reader.readexactly(size)))
+                await with_timeout(reader.readline())
+            body = b''.join(chunks)
+        elif response_headers.get('Content-Length') is not None:
+            body = await with_timeout(reader.readexactly(int(response_headers['Content-Length'])))
+        else:
+            body = await with_timeout(reader.read())
+        body = _decode_content(body, response_headers.get('Content-Encoding', ''))
+
+        return Response(io.BytesIO(body), url, response_headers, status=status, reason=reason.strip() or None)
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import base64
+import collections
+import email.utils
+import hashlib
+import io
+import threading
+import time
+
+from .common import Request, Response
+from .exceptions import HTTPError, RequestError
+from ..utils.networking import HTTPHeaderDict
+
+
+def _parse_cache_control(value):
+    directives = {}
+    for directive in (value or '').split(','):
+        name, _, arg = directive.partition('=')
+        if name.strip():
+            directives[name.strip().lower()] = arg.strip().strip('"')
+    return directives
+
+
+def _parse_http_date(value):
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _int_or_none(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class _CacheEntry:
+    def __init__(self, url, status, reason, headers, body, request_headers, response_time):
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        # Values of the request headers named in Vary
+        self.request_headers = request_headers
+        self.response_time = response_time
+
+    def freshness_lifetime(self):
+        headers = HTTPHeaderDict(self.headers)
+        cache_control = _parse_cache_control(headers.get('Cache-Control'))
+        if 'no-cache' in cache_control:
+            return 0
+        max_age = _int_or_none(cache_control.get('max-age'))
+        if max_age is not None:
+            return max_age
+        expires = _parse_http_date(headers.get('Expires'))
+        if expires is not None:
+            return expires - (_parse_http_date(headers.get('Date')) or self.response_time)
+        return 0
+
+    def age(self):
+        return time.time() - self.response_time + (_int_or_none(HTTPHeaderDict(self.headers).get('Age')) or 0)
+
+    def validators(self):
+        headers = HTTPHeaderDict(self.headers)
+        return {
+            name: headers[header]
+            for name, header in (('If-None-Match', 'ETag'), ('If-Modified-Since', 'Last-Modified'))
+            if header in headers
+        }
+
+    def make_response(self):
+        return Response(
+            io.BytesIO(self.body), self.url, HTTPHeaderDict(self.headers), status=self.status, reason=self.reason)
+
+    def to_json(self):
+        return {
+            'url': self.url,
+            'status': self.status,
+            'reason': self.reason,
+            'headers': self.headers,
+            'body': base64.b64encode(self.body).decode(),
+            'request_headers': self.request_headers,
+            'response_time': self.response_time,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(**{**data, 'body': base64.b64decode(data['body'])})
+
+
+class _RecordingResponse(Response):
+    """Response that passes its body to a callback once it has been read to the end"""
+
+    def __init__(self, response: Response, callback, max_size):
+        super().__init__(
+            fp=response, url=response.url, headers=response.headers,
+            status=response.status, reason=response.reason, extensions=response.extensions)
+        self._callback = callback
+        self._max_size = max_size
+        self._size = 0
+        self._chunks = []
+
+    def read(self, amt: int | None = None) -> bytes:
+        data = self.fp.read(amt)
+        if self._chunks is None:
+            return data
+        self._chunks.append(data)
+        self._size += len(data)
+        if self._size > self._max_size:
+            # Too large to be cached
+            self._chunks = None
+        elif amt is None or (amt and not data):
+            body, self._chunks = b''.join(self._chunks), None
+            self._callback(body)
+        return data
+
+
+class ResponseCache:
+    """
+    Private HTTP cache (RFC 9111) for GET requests
+
+    Responses are stored if they have an explicit expiration time or a validator
+    (ETag/Last-Modified). Fresh responses are returned without a request, and stale
+    ones are revalidated with a conditional request. Responses that set cookies are not stored.
+
+    Whether a request is cached is decided by the "cache" request extension,
+    or the `enabled` parameter if it is not set.
+
+    The responses are cached separately for the cookies that the cookiejar of the
+    request (the "cookiejar" extension, or `cookiejar`) has for its URL.
+
+    @param enabled: Whether to cache requests that do not set the "cache" extension.
+    @param max_size: Maximum total size of the response bodies kept in memory, and of
+                     the ones kept in the store, in bytes.
+    @param store: Persistent store for the responses, with the interface of yt_dlp.cache.Cache, or None.
+    @param cookiejar: Cookiejar that is used for the requests that do not set the "cookiejar" extension.
+    """
+
+    _CACHEABLE_STATUSES = (200, 203)
+    _SECTION = 'http'
+    # Sizes of the stored responses, oldest first
+    _INDEX_KEY = 'index'
+
+    def __init__(self, enabled=False, max_size=32 * 1024 * 1024, store=None, cookiejar=None):
+        self.enabled = enabled
+        self.max_size = max_size
+        self._store = store
+        self._cookiejar = cookiejar
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._store_lock = threading.Lock()
+        self.stats = dict.fromkeys(('hits', 'revalidated', 'misses'), 0)
+
+    def handles(self, request: Request):
+        if not request.extensions.get('cache', self.enabled):
+            return False
+        if request.method != 'GET' or request.data is not None:
+            return False
+        # The caller manages these requests itself
+        return not any(header in request.headers for header in (
+            'Range', 'If-None-Match', 'If-Modified-Since', 'Authorization'))
+
+    def _key(self, request):
+        cookiejar = request.extensions.get('cookiejar') or self._cookiejar
+        cookies = cookiejar and cookiejar.get_cookie_header(request.url)
+        # The cookies are only hashed, since the keys may be stored
+        return hashlib.sha256(f'{request.url}\0{cookies}'.encode() if cookies else request.url.encode()).hexdigest()
+
+    def _get(self, request):
+        key = self._key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+        if not entry and self._store is not None:
+            data = self._store.load(self._SECTION, key)
+            entry = data and _CacheEntry.from_json(data)
+            if entry:
+                self._put(key, entry, persist=False)
+        if not entry or any(
+                request.headers.get(name) != value for name, value in entry.request_headers.items()):
+            return None
+        return entry
+
+    def _put(self, key, entry, persist=True):
+        with self._lock:
+            old_entry = self._entries.pop(key, None)
+            if old_entry:
+                self._size -= len(old_entry.body)
+            self._entries[key] = entry
+            self._size += len(entry.body)
+            while self._size > self.max_size:
+                _, old_entry = self._entries.popitem(last=False)
+                self._size -= len(old_entry.body)
+        if persist and self._store is not None:
+            self._persist(key, entry)
+
+    def _persist(self, key, entry):
+        with self._store_lock:
+            index = self._store.load(self._SECTION, self._INDEX_KEY) or {}
+            index.pop(key, None)
+            index[key] = len(entry.body)
+            size = sum(index.values())
+            while size > self.max_size:
+                old_key = next(iter(index))
+                size -= index.pop(old_key)
+                self._store.delete(self._SECTION, old_key)
+            self._store.store(self._SECTION, key, entry.to_json())
+            self._store.store(self._SECTION, self._INDEX_KEY, index)
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def lookup(self, request: Request):
+        """
+        Returns (response, request) for the given request.
+        response is a cached response if there is a fresh one, and request is the request
+        to send otherwise, which may be a conditional request for a stale response
+        """
+        cache_control = _parse_cache_control(request.headers.get('Cache-Control'))
+        if 'no-store' in cache_control:
+            return None, request
+        entry = self._get(request)
+        if not entry:
+            self._count('misses')
+            return None, request
+        max_age = _int_or_none(cache_control.get('max-age'))
+        if 'no-cache' not in cache_control and entry.age() < min(
+                entry.freshness_lifetime(), float('inf') if max_age is None else max_age):
+            self._count('hits')
+            return entry.make_response(), request
+
+        validators = entry.validators()
+        if not validators:
+            self._count('misses')
+            return None, request
+        request = request.copy()
+        request.headers.update(validators)
+        return None, request
+
+    def revalidated(self, request: Request, error: RequestError):
+        """Returns the cached response if the error is a 304 Not Modified response to a conditional request"""
+        if not isinstance(error, HTTPError) or error.status != 304:
+            return None
+        entry = self._get(request)
+        if not entry or entry.validators().get('If-None-Match') != request.headers.get('If-None-Match'):
+            return None
+        # A 304 response has no body; reading it lets the connection be reused
+        error.response.read()
+        error.response.close()
+        self._count('revalidated')
+        headers = HTTPHeaderDict(entry.headers)
+        for name, value in error.response.headers.items():
+            if name.lower() not in ('content-length', 'content-encoding', 'transfer-encoding'):
+                headers[name] = value
+        entry = _CacheEntry(
+            entry.url, entry.status, entry.reason, list(headers.items()), entry.body,
+            entry.request_headers, time.time())
+        self._put(self._key(request), entry)
+        return entry.make_response()
+
+    def record(self, request: Request, response: Response):
+        """Returns a response that stores itself in the cache once it has been read, if it can be cached"""
+        if response.status not in self._CACHEABLE_STATUSES or response.get_header('Set-Cookie'):
+            return response
+        cache_control = _parse_cache_control(response.get_header('Cache-Control'))
+        vary = [name.strip() for name in (response.get_header('Vary') or '').split(',') if name.strip()]
+        if 'no-store' in cache_control or '*' in vary:
+            return response
+        response_time = time.time()
+        # Headers describing the encoded body no longer apply, since it is stored decoded
+        headers = [
+            (name, value) for name, value in response.headers.items()
+            if name.lower() not in ('content-length', 'content-encoding', 'transfer-encoding')]
+        entry = _CacheEntry(
+            response.url, response.status, response.reason, headers, b'',
+            {name: request.headers.get(name) for name in vary}, response_time)
+        if not entry.freshness_lifetime() and not entry.validators():
+            return response
+
+        def store(body):
+            entry.body = body
+            self._put(self._key(request), entry)
+
+        return _RecordingResponse(response, store, self.max_size)
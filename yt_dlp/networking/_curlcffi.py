@@ -44,6 +44,8 @@ def __init__(self, response: curl_cffi.requests.Response):
         self._response = response
         self._iterator = response.iter_content()
         self._buffer = b''
+        # The rest of the current chunk for readinto(), which is consumed without copying it
+        self._view = memoryview(b'')
         self.bytes_read = 0
 
     def readable(self):
@@ -52,6 +54,8 @@ def readable(self):
     def read(self, size=None):
         exception_raised = True
         try:
+            if self._view:
+                self._buffer, self._view = self._view.tobytes(), memoryview(b'')
             while self._iterator and (size is None or len(self._buffer) < size):
                 chunk = next(self._iterator, None)
                 if chunk is None:
@@ -75,10 +79,37 @@ def read(self, size=None):
             if exception_raised:
                 self.close()
 
+    def readinto(self, buffer):
+        # Copies from the received chunks directly, instead of joining them first as read() does
+        exception_raised = True
+        try:
+            if self._buffer:  # Left over by read()
+                self._view, self._buffer = memoryview(self._buffer), b''
+            while self._iterator and not self._view:
+                chunk = next(self._iterator, None)
+                if chunk is None:
+                    self._iterator = None
+                    break
+                self._view = memoryview(chunk)
+                self.bytes_read += len(chunk)
+
+            size = min(len(buffer), len(self._view))
+            buffer[:size] = self._view[:size]
+            self._view = self._view[size:]
+
+            if not self._iterator and not self._view:
+                self.close()
+            exception_raised = False
+            return size
+        finally:
+            if exception_raised:
+                self.close()
+
     def close(self):
         if not self.closed:
             self._response.close()
             self._buffer = b''
+            self._view = memoryview(b'')
         super().close()
 
 
@@ -96,13 +127,22 @@ def read(self, amt=None):
         try:
             return self.fp.read(amt)
         except curl_cffi.requests.errors.RequestsError as e:
-            if e.code == CurlECode.PARTIAL_FILE:
-                content_length = int_or_none(e.response.headers.get('Content-Length'))
-                raise IncompleteRead(
-                    partial=self.fp.bytes_read,
-                    expected=content_length - self.fp.bytes_read if content_length is not None else None,
-                    cause=e) from e
-            raise TransportError(cause=e) from e
+            self._handle_read_error(e)
+
+    def readinto(self, buffer):
+        try:
+            return self.fp.readinto(buffer)
+        except curl_cffi.requests.errors.RequestsError as e:
+            self._handle_read_error(e)
+
+    def _handle_read_error(self, e):
+        if e.code == CurlECode.PARTIAL_FILE:
+            content_length = int_or_none(e.response.headers.get('Content-Length'))
+            raise IncompleteRead(
+                partial=self.fp.bytes_read,
+                expected=content_length - self.fp.bytes_read if content_length is not None else None,
+                cause=e) from e
+        raise TransportError(cause=e) from e
 
 
 @register_rh
@@ -0,0 +1,523 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import io
+import select
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+import urllib.response
+import zlib
+from email.message import Message
+
+from ..dependencies import h2
+from ..utils import int_or_none
+
+if h2 is None:
+    raise ImportError('h2 module is not installed')
+
+import h2.config
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+import h2.settings
+
+from ._helper import add_accept_encoding_header, create_connection, get_redirect_method
+from ._urllib import handle_sslerror
+from .common import Features, RequestHandler, Response, register_preference, register_rh
+from .exceptions import (
+    HTTPError,
+    IncompleteRead,
+    RequestError,
+    TransportError,
+    UnsupportedRequest,
+)
+from ..utils.networking import normalize_url
+
+SUPPORTED_ENCODINGS = ['gzip', 'deflate']
+
+# Headers that are specific to HTTP/1.1 connections and must not be sent over HTTP/2
+_CONNECTION_HEADERS = ('host', 'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'upgrade', 'te')
+
+
+class _H2Stream:
+    def __init__(self, stream_id):
+        self.id = stream_id
+        self.headers = None
+        self.data = collections.deque()  # (data, flow controlled length)
+        self.ended = False
+        self.error = None
+
+
+class _H2Connection:
+    """A HTTP/2 connection to an origin, which concurrent requests share"""
+
+    # Receive window for each stream and the whole connection. Larger than the default
+    # of 64KiB so that a high latency does not limit the download speed
+    _WINDOW_SIZE = 16 * 1024 * 1024
+    # Seconds after which a connection without streams is closed
+    _IDLE_TIMEOUT = 60
+
+    def __init__(self, sock, timeout):
+        self.sock = sock
+        self.timeout = timeout
+        # The condition guards the protocol state, and the lock the socket. The lock is
+        # always acquired first, and data is only read from or written to the socket by one thread at a time.
+        # Reads do not block, so that a TLS record that has only partly arrived does not hold up the writes
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._streams = {}
+        self._last_used = time.monotonic()
+        self.error = None
+        self.closing = False
+        self._conn = h2.connection.H2Connection(h2.config.H2Configuration(client_side=True, header_encoding=None))
+        self._conn.initiate_connection()
+        self._conn.update_settings({
+            h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: self._WINDOW_SIZE,
+            h2.settings.SettingCodes.ENABLE_PUSH: 0,
+        })
+        self._conn.increment_flow_control_window(self._WINDOW_SIZE - self._conn.inbound_flow_control_window)
+        self._flush()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def acquire(self):
+        """Return whether new requests can be sent, and if so keep the connection from being closed as idle"""
+        with self._cond:
+            if self.error or self.closing:
+                return False
+            self._last_used = time.monotonic()
+            return True
+
+    def _flush(self):
+        try:
+            with self._io_lock:
+                with self._cond:
+                    data = self._conn.data_to_send()
+                if data:
+                    self.sock.sendall(data)
+        except OSError as e:
+            self._fail(e)
+            raise TransportError(cause=e) from e
+
+    def _fail(self, error):
+        """Make the connection unusable, failing all of its streams with the given exception as the cause"""
+        with self._cond:
+            if self.error:
+                return
+            self.error = error
+            self._cond.notify_all()
+        self.sock.close()
+
+    def close(self):
+        with self._cond:
+            if self.error:
+                return
+            # The server may already have closed it with a GOAWAY
+            with contextlib.suppress(h2.exceptions.ProtocolError):
+                self._conn.close_connection()
+        with contextlib.suppress(TransportError):
+            self._flush()
+        self._fail(ConnectionAbortedError('Connection was closed'))
+
+    def _wait(self, predicate):
+        """Wait with the condition held until the predicate is true"""
+        if not self._cond.wait_for(lambda: self.error or predicate(), self.timeout):
+            raise TransportError(cause=TimeoutError('timed out'))
+        if self.error:
+            raise TransportError(cause=self.error)
+
+    def _close_if_unused(self):
+        """Close the connection if it has no streams, and is closing or has been idle for too long"""
+        with self._cond:
+            if self._streams or self.error:
+                return
+            if not self.closing and time.monotonic() - self._last_used < self._IDLE_TIMEOUT:
+                return
+            self.closing = True
+        self.close()
+
+    def _recv(self):
+        """Return the data that can be read without blocking, or None if there is none"""
+        with self._io_lock:
+            timeout = self.sock.gettimeout()
+            self.sock.settimeout(0)
+            try:
+                return self.sock.recv(65536)
+            except (ssl.SSLWantReadError, ssl.SSLWantWriteError, BlockingIOError):
+                # Only part of a TLS record has arrived
+                return None
+            finally:
+                self.sock.settimeout(timeout)
+
+    def _read_loop(self):
+        try:
+            while not self.error:
+                if not self.sock.pending() and not select.select([self.sock], [], [], 1)[0]:
+                    self._close_if_unused()
+                    continue
+                data = self._recv()
+                if data is None:
+                    continue
+                if not data:
+                    raise ConnectionResetError('Connection was closed by the server')
+                with self._cond:
+                    for event in self._conn.receive_data(data):
+                        self._handle_event(event)
+                    self._cond.notify_all()
+                self._flush()
+                if self.closing:
+                    self._close_if_unused()
+        except (OSError, ValueError, TransportError, h2.exceptions.ProtocolError) as e:
+            # A socket closed by close() also ends up here
+            self._fail(e)
+
+    def _handle_event(self, event):
+        stream = self._streams.get(getattr(event, 'stream_id', None))
+        if isinstance(event, h2.events.ResponseReceived):
+            if stream:
+                stream.headers = event.headers
+        elif isinstance(event, h2.events.DataReceived):
+            if stream and event.data:
+                stream.data.append((event.data, event.flow_controlled_length))
+            else:
+                self._conn.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+        elif isinstance(event, h2.events.StreamEnded):
+            if stream:
+                stream.ended = True
+        elif isinstance(event, h2.events.StreamReset):
+            if stream:
+                stream.error = TransportError(f'Stream was reset by the server (error code {event.error_code})')
+        elif isinstance(event, h2.events.ConnectionTerminated):
+            self.closing = True
+            for stream_id, stream in self._streams.items():
+                if event.last_stream_id is None or stream_id > event.last_stream_id:
+                    stream.error = TransportError('Connection was closed by the server before the request was processed')
+
+    def request(self, headers, body):
+        with self._cond:
+            self._wait(lambda: self.closing or (
+                self._conn.open_outbound_streams < self._conn.remote_settings.max_concurrent_streams))
+            if self.closing:
+                raise TransportError('Connection is closing')
+            stream = _H2Stream(self._conn.get_next_available_stream_id())
+            self._streams[stream.id] = stream
+            self._conn.send_headers(stream.id, headers, end_stream=not body)
+        try:
+            self._flush()
+            body = memoryview(body or b'')
+            while body:
+                with self._cond:
+                    self._wait(lambda: stream.error or self._conn.local_flow_control_window(stream.id) > 0)
+                    if stream.error:
+                        raise stream.error
+                    size = min(len(body), self._conn.local_flow_control_window(stream.id), self._conn.max_outbound_frame_size)
+                    self._conn.send_data(stream.id, body[:size].tobytes(), end_stream=size == len(body))
+                    body = body[size:]
+                self._flush()
+
+            with self._cond:
+                self._wait(lambda: stream.error or stream.headers is not None)
+                if stream.error:
+                    raise stream.error
+        except BaseException:
+            self.close_stream(stream)
+            raise
+        return stream
+
+    def read(self, stream):
+        """Return the next chunk of data of the stream, or b'' once it has ended"""
+        with self._cond:
+            self._wait(lambda: stream.error or stream.data or stream.ended)
+            if stream.data:
+                data, length = stream.data.popleft()
+                self._conn.acknowledge_received_data(length, stream.id)
+            elif stream.error:
+                raise stream.error
+            else:
+                return b''
+        self._flush()
+        return data
+
+    def close_stream(self, stream):
+        with self._cond:
+            if self._streams.pop(stream.id, None) is None or self.error:
+                return
+            self._last_used = time.monotonic()
+            if not stream.ended and not stream.error:
+                with contextlib.suppress(h2.exceptions.ProtocolError):
+                    self._conn.reset_stream(stream.id, h2.errors.ErrorCodes.CANCEL)
+            for _, length in stream.data:
+                self._conn.acknowledge_received_data(length, stream.id)
+            stream.data.clear()
+        with contextlib.suppress(TransportError):
+            self._flush()
+        if self.closing:
+            # The server will not accept new streams, so the connection is closed after the last one
+            self._close_if_unused()
+
+
+class H2ResponseReader(io.RawIOBase):
+    def __init__(self, connection, stream, content_length, content_encoding):
+        self._connection = connection
+        self._stream = stream
+        self._content_length = content_length
+        self._received = 0
+        self._pending = b''
+        self._decoder = None
+        # Some servers send raw deflate data instead of the zlib format
+        self._try_raw_deflate = content_encoding == 'deflate'
+        if content_encoding == 'gzip':
+            self._decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        elif content_encoding == 'deflate':
+            self._decoder = zlib.decompressobj(zlib.MAX_WBITS)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return super().read(-1 if size is None else size)
+
+    def _decode(self, data):
+        if not self._decoder:
+            return data
+        try:
+            decoded = self._decoder.decompress(data)
+        except zlib.error as e:
+            if not self._try_raw_deflate:
+                raise TransportError(cause=e) from e
+            self._decoder, self._try_raw_deflate = zlib.decompressobj(-zlib.MAX_WBITS), False
+            return self._decode(data)
+        self._try_raw_deflate = False
+        return decoded
+
+    def readinto(self, buffer):
+        while not self._pending:
+            data = self._connection.read(self._stream)
+            if not data:
+                if self._content_length is not None and self._received < self._content_length:
+                    raise IncompleteRead(partial=self._received, expected=self._content_length - self._received)
+                if self._decoder:
+                    self._pending, self._decoder = self._decoder.flush(), None
+                    continue
+                # Release the stream as soon as the response is fully read
+                self._connection.close_stream(self._stream)
+                return 0
+            self._received += len(data)
+            self._pending = self._decode(data)
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._connection.close_stream(self._stream)
+        super().close()
+
+
+class H2ResponseAdapter(Response):
+    fp: H2ResponseReader
+
+    def read(self, amt=None):
+        try:
+            return self.fp.read(amt)
+        except RequestError:
+            raise
+        except Exception as e:
+            raise TransportError(cause=e) from e
+
+    def readinto(self, buffer):
+        try:
+            return self.fp.readinto(buffer)
+        except RequestError:
+            raise
+        except Exception as e:
+            raise TransportError(cause=e) from e
+
+
+@register_rh
+class H2RH(RequestHandler):
+    """
+    HTTP/2 request handler, using h2
+
+    Concurrent requests to the same origin are sent over a single connection.
+    Only HTTPS servers that negotiate HTTP/2 are supported. Once a server is found not to,
+    its requests are left to the other handlers.
+    """
+    _SUPPORTED_URL_SCHEMES = ('https',)
+    _SUPPORTED_PROXY_SCHEMES = ()
+    _SUPPORTED_FEATURES = (Features.NO_PROXY, Features.ALL_PROXY)
+    RH_NAME = 'h2'
+
+    # Same limits as urllib.request.HTTPRedirectHandler
+    _MAX_REDIRECTIONS = 10
+    _MAX_REPEATS = 4
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._connections = {}
+        # Only one connection to an origin is made at a time, without holding up the requests to the others
+        self._connect_locks = collections.defaultdict(threading.Lock)
+        self._http1_origins = set()
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections.clear()
+
+    def _check_extensions(self, extensions):
+        super()._check_extensions(extensions)
+        extensions.pop('cookiejar', None)
+        extensions.pop('timeout', None)
+        extensions.pop('legacy_ssl', None)
+
+    @staticmethod
+    def _origin(url):
+        parsed_url = urllib.parse.urlsplit(url)
+        return parsed_url.hostname, parsed_url.port or 443
+
+    def _validate(self, request):
+        super()._validate(request)
+        if self._origin(request.url) in self._http1_origins:
+            raise UnsupportedRequest('Server does not support HTTP/2')
+
+    def _get_open_connection(self, key):
+        """Return the connection of the key if new requests can be sent over it"""
+        with self._lock:
+            connection = self._connections.get(key)
+            if connection and connection.acquire():
+                return connection
+            if key[:2] in self._http1_origins:
+                raise UnsupportedRequest('Server does not support HTTP/2')
+            return None
+
+    def _get_connection(self, url, timeout, legacy_ssl):
+        origin = self._origin(url)
+        key = (*origin, legacy_ssl)
+        connection = self._get_open_connection(key)
+        if connection:
+            return connection
+        with self._lock:
+            connect_lock = self._connect_locks[key]
+
+        with connect_lock:
+            # Another request may have connected while this one was waiting
+            connection = self._get_open_connection(key)
+            if connection:
+                return connection
+
+            ssl_context = self._make_sslcontext(legacy_ssl_support=legacy_ssl, alpn_protocols=('h2', 'http/1.1'))
+            try:
+                sock = create_connection(
+                    origin, timeout=timeout,
+                    source_address=(self.source_address, 0) if self.source_address else None)
+                sock = ssl_context.wrap_socket(sock, server_hostname=origin[0])
+            except ssl.SSLError as e:
+                handle_sslerror(e)
+            except OSError as e:
+                raise TransportError(cause=e) from e
+
+            if sock.selected_alpn_protocol() != 'h2':
+                sock.close()
+                with self._lock:
+                    self._http1_origins.add(origin)
+                raise UnsupportedRequest('Server does not support HTTP/2')
+            connection = _H2Connection(sock, timeout)
+            with self._lock:
+                self._connections[key] = connection
+            return connection
+
+    def _request(self, url, method, headers, data, timeout, legacy_ssl):
+        parsed_url = urllib.parse.urlsplit(url)
+        target = urllib.parse.urlunsplit(('', '', parsed_url.path or '/', parsed_url.query, ''))
+        h2_headers = [
+            (':method', method),
+            (':authority', headers.get('Host') or parsed_url.netloc.rpartition('@')[2]),
+            (':scheme', 'https'),
+            (':path', target),
+            *((name.lower(), value) for name, value in headers.items() if name.lower() not in _CONNECTION_HEADERS),
+        ]
+        if data is not None:
+            h2_headers.append(('content-length', str(len(data))))
+
+        connection = self._get_connection(url, timeout, legacy_ssl)
+        try:
+            stream = connection.request(h2_headers, data)
+        except h2.exceptions.ProtocolError as e:
+            raise TransportError(cause=e) from e
+
+        status, response_headers = None, Message()
+        for name, value in stream.headers:
+            name, value = name.decode('latin-1'), value.decode('latin-1')
+            if name == ':status':
+                status = int(value)
+            elif not name.startswith(':'):
+                response_headers.add_header(name, value)
+
+        content_length = None
+        if method != 'HEAD' and status not in (204, 304):
+            content_length = int_or_none(response_headers.get('Content-Length'))
+        reader = H2ResponseReader(
+            connection, stream, content_length, response_headers.get('Content-Encoding', '').strip().lower())
+        return H2ResponseAdapter(reader, url, response_headers, status=status)
+
+    def _send(self, request):
+        headers = self._merge_headers(request.headers)
+        add_accept_encoding_header(headers, SUPPORTED_ENCODINGS)
+        cookiejar = self._get_cookiejar(request)
+        timeout = self._calculate_timeout(request)
+        legacy_ssl = request.extensions.get('legacy_ssl')
+        url, method, data = request.url, request.method, request.data
+        if data is not None and not isinstance(data, bytes):
+            data = data.read() if hasattr(data, 'read') else b''.join(data)
+
+        visited = {}
+        while True:
+            # The cookie handling of urllib works on its own request and response objects
+            cookie_request = urllib.request.Request(url, headers=dict(headers), method=method)
+            cookiejar.add_cookie_header(cookie_request)
+            response = self._request(url, method, dict(cookie_request.header_items()), data, timeout, legacy_ssl)
+            cookiejar.extract_cookies(
+                urllib.response.addinfourl(io.BytesIO(), response.headers, url, response.status), cookie_request)
+
+            location = response.headers.get('Location')
+            if response.status not in (301, 302, 303, 307, 308) or not location:
+                break
+            visited[url] = visited.get(url, 0) + 1
+            if visited[url] >= self._MAX_REPEATS or sum(visited.values()) >= self._MAX_REDIRECTIONS:
+                raise HTTPError(response, redirect_loop=True)
+
+            # As of RFC 2616 default charset is iso-8859-1 that is respected by Python 3
+            redirect_url = normalize_url(urllib.parse.urljoin(url, location.encode('iso-8859-1').decode()))
+            if urllib.parse.urlsplit(redirect_url).scheme != 'https':
+                # The request has already been sent, so it must not be retried with another handler
+                raise HTTPError(response)
+            response.close()
+            url = redirect_url
+            # A Cookie header given by the caller is not sent to the redirect target
+            remove_headers = ['Cookie']
+            new_method = get_redirect_method(method, response.status)
+            # only remove payload if method changed (e.g. POST to GET)
+            if new_method != method:
+                data = None
+                remove_headers.extend(['Content-Length', 'Content-Type'])
+            method = new_method
+            headers = {k: v for k, v in headers.items() if k.title() not in remove_headers}
+
+        if not 200 <= response.status < 300:
+            raise HTTPError(response)
+        return response
+
+
+@register_preference(H2RH)
+def h2_preference(rh, request):
+    # Worthwhile only when many requests are made to the same server at once
+    if request.extensions.get('multiplex'):
+        return 200
+    return -100
@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import contextlib
+import contextvars
 import functools
+import itertools
 import os
+import queue
 import socket
 import ssl
 import sys
+import threading
+import time
 import typing
 import urllib.parse
 import urllib.request
@@ -111,6 +116,58 @@ def get_redirect_method(method, status):
     return method
 
 
+class _ResumableSSLSocket(ssl.SSLSocket):
+    def _real_close(self):
+        # TLS 1.3 session tickets are only received after the handshake
+        self.context._save_session(self)
+        super()._real_close()
+
+
+class SessionCachingSSLContext(ssl.SSLContext):
+    """
+    SSLContext that keeps the TLS session of each connection,
+    and resumes it on the next connection to the same host
+    """
+    sslsocket_class = _ResumableSSLSocket
+    MAX_SESSIONS = 256
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._sessions = {}
+        self._sessions_lock = threading.Lock()
+
+    def wrap_socket(self, sock, server_side=False, do_handshake_on_connect=True,
+                    suppress_ragged_eofs=True, server_hostname=None, session=None):
+        key = None
+        if not server_side and server_hostname:
+            with contextlib.suppress(OSError):
+                key = server_hostname, sock.getpeername()[1]
+        if session is None and key:
+            with self._sessions_lock:
+                session = self._sessions.get(key)
+
+        with trace_phase('tls'):
+            ssl_sock = super().wrap_socket(
+                sock, server_side=server_side, do_handshake_on_connect=do_handshake_on_connect,
+                suppress_ragged_eofs=suppress_ragged_eofs, server_hostname=server_hostname, session=session)
+        ssl_sock._session_key = key
+        self._save_session(ssl_sock)
+        return ssl_sock
+
+    def _save_session(self, ssl_sock):
+        key = getattr(ssl_sock, '_session_key', None)
+        session = ssl_sock.session if key else None
+        # A TLS 1.3 session can only be resumed once its ticket has been received
+        if not session or not (session.has_ticket or (session.id and ssl_sock.version() != 'TLSv1.3')):
+            return
+        with self._sessions_lock:
+            self._sessions.pop(key, None)
+            if len(self._sessions) >= self.MAX_SESSIONS:
+                # dicts are ordered, so this is the least recently stored session
+                del self._sessions[next(iter(self._sessions))]
+            self._sessions[key] = session
+
+
 def make_ssl_context(
     verify=True,
     client_certificate=None,
@@ -118,8 +175,9 @@ def make_ssl_context(
     client_certificate_password=None,
     legacy_support=False,
     use_certifi=True,
+    alpn_protocols=('http/1.1',),
 ):
-    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    context = SessionCachingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
     context.check_hostname = verify
     context.verify_mode = ssl.CERT_REQUIRED if verify else ssl.CERT_NONE
     # OpenSSL 1.1.1+ Python 3.8+ keylog file
@@ -130,7 +188,7 @@ def make_ssl_context(
     # https://github.com/python/cpython/issues/85140
     # https://github.com/yt-dlp/yt-dlp/issues/3878
     with contextlib.suppress(NotImplementedError):
-        context.set_alpn_protocols(['http/1.1'])
+        context.set_alpn_protocols(list(alpn_protocols))
     if verify:
         ssl_load_certs(context, use_certifi)
 
@@ -168,9 +226,35 @@ def make_ssl_context(
     return context
 
 
+@functools.cache
+def get_ssl_context(**kwargs):
+    """
+    Same as make_ssl_context(), except that the context is shared by all callers with the same arguments,
+    so that TLS sessions can be resumed across handlers. The returned context must not be modified
+    """
+    return make_ssl_context(**kwargs)
+
+
+def _freeze(value):
+    """Make a hashable equivalent of a value made of dicts, lists and sets"""
+    if isinstance(value, dict):
+        return dict, frozenset((k, _freeze(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return type(value), tuple(map(_freeze, value))
+    elif isinstance(value, (set, frozenset)):
+        return frozenset, frozenset(map(_freeze, value))
+    return value
+
+
 class InstanceStoreMixin:
+    """
+    Keeps an instance for each distinct set of keyword arguments to _create_instance().
+    The arguments must be hashable, or dicts, lists or sets of hashable values
+    """
+
     def __init__(self, **kwargs):
-        self.__instances = []
+        self.__instances = {}
+        self.__lock = threading.Lock()
         super().__init__(**kwargs)  # So that both MRO works
 
     @staticmethod
@@ -178,22 +262,27 @@ def _create_instance(**kwargs):
         raise NotImplementedError
 
     def _get_instance(self, **kwargs):
-        for key, instance in self.__instances:
-            if key == kwargs:
-                return instance
-
-        instance = self._create_instance(**kwargs)
-        self.__instances.append((kwargs, instance))
+        key = _freeze(kwargs)
+        with self.__lock:
+            instance = self.__instances.get(key)
+            if instance is None:
+                instance = self.__instances[key] = self._create_instance(**kwargs)
         return instance
 
+    def _get_instances(self):
+        with self.__lock:
+            return list(self.__instances.values())
+
     def _close_instance(self, instance):
         if callable(getattr(instance, 'close', None)):
             instance.close()
 
     def _clear_instances(self):
-        for _, instance in self.__instances:
+        with self.__lock:
+            instances = list(self.__instances.values())
+            self.__instances.clear()
+        for instance in instances:
             self._close_instance(instance)
-        self.__instances.clear()
 
 
 def add_accept_encoding_header(headers: HTTPHeaderDict, supported_encodings: Iterable[str]):
@@ -246,6 +335,137 @@ def create_socks_proxy_socket(dest_addr, proxy_args, proxy_ip_addr, timeout, sou
         raise
 
 
+# The RequestTrace of the request being sent in the current context, if it is traced
+_current_trace = contextvars.ContextVar('_current_trace', default=None)
+
+
+@contextlib.contextmanager
+def trace_phase(name):
+    """Adds the time spent in the block to the given phase of the request being traced, if any"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_phase(name, time.perf_counter() - start)
+
+
+class _AddressCache:
+    """
+    Process-wide cache of getaddrinfo() results
+
+    getaddrinfo() does not expose the TTL of the DNS records,
+    so entries are kept for a fixed time that is shorter than typical CDN TTLs
+    """
+    TTL = 60
+    MAX_ENTRIES = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def getaddrinfo(self, host, port):
+        key = host, port
+        with self._lock:
+            expiry, ip_addrs = self._entries.get(key, (0, None))
+        if ip_addrs and expiry > time.monotonic():
+            return ip_addrs
+
+        ip_addrs = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+        with self._lock:
+            if len(self._entries) >= self.MAX_ENTRIES:
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                # dicts are ordered, so this drops the oldest entries
+                for stale_key in list(self._entries)[:len(self._entries) - self.MAX_ENTRIES + 1]:
+                    del self._entries[stale_key]
+            self._entries[key] = time.monotonic() + self.TTL, ip_addrs
+        return ip_addrs
+
+    def invalidate(self, host, port):
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_address_cache = _AddressCache()
+
+# "Connection Attempt Delay" recommended by RFC 8305
+HAPPY_EYEBALLS_DELAY = 0.25
+
+
+def _interleave_addresses(ip_addrs):
+    # RFC 8305, Section 4: alternate between address families, starting with the preferred one
+    by_family = {}
+    for ip_addr in ip_addrs:
+        by_family.setdefault(ip_addr[0], []).append(ip_addr)
+    return [ip_addr for group in itertools.zip_longest(*by_family.values()) for ip_addr in group if ip_addr]
+
+
+def _race_connect(ip_addrs, connect):
+    """
+    Start a connection attempt to each address in turn, waiting HAPPY_EYEBALLS_DELAY
+    (or until the previous attempt fails) before starting the next one.
+    The first connection that succeeds is returned, and the others are closed
+    """
+    results = queue.SimpleQueue()
+    lock = threading.Lock()
+    won = False
+
+    def attempt(ip_addr):
+        try:
+            sock = connect(ip_addr)
+        except Exception as e:
+            results.put((None, e))
+            return
+        with lock:
+            if won:
+                sock.close()
+                return
+            results.put((sock, None))
+
+    remaining = iter(ip_addrs)
+    pending, errors = 0, []
+    while True:
+        ip_addr = next(remaining, None)
+        if ip_addr is not None:
+            threading.Thread(target=attempt, args=(ip_addr,), daemon=True).start()
+            pending += 1
+        elif not pending:
+            break
+
+        try:
+            sock, error = results.get(timeout=HAPPY_EYEBALLS_DELAY if ip_addr is not None else None)
+        except queue.Empty:
+            continue
+        pending -= 1
+        if sock is None:
+            errors.append(error)
+            continue
+
+        with lock:
+            won = True
+        # Attempts that succeeded before the winner was chosen
+        while not results.empty():
+            other, _ = results.get()
+            if other is not None:
+                other.close()
+        return sock
+
+    try:
+        raise errors[-1]
+    finally:
+        # Explicitly break __traceback__ reference cycle
+        # https://bugs.python.org/issue36820
+        errors = None
+
+
 def create_connection(
     address,
     timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
@@ -255,9 +475,11 @@ def create_connection(
 ):
     # Work around socket.create_connection() which tries all addresses from getaddrinfo() including IPv6.
     # This filters the addresses based on the given source_address.
+    # Addresses are resolved through a cache, and tried in parallel as in RFC 8305 ("Happy Eyeballs")
     # Based on: https://github.com/python/cpython/blob/main/Lib/socket.py#L810
     host, port = address
-    ip_addrs = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    with trace_phase('dns'):
+        ip_addrs = _address_cache.getaddrinfo(host, port)
     if not ip_addrs:
         raise OSError('getaddrinfo returns an empty list')
     if source_address is not None:
@@ -268,20 +490,13 @@ def create_connection(
                 f'No remote IPv{4 if af == socket.AF_INET else 6} addresses available for connect. '
                 f'Can\'t use "{source_address[0]}" as source address')
 
-    err = None
-    for ip_addr in ip_addrs:
-        try:
-            sock = _create_socket_func(ip_addr, timeout, source_address)
-            # Explicitly break __traceback__ reference cycle
-            # https://bugs.python.org/issue36820
-            err = None
-            return sock
-        except OSError as e:
-            err = e
-
+    connect = functools.partial(_create_socket_func, timeout=timeout, source_address=source_address)
     try:
-        raise err
-    finally:
-        # Explicitly break __traceback__ reference cycle
-        # https://bugs.python.org/issue36820
-        err = None
+        with trace_phase('connect'):
+            if len(ip_addrs) == 1:
+                return connect(ip_addrs[0])
+            return _race_connect(_interleave_addresses(ip_addrs), connect)
+    except OSError:
+        # The host may have moved to other addresses
+        _address_cache.invalidate(host, port)
+        raise
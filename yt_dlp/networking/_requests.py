@@ -40,6 +40,7 @@
     get_redirect_method,
     make_socks_proxy_opts,
     select_proxy,
+    trace_phase,
 )
 from .common import (
     Features,
@@ -128,6 +129,17 @@ def subn(self, repl, string, *args, **kwargs):
 # 1. https://github.com/psf/requests/issues/5000
 requests.adapters.select_proxy = select_proxy
 
+# urllib3 resolves the host name while connecting, so it is not traced as a separate phase
+_urllib3_create_connection = urllib3.util.connection.create_connection
+
+
+def _traced_create_connection(*args, **kwargs):
+    with trace_phase('connect'):
+        return _urllib3_create_connection(*args, **kwargs)
+
+
+urllib3.util.connection.create_connection = _traced_create_connection
+
 
 class RequestsResponseAdapter(Response):
     def __init__(self, res: requests.models.Response):
@@ -297,12 +309,35 @@ def _check_extensions(self, extensions):
         extensions.pop('timeout', None)
         extensions.pop('legacy_ssl', None)
 
+    def connection_stats(self):
+        stats = dict.fromkeys(('requests', 'connections', 'tls_handshakes', 'reused', 'idle'), 0)
+        for session in self._get_instances():
+            # The same adapter is mounted for both http and https
+            for adapter in {id(adapter): adapter for adapter in session.adapters.values()}.values():
+                for manager in (adapter.poolmanager, *adapter.proxy_manager.values()):
+                    # RecentlyUsedContainer does not support iteration, but keys() returns a copy
+                    for key in manager.pools.keys():  # noqa: SIM118
+                        pool = manager.pools.get(key)
+                        if pool is None:
+                            continue
+                        stats['requests'] += pool.num_requests
+                        stats['connections'] += pool.num_connections
+                        if pool.scheme == 'https':
+                            stats['tls_handshakes'] += pool.num_connections
+                        stats['reused'] += max(pool.num_requests - pool.num_connections, 0)
+                        # Unused slots of the pool hold None, and connections that were never opened have no socket
+                        stats['idle'] += sum(
+                            1 for conn in list(getattr(pool.pool, 'queue', ()))
+                            if getattr(conn, 'sock', None) is not None)
+        return stats
+
     def _create_instance(self, cookiejar, legacy_ssl_support=None):
         session = RequestsSession()
         http_adapter = RequestsHTTPAdapter(
             ssl_context=self._make_sslcontext(legacy_ssl_support=legacy_ssl_support),
             source_address=self.source_address,
             max_retries=urllib3.util.retry.Retry(False),
+            pool_maxsize=self.pool_size,
         )
         session.adapters.clear()
         session.headers = requests.models.CaseInsensitiveDict({'Connection': 'keep-alive'})
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+import urllib.parse
+
+from ._helper import _current_trace
+from .common import Request, RequestHandler, Response
+from .exceptions import HTTPError, RequestError, UnsupportedRequest
+from .websocket import WebSocketResponse
+
+# Phases of the connection setup, which do not happen when a connection is reused
+_SETUP_PHASES = ('dns', 'connect', 'tls')
+
+
+class RequestTrace:
+    """
+    Timings of a request that was sent through a RequestHandler
+
+    `phases` has the time spent in each phase of the request, in seconds:
+        dns:      Resolving the host name
+        connect:  Opening the connection. Includes the other setup phases
+                  for handlers that cannot measure them separately
+        tls:      TLS handshake
+        ttfb:     Waiting for the response headers once the connection was set up
+        transfer: Reading the response body
+    Phases that did not happen, e.g. the setup of a reused connection, are left out.
+
+    The trace is finished once the response body has been read or closed, or the request failed,
+    and then passed to the hooks.
+    """
+
+    def __init__(self, handler: RequestHandler, request: Request, hooks):
+        self.handler = handler.RH_KEY
+        self.url = request.url
+        self.host = urllib.parse.urlsplit(request.url).hostname
+        self.method = request.method
+        self.phases = {}
+        self.bytes = 0
+        self.status = None
+        self.error = None
+        self._hooks = hooks
+        self._start = None
+        self._response_time = None
+        self._token = None
+        self._finished = False
+
+    def add_phase(self, name, duration):
+        self.phases[name] = self.phases.get(name, 0) + duration
+
+    @property
+    def duration(self):
+        return sum(self.phases.values())
+
+    def __enter__(self):
+        # The handler adds the setup phases through yt_dlp.networking._helper.trace_phase
+        self._token = _current_trace.set(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _current_trace.reset(self._token)
+        setup = sum(self.phases.get(name, 0) for name in _SETUP_PHASES)
+        self.add_phase('ttfb', max(time.perf_counter() - self._start - setup, 0))
+        if isinstance(exc_val, HTTPError):
+            self.status = exc_val.status
+        # A handler that turned out not to support the request has not sent it
+        if exc_val is not None and not isinstance(exc_val, UnsupportedRequest):
+            self.finish(exc_val)
+
+    def wrap(self, response: Response) -> Response:
+        """Returns a response that finishes the trace once its body has been read"""
+        self.status = response.status
+        self._response_time = time.perf_counter()
+        if isinstance(response, WebSocketResponse):
+            self.finish()
+            return response
+        return _TracedResponse(response, self)
+
+    def finish(self, error=None):
+        if self._finished:
+            return
+        self._finished = True
+        if self._response_time is not None:
+            self.add_phase('transfer', time.perf_counter() - self._response_time)
+        if error is not None:
+            self.error = type(error).__name__
+        for hook in self._hooks:
+            hook(self)
+
+    def to_json(self):
+        return {
+            'handler': self.handler,
+            'url': self.url,
+            'host': self.host,
+            'method': self.method,
+            'status': self.status,
+            'error': self.error,
+            'bytes': self.bytes,
+            'phases': self.phases,
+        }
+
+
+class _TracedResponse(Response):
+    def __init__(self, response: Response, trace: RequestTrace):
+        super().__init__(
+            fp=response, url=response.url, headers=response.headers,
+            status=response.status, reason=response.reason, extensions=response.extensions)
+        self._trace = trace
+
+    def read(self, amt: int | None = None) -> bytes:
+        try:
+            data = self.fp.read(amt)
+        except RequestError as e:
+            self._trace.finish(e)
+            raise
+        self._trace.bytes += len(data)
+        if amt is None or amt < 0 or (amt and not data):
+            self._trace.finish()
+        return data
+
+    def readinto(self, buffer) -> int:
+        try:
+            size = self.fp.readinto(buffer)
+        except RequestError as e:
+            self._trace.finish(e)
+            raise
+        self._trace.bytes += size
+        if not size and len(buffer):
+            self._trace.finish()
+        return size
+
+    def close(self):
+        self._trace.finish()
+        return super().close()
+
+
+class NetworkTracer:
+    """
+    Traces the requests that are sent through a RequestDirector, when set as its `tracer`
+
+    @param hooks: Callables that are given the RequestTrace of each request once it has finished.
+    """
+
+    def __init__(self, hooks=None):
+        self.hooks = list(hooks or [])
+
+    def start(self, handler: RequestHandler, request: Request) -> RequestTrace:
+        return RequestTrace(handler, request, self.hooks)
+
+
+class Histogram:
+    """Counts of durations in buckets of exponentially growing size"""
+
+    # Upper bounds of the buckets, in seconds. The last bucket has the longer durations
+    BOUNDS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 60)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.counts[bisect.bisect_left(self.BOUNDS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percentile):
+        """Upper bound of the bucket that has the given percentile, or the maximum if it is in the last one"""
+        if not self.count:
+            return None
+        rank = self.count * percentile / 100
+        seen = 0
+        for bound, count in zip(self.BOUNDS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_json(self):
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min,
+            'max': self.max,
+            **{f'p{percentile}': self.percentile(percentile) for percentile in (50, 90, 99)},
+            'buckets': {
+                str(bound): count for bound, count in zip((*self.BOUNDS, 'inf'), self.counts)},
+        }
+
+
+class _TraceGroup:
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.errors = {}
+        self.statuses = {}
+        self.phases = {}
+
+    def add(self, trace: RequestTrace):
+        self.requests += 1
+        self.bytes += trace.bytes
+        if trace.error:
+            self.errors[trace.error] = self.errors.get(trace.error, 0) + 1
+        if trace.status:
+            self.statuses[trace.status] = self.statuses.get(trace.status, 0) + 1
+        for name, duration in (*trace.phases.items(), ('total', trace.duration)):
+            self.phases.setdefault(name, Histogram()).add(duration)
+
+    def to_json(self):
+        return {
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'errors': self.errors,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'phases': {name: histogram.to_json() for name, histogram in self.phases.items()},
+        }
+
+
+class NetworkStats:
+    """Aggregates the RequestTraces of the requests per handler and per host. Use `record` as a NetworkTracer hook"""
+
+    def __init__(self):
+        self._handlers = {}
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def record(self, trace: RequestTrace):
+        with self._lock:
+            self._handlers.setdefault(trace.handler, _TraceGroup()).add(trace)
+            self._hosts.setdefault(trace.host, _TraceGroup()).add(trace)
+
+    def to_json(self):
+        with self._lock:
+            return {
+                'handlers': {name: group.to_json() for name, group in self._handlers.items()},
+                'hosts': {host: group.to_json() for host, group in self._hosts.items()},
+            }
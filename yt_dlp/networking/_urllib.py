@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import collections
 import functools
 import http.client
 import io
 import ssl
+import threading
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -63,6 +65,69 @@ def _create_http_connection(http_class, source_address, *args, **kwargs):
     return hc
 
 
+class _KeepAliveHTTPResponse(http.client.HTTPResponse):
+    """HTTP response that hands its connection back for reuse once it has been read to the end"""
+    _release = None
+    _trailer_read = False
+
+    def _read_and_discard_trailer(self):
+        # Only reached at the end of a chunked response
+        super()._read_and_discard_trailer()
+        self._trailer_read = True
+
+    def _close_conn(self):
+        super()._close_conn()
+        release, self._release = self._release, None
+        if release:
+            # A connection with unread response data left on it cannot be reused
+            release(self.length == 0 or self._trailer_read)
+
+
+class _ConnectionPool:
+    """Idle HTTP connections, kept by host for reuse"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._idle = collections.defaultdict(collections.deque)
+        self._closed = False
+        self._stats = dict.fromkeys(('requests', 'connections', 'tls_handshakes', 'reused'), 0)
+
+    def get(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            while idle:
+                # The most recently used connection is the least likely to have been closed by the server
+                conn = idle.pop()
+                if conn.sock is not None:
+                    return conn
+
+    def put(self, key, conn, reusable=True):
+        with self._lock:
+            idle = self._idle[key]
+            if reusable and not self._closed and len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def count(self, **counts):
+        with self._lock:
+            for name, count in counts.items():
+                self._stats[name] += count
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, 'idle': sum(map(len, self._idle.values()))}
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            connections = [conn for idle in self._idle.values() for conn in idle]
+            self._idle.clear()
+        for conn in connections:
+            conn.close()
+
+
 class HTTPHandler(urllib.request.AbstractHTTPHandler):
     """Handler for HTTP requests and responses.
 
@@ -78,10 +143,19 @@ class HTTPHandler(urllib.request.AbstractHTTPHandler):
     public domain.
     """
 
-    def __init__(self, context=None, source_address=None, *args, **kwargs):
+    def __init__(self, context=None, source_address=None, *args, pool_size=0, **kwargs):
         super().__init__(*args, **kwargs)
         self._source_address = source_address
         self._context = context
+        # Connections are only kept open for reuse if pool_size is set
+        self._pool = _ConnectionPool(pool_size) if pool_size else None
+
+    def close(self):
+        if self._pool:
+            self._pool.close()
+
+    def connection_stats(self):
+        return self._pool.stats() if self._pool else {}
 
     @staticmethod
     def _make_conn_class(base, req):
@@ -91,17 +165,81 @@ def _make_conn_class(base, req):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
         return conn_class
 
+    @staticmethod
+    def _pool_key(scheme, req):
+        return scheme, req.headers.get('Ytdl-socks-proxy'), req.host, req._tunnel_host
+
     def http_open(self, req):
+        pool_key = self._pool_key('http', req)
         conn_class = self._make_conn_class(http.client.HTTPConnection, req)
         return self.do_open(functools.partial(
-            _create_http_connection, conn_class, self._source_address), req)
+            _create_http_connection, conn_class, self._source_address), req, pool_key=pool_key)
 
     def https_open(self, req):
+        pool_key = self._pool_key('https', req)
         conn_class = self._make_conn_class(http.client.HTTPSConnection, req)
         return self.do_open(
             functools.partial(
                 _create_http_connection, conn_class, self._source_address),
-            req, context=self._context)
+            req, pool_key=pool_key, context=self._context)
+
+    def do_open(self, http_class, req, pool_key=None, **http_conn_args):
+        """
+        Same as AbstractHTTPHandler.do_open(), except that the connection is
+        kept open after the response has been read, and reused for later requests
+        """
+        if not self._pool:
+            return super().do_open(http_class, req, **http_conn_args)
+
+        host = req.host
+        if not host:
+            raise urllib.error.URLError('no host given')
+
+        headers = dict(req.unredirected_hdrs)
+        headers.update({k: v for k, v in req.headers.items() if k not in headers})
+        headers = {name.title(): val for name, val in headers.items()}
+        tunnel_headers = {}
+        if req._tunnel_host and 'Proxy-Authorization' in headers:
+            # Proxy-Authorization should not be sent to origin server
+            tunnel_headers['Proxy-Authorization'] = headers.pop('Proxy-Authorization')
+
+        # Other request bodies cannot be sent again if an idle connection turns out to be closed
+        resendable = req.data is None or isinstance(req.data, bytes)
+        while True:
+            h = self._pool.get(pool_key) if resendable else None
+            reused = h is not None
+            if reused:
+                h.timeout = req.timeout
+                h.sock.settimeout(req.timeout)
+            else:
+                h = http_class(host, timeout=req.timeout, **http_conn_args)
+                h.set_debuglevel(self._debuglevel)
+                h.response_class = _KeepAliveHTTPResponse
+                if req._tunnel_host:
+                    h.set_tunnel(req._tunnel_host, headers=tunnel_headers)
+                self._pool.count(connections=1, tls_handshakes=int(pool_key[0] == 'https'))
+
+            try:
+                try:
+                    h.request(req.get_method(), req.selector, req.data, headers,
+                              encode_chunked=req.has_header('Transfer-encoding'))
+                except OSError as err:  # timeout error
+                    raise urllib.error.URLError(err)
+                r = h.getresponse()
+            except BaseException as e:
+                h.close()
+                # The server may have closed the idle connection in the meantime
+                if reused and isinstance(getattr(e, 'reason', e), ConnectionError):
+                    continue
+                raise
+            break
+
+        self._pool.count(requests=1, reused=int(reused))
+        if not r.will_close:
+            r._release = functools.partial(self._pool.put, pool_key, h)
+        r.url = req.get_full_url()
+        r.msg = r.reason
+        return r
 
     @staticmethod
     def deflate(data):
@@ -312,6 +450,16 @@ def read(self, amt=None):
             handle_response_read_exceptions(e)
             raise e
 
+    def readinto(self, buffer):
+        # http.client.HTTPResponse reads directly from the socket into the buffer
+        if not hasattr(self.fp, 'readinto'):
+            return super().readinto(buffer)
+        try:
+            return self.fp.readinto(buffer)
+        except Exception as e:
+            handle_response_read_exceptions(e)
+            raise e
+
 
 def handle_sslerror(e: ssl.SSLError):
     if not isinstance(e, ssl.SSLError):
@@ -344,12 +492,27 @@ def __init__(self, *, enable_file_urls: bool = False, **kwargs):
         if self.enable_file_urls:
             self._SUPPORTED_URL_SCHEMES = (*self._SUPPORTED_URL_SCHEMES, 'file')
 
+    def close(self):
+        self._clear_instances()
+
     def _check_extensions(self, extensions):
         super()._check_extensions(extensions)
         extensions.pop('cookiejar', None)
         extensions.pop('timeout', None)
         extensions.pop('legacy_ssl', None)
 
+    def connection_stats(self):
+        stats = dict.fromkeys(('requests', 'connections', 'tls_handshakes', 'reused', 'idle'), 0)
+        for opener in self._get_instances():
+            for handler in opener.handlers:
+                for name, count in getattr(handler, 'connection_stats', dict)().items():
+                    stats[name] += count
+        return stats
+
+    def _close_instance(self, opener):
+        for handler in opener.handlers:
+            handler.close()
+
     def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
         opener = urllib.request.OpenerDirector()
         handlers = [
@@ -357,7 +520,8 @@ def _create_instance(self, proxies, cookiejar, legacy_ssl_support=None):
             HTTPHandler(
                 debuglevel=int(bool(self.verbose)),
                 context=self._make_sslcontext(legacy_ssl_support=legacy_ssl_support),
-                source_address=self.source_address),
+                source_address=self.source_address,
+                pool_size=self.pool_size),
             HTTPCookieProcessor(cookiejar),
             DataHandler(),
             UnknownHandler(),
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+import contextlib
 import copy
 import enum
 import functools
@@ -13,7 +14,7 @@
 from email.message import Message
 from http import HTTPStatus
 
-from ._helper import make_ssl_context, wrap_request_errors
+from ._helper import get_ssl_context, wrap_request_errors
 from .exceptions import (
     NoSupportingHandlers,
     RequestError,
@@ -32,6 +33,7 @@
 from ..utils.networking import HTTPHeaderDict, normalize_url
 
 DEFAULT_TIMEOUT = 20
+DEFAULT_POOL_SIZE = 10
 
 
 def register_preference(*handlers: type[RequestHandler]):
@@ -57,6 +59,9 @@ class RequestDirector:
     can be registered into the `preferences` set. These are used to sort handlers
     in order of preference.
 
+    GET requests may be answered from `cache`, if it is set to a ResponseCache.
+    Requests are traced by `tracer`, if it is set to a NetworkTracer.
+
     @param logger: Logger instance.
     @param verbose: Print debug request information to stdout.
     """
@@ -66,6 +71,8 @@ def __init__(self, logger, verbose=False):
         self.preferences: set[Preference] = set()
         self.logger = logger  # TODO(Grub4k): default logger
         self.verbose = verbose
+        self.cache = None
+        self.tracer = None
 
     def close(self):
         for handler in self.handlers.values():
@@ -91,6 +98,35 @@ def _print_verbose(self, msg):
         if self.verbose:
             self.logger.stdout(f'director: {msg}')
 
+    def _supported_handlers(self, request: Request, unsupported_errors: list, asynchronous=False):
+        """Yields the handlers that support the request, in order of preference"""
+        handlers = self._get_handlers(request)
+        if asynchronous:
+            # Prefer handlers that do not need to occupy a thread
+            handlers.sort(key=lambda rh: not isinstance(rh, AsyncRequestHandler))
+        for handler in handlers:
+            if not asynchronous and isinstance(handler, AsyncRequestHandler):
+                self._print_verbose(f'Skipping "{handler.RH_NAME}" as it only handles asynchronous requests')
+                continue
+            self._print_verbose(f'Checking if "{handler.RH_NAME}" supports this request.')
+            try:
+                handler.validate(request)
+            except UnsupportedRequest as e:
+                self._print_verbose(
+                    f'"{handler.RH_NAME}" cannot handle this request (reason: {error_to_str(e)})')
+                unsupported_errors.append(e)
+                continue
+            yield handler
+
+    def _report_unsupported_on_send(self, handler, error):
+        self._print_verbose(
+            f'"{handler.RH_NAME}" found it cannot handle this request (reason: {error_to_str(error)})')
+
+    def _report_unexpected_error(self, handler, error):
+        self.logger.error(
+            f'[{handler.RH_NAME}] Unexpected error: {error_to_str(error)}{bug_reports_message()}',
+            is_error=False)
+
     def send(self, request: Request) -> Response:
         """
         Passes a request onto a suitable RequestHandler
@@ -100,32 +136,108 @@ def send(self, request: Request) -> Response:
 
         assert isinstance(request, Request)
 
+        if not self.cache or not self.cache.handles(request):
+            return self._send(request)
+
+        response, request = self.cache.lookup(request)
+        if response:
+            self._print_verbose('Using cached response')
+            return response
+        try:
+            response = self._send(request)
+        except RequestError as e:
+            response = self.cache.revalidated(request, e)
+            if not response:
+                raise
+            self._print_verbose('Cached response was not modified')
+            return response
+        return self.cache.record(request, response)
+
+    def _send(self, request):
         unexpected_errors = []
         unsupported_errors = []
-        for handler in self._get_handlers(request):
-            self._print_verbose(f'Checking if "{handler.RH_NAME}" supports this request.')
+        for handler in self._supported_handlers(request, unsupported_errors):
+            self._print_verbose(f'Sending request via "{handler.RH_NAME}"')
+            trace = self.tracer and self.tracer.start(handler, request)
             try:
-                handler.validate(request)
+                response = self._send_traced(handler, request, trace)
             except UnsupportedRequest as e:
-                self._print_verbose(
-                    f'"{handler.RH_NAME}" cannot handle this request (reason: {error_to_str(e)})')
+                self._report_unsupported_on_send(handler, e)
                 unsupported_errors.append(e)
                 continue
+            except RequestError:
+                raise
+            except Exception as e:
+                self._report_unexpected_error(handler, e)
+                unexpected_errors.append(e)
+                continue
+
+            assert isinstance(response, Response)
+            return trace.wrap(response) if trace else response
+
+        raise NoSupportingHandlers(unsupported_errors, unexpected_errors)
+
+    @staticmethod
+    def _send_traced(handler, request, trace):
+        with trace or contextlib.nullcontext():
+            return handler.send(request)
+
+    async def send_async(self, request: Request) -> Response:
+        """
+        Passes a request onto a suitable RequestHandler from within an asyncio event loop
+
+        AsyncRequestHandlers are tried first. Other handlers are run in the default executor of the loop.
+        """
+        if not self.handlers:
+            raise RequestError('No request handlers configured')
 
+        assert isinstance(request, Request)
+
+        if not self.cache or not self.cache.handles(request):
+            return await self._send_async(request)
+
+        response, request = self.cache.lookup(request)
+        if response:
+            self._print_verbose('Using cached response')
+            return response
+        try:
+            response = await self._send_async(request)
+        except RequestError as e:
+            response = self.cache.revalidated(request, e)
+            if not response:
+                raise
+            self._print_verbose('Cached response was not modified')
+            return response
+        return self.cache.record(request, response)
+
+    async def _send_async(self, request):
+        import asyncio
+
+        unexpected_errors = []
+        unsupported_errors = []
+        for handler in self._supported_handlers(request, unsupported_errors, asynchronous=True):
             self._print_verbose(f'Sending request via "{handler.RH_NAME}"')
+            trace = self.tracer and self.tracer.start(handler, request)
             try:
-                response = handler.send(request)
+                if isinstance(handler, AsyncRequestHandler):
+                    with trace or contextlib.nullcontext():
+                        response = await handler.send_async(request)
+                else:
+                    response = await asyncio.get_running_loop().run_in_executor(
+                        None, self._send_traced, handler, request, trace)
+            except UnsupportedRequest as e:
+                self._report_unsupported_on_send(handler, e)
+                unsupported_errors.append(e)
+                continue
             except RequestError:
                 raise
             except Exception as e:
-                self.logger.error(
-                    f'[{handler.RH_NAME}] Unexpected error: {error_to_str(e)}{bug_reports_message()}',
-                    is_error=False)
+                self._report_unexpected_error(handler, e)
                 unexpected_errors.append(e)
                 continue
 
             assert isinstance(response, Response)
-            return response
+            return trace.wrap(response) if trace else response
 
         raise NoSupportingHandlers(unsupported_errors, unexpected_errors)
 
@@ -165,7 +277,8 @@ class RequestHandler(abc.ABC):
     Any other exception raised will be treated as a handler issue.
 
     If a Request is not supported by the handler, an UnsupportedRequest
-    should be raised with a reason.
+    should be raised with a reason. If this is only found out while sending the request,
+    _send() may raise it too, and the RequestDirector will try the next handler.
 
     By default, some checks are done on the request in _validate() based on the following class variables:
     - `_SUPPORTED_URL_SCHEMES`: a tuple of supported url schemes.
@@ -191,6 +304,7 @@ class RequestHandler(abc.ABC):
             dict with {client_certificate, client_certificate_key, client_certificate_password}
     @param verify: Verify SSL certificates
     @param legacy_ssl_support: Enable legacy SSL options such as legacy server connect and older cipher support.
+    @param pool_size: Maximum number of idle connections to keep open to each host, for handlers that reuse connections.
 
     Some configuration options may be available for individual Requests too. In this case,
     either the Request configuration option takes precedence or they are merged.
@@ -208,6 +322,10 @@ class RequestHandler(abc.ABC):
     - `legacy_ssl`: Enable legacy SSL options for this request. See legacy_ssl_support.
     To enable these, add extensions.pop('<extension>', None) to _check_extensions
 
+    The following extensions are hints, which all RequestHandlers accept and may ignore:
+    - `multiplex`: Many requests will be made to the same server at once.
+    - `cache`: Whether the RequestDirector may answer this request from its response cache.
+
     Apart from the url protocol, proxies dict may contain the following keys:
     - `all`: proxy to use for all protocols. Used as a fallback if no proxy is set for a specific protocol.
     - `no`: comma seperated list of hostnames (optionally with port) to not use a proxy for.
@@ -232,6 +350,7 @@ def __init__(
         client_cert: dict[str, str | None] | None = None,
         verify: bool = True,
         legacy_ssl_support: bool = False,
+        pool_size: int | None = None,
         **_,
     ):
 
@@ -246,14 +365,17 @@ def __init__(
         self._client_cert = client_cert or {}
         self.verify = verify
         self.legacy_ssl_support = legacy_ssl_support
+        self.pool_size = pool_size or DEFAULT_POOL_SIZE
         super().__init__()
 
-    def _make_sslcontext(self, legacy_ssl_support=None):
-        return make_ssl_context(
+    def _make_sslcontext(self, legacy_ssl_support=None, **kwargs):
+        # The context is shared with other handlers; it must not be modified
+        return get_ssl_context(
             verify=self.verify,
             legacy_support=legacy_ssl_support if legacy_ssl_support is not None else self.legacy_ssl_support,
             use_certifi=not self.prefer_system_certs,
             **self._client_cert,
+            **kwargs,
         )
 
     def _merge_headers(self, request_headers):
@@ -317,6 +439,10 @@ def _check_extensions(self, extensions):
         assert isinstance(extensions.get('cookiejar'), (YoutubeDLCookieJar, NoneType))
         assert isinstance(extensions.get('timeout'), (float, int, NoneType))
         assert isinstance(extensions.get('legacy_ssl'), (bool, NoneType))
+        assert isinstance(extensions.get('multiplex'), (bool, NoneType))
+        assert isinstance(extensions.get('cache'), (bool, NoneType))
+        extensions.pop('multiplex', None)
+        extensions.pop('cache', None)
 
     def _validate(self, request):
         self._check_url_scheme(request)
@@ -344,6 +470,18 @@ def _send(self, request: Request):
         """Handle a request from start to finish. Redefine in subclasses."""
         pass
 
+    def connection_stats(self) -> dict[str, int]:
+        """
+        Statistics of the connections made by this handler. Handlers that
+        track them return a dict with the following keys:
+        - `requests`: Number of requests sent, including redirects
+        - `connections`: Number of connections opened
+        - `tls_handshakes`: Number of connections that made a TLS handshake
+        - `reused`: Number of requests sent over an already open connection
+        - `idle`: Number of open connections that are kept for reuse
+        """
+        return {}
+
     def close(self):  # noqa: B027
         pass
 
@@ -363,6 +501,38 @@ def __exit__(self, *args):
         self.close()
 
 
+class AsyncRequestHandler(RequestHandler, abc.ABC):
+    """Asynchronous Request Handler class
+
+    Request handler that processes requests on an asyncio event loop.
+
+    Concrete subclasses need to redefine the _send_async(request) coroutine instead of _send(request).
+    send(request) is still available, and runs the request in a new event loop.
+
+    RequestDirector.send() does not use these handlers; they are only used by RequestDirector.send_async().
+    """
+
+    async def send_async(self, request: Request) -> Response:
+        if not isinstance(request, Request):
+            raise TypeError('Expected an instance of Request')
+        try:
+            return await self._send_async(request)
+        except RequestError as e:
+            if e.handler is None:
+                e.handler = self
+            raise
+
+    def _send(self, request: Request):
+        import asyncio
+
+        return asyncio.run(self._send_async(request))
+
+    @abc.abstractmethod
+    async def _send_async(self, request: Request):
+        """Handle a request from start to finish. Redefine in subclasses."""
+        pass
+
+
 class Request:
     """
     Represents a request to be made.
@@ -538,6 +708,17 @@ def read(self, amt: int | None = None) -> bytes:
         except Exception as e:
             raise TransportError(cause=e) from e
 
+    def readinto(self, buffer) -> int:
+        """
+        Read up to len(buffer) bytes into a writable bytes-like object, such as a memoryview of a bytearray.
+        Returns the number of bytes read, which is 0 at the end of the response.
+
+        Subclasses should redefine this method if they can read without allocating a new bytes object.
+        """
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
     def close(self):
         self.fp.close()
         return super().close()
@@ -519,6 +519,32 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--socket-timeout',
         dest='socket_timeout', type=float, default=None, metavar='SECONDS',
         help='Time to wait before giving up, in seconds')
+    network.add_option(
+        '--http-pool-size',
+        dest='http_pool_size', metavar='N', default=None, type=int,
+        help=(
+            'Maximum number of idle connections to keep open for reuse per host. '
+            'By default, this is 10 or the number of concurrent fragments/connections, whichever is larger'))
+    network.add_option(
+        '--http-cache',
+        action='store_true', dest='http_cache', default=False,
+        help=(
+            'Keep responses to webpage and API requests in memory, and reuse them '
+            'for as long as their Cache-Control/Expires headers allow, revalidating them with ETag/Last-Modified'))
+    network.add_option(
+        '--no-http-cache',
+        action='store_false', dest='http_cache',
+        help='Do not cache responses, except for extractors that require it (default)')
+    network.add_option(
+        '--http-cache-size',
+        dest='http_cache_size', metavar='SIZE', default=None,
+        help=(
+            'Maximum size of the responses kept in memory by --http-cache (e.g. 50M), '
+            'and of the ones kept in the cache with --http-cache-persist. Default is 32M'))
+    network.add_option(
+        '--http-cache-persist',
+        action='store_true', dest='http_cache_persist', default=False,
+        help='Also save cached responses to the cache directory, so that later runs can reuse them')
     network.add_option(
         '--source-address',
         metavar='IP', dest='source_address', default=None,
@@ -688,7 +714,19 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
     selection.add_option(
         '--download-archive', metavar='FILE',
         dest='download_archive',
-        help='Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it')
+        help=(
+            'Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it. '
+            'SQLite databases, and new files ending in .db, .sqlite or .sqlite3, are used as an indexed archive'))
+    selection.add_option(
+        '--download-archive-bloom-filter',
+        action='store_true', dest='download_archive_bloom_filter', default=False,
+        help=(
+            'Keep a Bloom filter of the SQLite --download-archive in FILE.bloom. '
+            'The database is then only queried for videos that may be in the archive'))
+    selection.add_option(
+        '--import-download-archive', metavar='FILE',
+        dest='import_download_archive',
+        help='Add the IDs listed in a text archive file to the --download-archive, e.g. to migrate to an SQLite archive')
     selection.add_option(
         '--no-download-archive',
         dest='download_archive', action='store_const', const=None,
@@ -921,12 +959,31 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
     downloader = optparse.OptionGroup(parser, 'Download Options')
     downloader.add_option(
         '-N', '--concurrent-fragments',
-        dest='concurrent_fragment_downloads', metavar='N', default=1, type=int,
-        help='Number of fragments of a dash/hlsnative video that should be downloaded concurrently (default is %default)')
+        dest='concurrent_fragment_downloads', metavar='N', default=1,
+        help=(
+            'Number of fragments of a dash/hlsnative video that should be downloaded concurrently (default is %default). '
+            'Use "auto" to adjust it during the download, increasing it while the download speed improves '
+            'and decreasing it on errors or when the fragments become slow'))
+    downloader.add_option(
+        '--concurrent-downloads',
+        dest='concurrent_downloads', metavar='N', default=1, type=int,
+        help='Number of input URLs that should be extracted and downloaded concurrently (default is %default)')
+    downloader.add_option(
+        '--http-connections',
+        dest='http_connections', metavar='N', default=1, type=int,
+        help=(
+            'Number of connections to download a plain HTTP(S) file with, each requesting a different part of it. '
+            'Only used if the server supports range requests (default is %default)'))
     downloader.add_option(
         '-r', '--limit-rate', '--rate-limit',
         dest='ratelimit', metavar='RATE',
-        help='Maximum download rate in bytes per second, e.g. 50K or 4.2M')
+        help=(
+            'Maximum download rate in bytes per second, e.g. 50K or 4.2M. '
+            'The limit applies to all downloads and fragments being downloaded at once'))
+    downloader.add_option(
+        '--limit-rate-per-host',
+        dest='ratelimit_per_host', metavar='RATE',
+        help='Maximum download rate in bytes per second from each host, e.g. 50K or 4.2M')
     downloader.add_option(
         '--throttled-rate',
         dest='throttledratelimit', metavar='RATE',
@@ -972,6 +1029,22 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-keep-fragments',
         action='store_false', dest='keep_fragments',
         help='Delete downloaded fragments after downloading is finished (default)')
+    downloader.add_option(
+        '--fragment-buffer-size',
+        dest='fragment_buffer_size', metavar='SIZE', default=None,
+        help=(
+            'Amount of downloaded fragment data to hold in memory before writing it to disk, e.g. 64M. '
+            'Use 0 to write every fragment to its own file (default is 64M)'))
+    downloader.add_option(
+        '--hedge-fragments',
+        action='store_true', dest='hedge_fragments', default=False,
+        help=(
+            'Request a fragment again if it is taking longer than most of the previous fragments, '
+            'and keep whichever response finishes first (DASH, hlsnative and ISM)'))
+    downloader.add_option(
+        '--no-hedge-fragments',
+        action='store_false', dest='hedge_fragments',
+        help='Request each fragment only once, unless it fails (default)')
     downloader.add_option(
         '--buffer-size',
         dest='buffersize', metavar='SIZE', default='1024',
@@ -1014,6 +1087,10 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--no-lazy-playlist',
         action='store_false', dest='lazy_playlist',
         help='Process videos in the playlist only after the entire playlist is parsed (default)')
+    downloader.add_option(
+        '--playlist-prefetch',
+        dest='playlist_prefetch', metavar='N', default=0, type=int,
+        help='Number of upcoming playlist entries to extract in the background while the current one is downloaded (default is %default)')
     downloader.add_option(
         '--xattr-set-filesize',
         dest='xattr_set_filesize', action='store_true',
@@ -1297,6 +1374,21 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
         '--print-traffic', '--dump-headers',
         dest='debug_printtraffic', action='store_true', default=False,
         help='Display sent and read HTTP traffic')
+    verbosity.add_option(
+        '--dump-network-stats',
+        metavar='FILE', dest='dump_network_stats', default=None,
+        help=(
+            'Write the timings of the HTTP requests (DNS, connect, TLS, time to first byte and transfer) '
+            'as histograms per request handler and per host to this JSON file when exiting. '
+            'Use "-" to write them to stdout'))
+    verbosity.add_option(
+        '--profile-startup',
+        dest='profile_startup', action='store_true', default=False,
+        help=(
+            'Print the time taken to import each module when exiting. '
+            'Only has an effect when passed on the command line. The modules imported when loading yt-dlp '
+            'are only included when running the executable or __main__.py, '
+            'or when the YT_DLP_PROFILE_STARTUP environment variable is set'))
     verbosity.add_option(
         '-C', '--call-home',
         dest='call_home', action='store_true', default=False,
@@ -1504,6 +1596,14 @@ def _alias_callback(option, opt_str, value, parser, opts, nargs):
     filesystem.add_option(
         '--no-cache-dir', action='store_false', dest='cachedir',
         help='Disable filesystem caching')
+    filesystem.add_option(
+        '--cache-backend', dest='cache_backend', default=None, metavar='BACKEND',
+        help=(
+            'How the cache is stored. "filesystem" (default) keeps one file per entry in the cache dir, '
+            '"sqlite" keeps all of them in a single database file in the cache dir, '
+            '"memory" only keeps them while yt-dlp runs, and a http(s) URL uses a key-value server '
+            'that can be shared by several machines (GET/PUT of URL/SECTION/KEY). '
+            '--no-cache-dir disables all of them'))
     filesystem.add_option(
         '--rm-cache-dir',
         action='store_true', dest='rm_cachedir',
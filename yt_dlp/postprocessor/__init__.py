@@ -1,47 +1,59 @@
 # flake8: noqa: F401
 
+import importlib
+
 from .common import PostProcessor
-from .embedthumbnail import EmbedThumbnailPP
-from .exec import ExecAfterDownloadPP, ExecPP
-from .ffmpeg import (
-    FFmpegConcatPP,
-    FFmpegCopyStreamPP,
-    FFmpegEmbedSubtitlePP,
-    FFmpegExtractAudioPP,
-    FFmpegFixupDuplicateMoovPP,
-    FFmpegFixupDurationPP,
-    FFmpegFixupM3u8PP,
-    FFmpegFixupM4aPP,
-    FFmpegFixupStretchedPP,
-    FFmpegFixupTimestampPP,
-    FFmpegMergerPP,
-    FFmpegMetadataPP,
-    FFmpegPostProcessor,
-    FFmpegSplitChaptersPP,
-    FFmpegSubtitlesConvertorPP,
-    FFmpegThumbnailsConvertorPP,
-    FFmpegVideoConvertorPP,
-    FFmpegVideoRemuxerPP,
-)
-from .metadataparser import (
-    MetadataFromFieldPP,
-    MetadataFromTitlePP,
-    MetadataParserPP,
-)
-from .modify_chapters import ModifyChaptersPP
-from .movefilesafterdownload import MoveFilesAfterDownloadPP
-from .sponskrub import SponSkrubPP
-from .sponsorblock import SponsorBlockPP
-from .xattrpp import XAttrMetadataPP
 from ..plugins import load_plugins
 
+# The post-processors are only imported when first accessed, see __getattr__
+_POSTPROCESSOR_MODULES = {
+    'EmbedThumbnailPP': 'embedthumbnail',
+    'ExecAfterDownloadPP': 'exec',
+    'ExecPP': 'exec',
+    'FFmpegConcatPP': 'ffmpeg',
+    'FFmpegCopyStreamPP': 'ffmpeg',
+    'FFmpegEmbedSubtitlePP': 'ffmpeg',
+    'FFmpegExtractAudioPP': 'ffmpeg',
+    'FFmpegFixupDuplicateMoovPP': 'ffmpeg',
+    'FFmpegFixupDurationPP': 'ffmpeg',
+    'FFmpegFixupM3u8PP': 'ffmpeg',
+    'FFmpegFixupM4aPP': 'ffmpeg',
+    'FFmpegFixupStretchedPP': 'ffmpeg',
+    'FFmpegFixupTimestampPP': 'ffmpeg',
+    'FFmpegMergerPP': 'ffmpeg',
+    'FFmpegMetadataPP': 'ffmpeg',
+    'FFmpegPostProcessor': 'ffmpeg',
+    'FFmpegSplitChaptersPP': 'ffmpeg',
+    'FFmpegSubtitlesConvertorPP': 'ffmpeg',
+    'FFmpegThumbnailsConvertorPP': 'ffmpeg',
+    'FFmpegVideoConvertorPP': 'ffmpeg',
+    'FFmpegVideoRemuxerPP': 'ffmpeg',
+    'MetadataFromFieldPP': 'metadataparser',
+    'MetadataFromTitlePP': 'metadataparser',
+    'MetadataParserPP': 'metadataparser',
+    'ModifyChaptersPP': 'modify_chapters',
+    'MoveFilesAfterDownloadPP': 'movefilesafterdownload',
+    'SponSkrubPP': 'sponskrub',
+    'SponsorBlockPP': 'sponsorblock',
+    'XAttrMetadataPP': 'xattrpp',
+}
+
 _PLUGIN_CLASSES = load_plugins('postprocessor', 'PP')
 
 
+def __getattr__(name):
+    module = _POSTPROCESSOR_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = globals()[name] = getattr(importlib.import_module(f'.{module}', __name__), name)
+    return value
+
+
 def get_postprocessor(key):
-    return globals()[key + 'PP']
+    name = key + 'PP'
+    return globals().get(name) or __getattr__(name)
 
 
 globals().update(_PLUGIN_CLASSES)
-__all__ = [name for name in globals() if name.endswith('PP')]
-__all__.extend(('PostProcessor', 'FFmpegPostProcessor'))
+__all__ = list(dict.fromkeys((*_POSTPROCESSOR_MODULES, *_PLUGIN_CLASSES)))
+__all__.append('PostProcessor')
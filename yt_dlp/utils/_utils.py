@@ -51,7 +51,6 @@
     compat_HTMLParseError,
     compat_os_name,
 )
-from ..dependencies import xattr
 
 __name__ = __name__.rsplit('.', 1)[0]  # noqa: A001: Pretend to be the parent module
 
@@ -4520,6 +4519,7 @@ def write_xattr(path, key, value):
         return
 
     # UNIX Method 1. Use os.setxattr/xattrs/pyxattrs modules
+    from ..dependencies import xattr
 
     setxattr = None
     if callable(getattr(os, 'setxattr', None)):
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import bisect
+import collections
 import threading
 import time
 
@@ -12,6 +13,8 @@ class ProgressCalculator:
     SAMPLING_RATE = 0.05
     # Time before showing eta (seconds)
     GRACE_PERIOD = 1
+    # Number of most recent durations to calculate the percentiles over
+    DURATION_SAMPLES = 100
 
     def __init__(self, initial: int):
         self._initial = initial or 0
@@ -30,6 +33,7 @@ def __init__(self, initial: int):
 
         self._times = [self._start_time]
         self._downloaded = [self.downloaded]
+        self._durations = collections.deque(maxlen=self.DURATION_SAMPLES)
 
     @property
     def total(self):
@@ -48,6 +52,14 @@ def thread_reset(self):
         with self._lock:
             self._thread_sizes[current_thread] = 0
 
+    def thread_discard(self):
+        """Undo the progress reported by the current thread since its last reset"""
+        current_thread = threading.get_ident()
+        with self._lock:
+            last_size = self._thread_sizes.pop(current_thread, 0)
+            if last_size:
+                self._update(-last_size)
+
     def update(self, size: int | None):
         if not size:
             return
@@ -59,6 +71,19 @@ def update(self, size: int | None):
             self._thread_sizes[current_thread] = size
             self._update(size - last_size)
 
+    def add_duration(self, duration: float):
+        """Record the time taken by one part (e.g. fragment) of the download"""
+        with self._lock:
+            self._durations.append(duration)
+
+    def duration_percentile(self, percentile: float, min_samples: int = 1) -> float | None:
+        """The given percentile of the recent durations, or None if there are too few"""
+        with self._lock:
+            durations = sorted(self._durations)
+        if not durations or len(durations) < min_samples:
+            return None
+        return durations[min(len(durations) - 1, int(len(durations) * percentile / 100))]
+
     def _update(self, size: int):
         current_time = time.monotonic()
 